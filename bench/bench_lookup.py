@@ -0,0 +1,90 @@
+# compares nested lookup latency on a plain DeepChainMap, the CachedDeepChainMap returned by load and
+# the materialized Settings returned by load(..., materialize=True), both by indexing and by
+# Settings.get_path, and the memory allocated by each lookup on the chained mappings
+#
+# usage: python bench/bench_lookup.py
+import timeit
+import tracemalloc
+from typing import Any
+
+from deep_chainmap import DeepChainMap
+
+from alltoml._chainmap import CachedDeepChainMap
+from alltoml._settings import merge_layers
+
+LAYER_COUNT = 6
+MAX_DEPTH = 4
+
+
+def _make_layer(index: int) -> dict[str, Any]:
+    layer: dict[str, Any] = {f"layer{index}": index}
+    target = layer
+    for depth in range(1, MAX_DEPTH):
+        target[f"value{depth}"] = index
+        target = target.setdefault(f"table{depth}", {})
+    target[f"value{MAX_DEPTH}"] = index
+    return layer
+
+
+def _lookup_path(depth: int) -> list[str]:
+    return [*(f"table{d}" for d in range(1, depth)), f"value{depth}"]
+
+
+def _lookup(settings: Any, path: list[str]) -> Any:
+    target = settings
+    for name in path:
+        target = target[name]
+    return target
+
+
+def _per_lookup_ns(settings: Any, path: list[str], number: int) -> float:
+    timer = timeit.Timer(lambda: _lookup(settings, path))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def _per_get_path_ns(settings: Any, path: list[str], number: int) -> float:
+    dotted_path = ".".join(path)
+    timer = timeit.Timer(lambda: settings.get_path(dotted_path))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def _allocated_bytes(settings: Any, path: list[str]) -> int:
+    # the peak above the starting point covers every view built along the way, even the ones that
+    # are freed before the lookup returns
+    _lookup(settings, path)
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        _lookup(settings, path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - start
+
+
+def main(number: int = 10_000) -> None:
+    layers = [_make_layer(i) for i in range(LAYER_COUNT)]
+    chained = DeepChainMap(*layers)
+    cached = CachedDeepChainMap(*layers)
+    materialized = merge_layers(layers)
+    print(
+        f"{'depth':<6} {'DeepChainMap (ns)':>18} {'Cached (ns)':>12} {'Settings (ns)':>14} "
+        f"{'get_path (ns)':>14} {'DeepChainMap (B)':>17} {'Cached (B)':>11}"
+    )
+    for depth in range(1, MAX_DEPTH + 1):
+        path = _lookup_path(depth)
+        chained_ns = _per_lookup_ns(chained, path, number)
+        cached_ns = _per_lookup_ns(cached, path, number)
+        materialized_ns = _per_lookup_ns(materialized, path, number)
+        get_path_ns = _per_get_path_ns(materialized, path, number)
+        chained_bytes = _allocated_bytes(chained, path)
+        cached_bytes = _allocated_bytes(cached, path)
+        print(
+            f"{depth:<6} {chained_ns:>18.0f} {cached_ns:>12.0f} {materialized_ns:>14.0f} "
+            f"{get_path_ns:>14.0f} {chained_bytes:>17} {cached_bytes:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# compares the memory held by the file, environ and argv layers of a config that repeats the same
+# key names and hostnames many times, loaded with and without intern=True, as measured by
+# memory_report, and how long interning adds to loading
+#
+# usage: python bench/bench_memory.py
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Any
+from typing import Callable
+
+from deep_chainmap import DeepChainMap
+
+from alltoml import load_from_argv
+from alltoml import load_from_environ
+from alltoml import load_from_file
+from alltoml import memory_report
+
+SERVICE_COUNT = 2_000
+REGIONS = ["us-east-1", "us-west-2", "eu-central-1"]
+
+
+def _file_content() -> str:
+    return "\n".join(
+        f'[services.service{i}]\nhost = "db.{REGIONS[i % len(REGIONS)]}.example.com"\n'
+        f'region = "{REGIONS[i % len(REGIONS)]}"\nport = 5432\ntimeout = 30.0\n'
+        for i in range(SERVICE_COUNT)
+    )
+
+
+def _environ() -> dict[str, str]:
+    return {
+        f"CONFIG.services.service{i}.region": f'"{REGIONS[(i + 1) % len(REGIONS)]}"'
+        for i in range(0, SERVICE_COUNT, 2)
+    }
+
+
+def _argv() -> list[str]:
+    argv: list[str] = []
+    for i in range(0, SERVICE_COUNT, 4):
+        argv.extend([f"--config.services.service{i}.port", "6543"])
+    return argv
+
+
+def _load_layers(work_path: Path, intern: bool) -> list[dict[str, Any]]:
+    environ = _environ()
+    argv = _argv()
+    return [
+        load_from_argv(argv, intern=intern),
+        load_from_file(work_path, intern=intern),
+        load_from_environ(environ, intern=intern),
+    ]
+
+
+def _seconds(load: Callable[[], Any]) -> float:
+    return min(timeit.Timer(load).repeat(repeat=5, number=1))
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as work_directory:
+        work_path = Path(work_directory)
+        (work_path / "config.toml").write_text(_file_content())
+        print(f"{'intern':<7} {'layer':<8} {'objects':>9} {'bytes':>11} {'load (ms)':>10}")
+        for intern in (False, True):
+            report = memory_report(DeepChainMap(*_load_layers(work_path, intern)))
+            for name, usage in zip(["argv", "file", "environ"], report.layers):
+                print(f"{intern!s:<7} {name:<8} {usage.objects:>9} {usage.bytes:>11}")
+            seconds = _seconds(lambda: _load_layers(work_path, intern))
+            print(
+                f"{intern!s:<7} {'total':<8} {report.total.objects:>9} {report.total.bytes:>11} "
+                f"{seconds * 1000:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# compares the per value cost of the scalar fast path in _convert_value against the full tomllib
+# parse it replaces
+#
+# usage: python bench/bench_parse.py
+import timeit
+
+from alltoml._parse import _convert_toml_value
+from alltoml._parse import _convert_value
+
+VALUES = [
+    "0",
+    "-17",
+    "1_000",
+    "0xDEADBEEF",
+    "3.1415",
+    "6.626e-34",
+    "inf",
+    "true",
+    "'literal string'",
+    '"basic string"',
+    '"escaped\\tstring"',
+    "1979-05-27T07:32:00Z",
+    "[1, 2, 3]",
+    "{ x = 1, y = 2 }",
+]
+
+
+def _per_call_ns(function, raw_value: str, number: int) -> float:
+    timer = timeit.Timer(lambda: function(raw_value))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e9
+
+
+def main(number: int = 10_000) -> None:
+    print(f"{'value':<28} {'tomllib (ns)':>14} {'fast path (ns)':>16} {'speedup':>9}")
+    for raw_value in VALUES:
+        before = _per_call_ns(_convert_toml_value, raw_value, number)
+        after = _per_call_ns(_convert_value, raw_value, number)
+        print(f"{raw_value!r:<28} {before:>14.0f} {after:>16.0f} {before / after:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# benchmarks every loader at production scale and writes the results as JSON so that runs on the
+# same machine can be compared across commits
+#
+# usage: python bench/run.py [--output results.json] [--compare previous.json] [--filter name]
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+from argparse import ArgumentParser
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from unittest.mock import patch
+
+from deep_chainmap import DeepChainMap
+
+import alltoml
+from alltoml._chainmap import CachedDeepChainMap
+from alltoml._settings import merge_layers
+
+ENVIRON_COUNT = 10_000
+ARGV_COUNT = 5_000
+FILE_TABLE_COUNT = 20_000
+LOOKUP_DEPTHS = (1, 2, 4, 8)
+LOOKUP_NUMBER = 10_000
+
+
+def _raw_values(count: int) -> Iterator[str]:
+    # a mix of the kinds of values seen in practice, mostly scalars
+    kinds = [
+        lambda i: str(i),
+        lambda i: f"'host-{i}.example.com'",
+        lambda i: "true",
+        lambda i: f"{i}.5",
+        lambda i: f"[{i}, {i + 1}]",
+        lambda i: f"{{ port = {i}, tls = false }}",
+    ]
+    for i in range(count):
+        yield kinds[i % len(kinds)](i)
+
+
+def _environ() -> dict[str, str]:
+    environ = {f"SERVICE_{i}_PORT": str(i) for i in range(ENVIRON_COUNT)}
+    for i, raw_value in enumerate(_raw_values(ENVIRON_COUNT)):
+        environ[f"CONFIG.group{i % 100}.key{i}"] = raw_value
+    return environ
+
+
+def _argv() -> list[str]:
+    argv: list[str] = []
+    for i, raw_value in enumerate(_raw_values(ARGV_COUNT)):
+        argv.extend([f"--config.group{i % 100}.key{i}", raw_value])
+    return argv
+
+
+def _file_content() -> str:
+    lines: list[str] = []
+    for i in range(FILE_TABLE_COUNT):
+        lines.extend(
+            [
+                f"[routes.route{i}]",
+                f'path = "/api/v1/resource{i}/{{id}}"',
+                f'upstream = "backend-{i % 50}.internal.example.com"',
+                f"port = {8000 + i % 100}",
+                f"timeout = {i % 30}.5",
+                'methods = ["GET", "POST"]',
+                "retry = { attempts = 3, backoff = 0.25 }",
+                "",
+            ]
+        )
+    return "\n".join(lines)
+
+
+def _nested_layer(index: int, depth: int) -> dict[str, Any]:
+    layer: dict[str, Any] = {}
+    target = layer
+    for d in range(1, depth):
+        target[f"value{d}"] = index
+        target = target.setdefault(f"table{d}", {})
+    target[f"value{depth}"] = index
+    return layer
+
+
+def _lookup_path(depth: int) -> list[str]:
+    return [*(f"table{d}" for d in range(1, depth)), f"value{depth}"]
+
+
+def _lookup(settings: Any, path: list[str]) -> Callable[[], Any]:
+    def lookup() -> Any:
+        target = settings
+        for name in path:
+            target = target[name]
+        return target
+
+    return lookup
+
+
+def _benchmarks(work_path: Path) -> Iterator[tuple[str, Callable[[], Any], int]]:
+    environ = _environ()
+    yield "load_from_environ", lambda: alltoml.load_from_environ(environ), 1
+    prefixes = ["CONFIG.", *(f"CONFIG.group{i}." for i in range(10))]
+    yield (
+        "load_from_environ_prefixes",
+        lambda: alltoml.load_from_environ_prefixes(prefixes, environ),
+        1,
+    )
+
+    argv = _argv()
+    yield "load_from_argv", lambda: alltoml.load_from_argv(argv), 1
+
+    file_path = work_path / "config.toml"
+    file_path.write_text(_file_content())
+    cache_path = work_path / "cache"
+    yield "load_from_file", lambda: alltoml.load_from_file(work_path), 1
+    alltoml.load_from_file(work_path, cache_path=cache_path)
+    yield (
+        "load_from_file[cached]",
+        lambda: alltoml.load_from_file(work_path, cache_path=cache_path),
+        1,
+    )
+
+    user_data_path = work_path / "user"
+    user_data_path.mkdir()
+    (user_data_path / "config.toml").write_text("[routes.route0]\nport = 1")
+    with ExitStack() as stack:
+        stack.enter_context(patch("alltoml._load.user_data_dir", return_value=str(user_data_path)))
+        stack.enter_context(
+            patch("alltoml._compile.user_data_dir", return_value=str(user_data_path))
+        )
+        stack.enter_context(patch.object(os, "environ", environ))
+        stack.enter_context(patch.object(sys, "argv", ["bench", *argv]))
+        cwd = os.getcwd()
+        os.chdir(work_path)
+        stack.callback(os.chdir, cwd)
+        yield "load", lambda: alltoml.load("", ""), 1
+        yield "load[materialize]", lambda: alltoml.load("", "", materialize=True), 1
+        snapshot_path = work_path / "snapshot"
+        alltoml.compile_snapshot("", "", snapshot_path)
+        yield "load[snapshot]", lambda: alltoml.load("", "", snapshot=snapshot_path), 1
+
+    for depth in LOOKUP_DEPTHS:
+        layers = [_nested_layer(i, depth) for i in range(6)]
+        path = _lookup_path(depth)
+        chained = DeepChainMap(*layers)
+        cached = CachedDeepChainMap(*layers)
+        materialized = merge_layers(layers)
+        yield f"lookup[depth={depth}]", _lookup(chained, path), LOOKUP_NUMBER
+        yield f"lookup[depth={depth},cached]", _lookup(cached, path), LOOKUP_NUMBER
+        yield f"lookup[depth={depth},materialize]", _lookup(materialized, path), LOOKUP_NUMBER
+        dotted_path = ".".join(path)
+        yield (
+            f"lookup[depth={depth},get_path]",
+            lambda: materialized.get_path(dotted_path),
+            LOOKUP_NUMBER,
+        )
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = ArgumentParser()
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"))
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--filter", default="")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results: dict[str, dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, function, number in _benchmarks(Path(work_dir)):
+            if args.filter not in name:
+                continue
+            times = timeit.Timer(function).repeat(repeat=args.repeat, number=number)
+            per_call = [t / number for t in times]
+            results[name] = {
+                "min": min(per_call),
+                "mean": sum(per_call) / len(per_call),
+                "repeat": args.repeat,
+                "number": number,
+            }
+            print(f"{name:<40} {min(per_call) * 1e6:>14.2f} us", flush=True)
+
+    report = {
+        "commit": _git_commit(),
+        "python": sys.version,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=4))
+
+    if args.compare is not None:
+        previous = json.loads(args.compare.read_text())["results"]
+        print()
+        print(f"{'benchmark':<40} {'previous (us)':>14} {'current (us)':>14} {'change':>8}")
+        for name, result in results.items():
+            if name not in previous:
+                continue
+            before = previous[name]["min"]
+            after = result["min"]
+            print(
+                f"{name:<40} {before * 1e6:>14.2f} {after * 1e6:>14.2f} "
+                f"{(after - before) / before:>+8.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
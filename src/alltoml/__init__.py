@@ -1,7 +1,120 @@
-__all__ = ["load", "load_from_argv", "load_from_environ", "load_from_file"]
+__all__ = [
+    "attach_snapshot",
+    "compile_schema",
+    "compile_snapshot",
+    "ConfigServer",
+    "freeze",
+    "invalidate_load_cache",
+    "LayerStats",
+    "load",
+    "load_async",
+    "load_from_argv",
+    "load_from_envfile",
+    "load_from_environ",
+    "load_from_environ_prefixes",
+    "load_from_file",
+    "load_from_file_async",
+    "load_from_server",
+    "load_many",
+    "LoadStats",
+    "memory_report",
+    "MemoryReport",
+    "MemoryUsage",
+    "publish_snapshot",
+    "SchemaError",
+    "Settings",
+    "SettingsChange",
+    "SettingsUpdate",
+    "Snapshot",
+    "update_settings",
+    "watch",
+    "watch_async",
+    "Watcher",
+]
 
+from importlib import import_module
+from typing import TYPE_CHECKING
+from typing import Any
 
-from ._argv import load_from_argv
-from ._environ import load_from_environ
-from ._file import load_from_file
-from ._load import load
+if TYPE_CHECKING:
+    from ._argv import load_from_argv
+    from ._async import load_async
+    from ._async import load_from_file_async
+    from ._async import watch_async
+    from ._compile import compile_snapshot
+    from ._envfile import load_from_envfile
+    from ._environ import load_from_environ
+    from ._environ import load_from_environ_prefixes
+    from ._file import load_from_file
+    from ._load import invalidate_load_cache
+    from ._load import load
+    from ._load import load_many
+    from ._memory import MemoryReport
+    from ._memory import MemoryUsage
+    from ._memory import memory_report
+    from ._schema import SchemaError
+    from ._schema import compile_schema
+    from ._server import ConfigServer
+    from ._server import load_from_server
+    from ._settings import Settings
+    from ._settings import SettingsChange
+    from ._settings import SettingsUpdate
+    from ._settings import freeze
+    from ._settings import update_settings
+    from ._snapshot import Snapshot
+    from ._snapshot import attach_snapshot
+    from ._snapshot import publish_snapshot
+    from ._stats import LayerStats
+    from ._stats import LoadStats
+    from ._watch import Watcher
+    from ._watch import watch
+
+# the submodules (and their dependencies) are only imported once one of their attributes is used,
+# so that a program only using load_from_environ doesn't pay for platformdirs, asyncio, etc.
+_ATTRIBUTE_MODULES = {
+    "attach_snapshot": "._snapshot",
+    "compile_schema": "._schema",
+    "compile_snapshot": "._compile",
+    "ConfigServer": "._server",
+    "freeze": "._settings",
+    "invalidate_load_cache": "._load",
+    "LayerStats": "._stats",
+    "load": "._load",
+    "load_async": "._async",
+    "load_from_argv": "._argv",
+    "load_from_envfile": "._envfile",
+    "load_from_environ": "._environ",
+    "load_from_environ_prefixes": "._environ",
+    "load_from_file": "._file",
+    "load_from_file_async": "._async",
+    "load_from_server": "._server",
+    "load_many": "._load",
+    "LoadStats": "._stats",
+    "memory_report": "._memory",
+    "MemoryReport": "._memory",
+    "MemoryUsage": "._memory",
+    "publish_snapshot": "._snapshot",
+    "SchemaError": "._schema",
+    "Settings": "._settings",
+    "SettingsChange": "._settings",
+    "SettingsUpdate": "._settings",
+    "Snapshot": "._snapshot",
+    "update_settings": "._settings",
+    "watch": "._watch",
+    "watch_async": "._async",
+    "Watcher": "._watch",
+}
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module_name = _ATTRIBUTE_MODULES[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__})
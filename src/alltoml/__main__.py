@@ -0,0 +1,44 @@
+import os
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+
+from ._compile import compile_snapshot
+from ._load import _get_environ_keys
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = ArgumentParser(prog="python -m alltoml")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compile_parser = commands.add_parser(
+        "compile", help="compile the config files of an application into a snapshot for load"
+    )
+    compile_parser.add_argument("application_name")
+    compile_parser.add_argument("application_author")
+    compile_parser.add_argument("output", type=Path)
+    compile_parser.add_argument(
+        "--config",
+        type=Path,
+        help="the config file load will be given, defaults to the one in the environment",
+    )
+    args = parser.parse_args(argv)
+
+    file_path = args.config
+    if file_path is None:
+        _, file_environ_key = _get_environ_keys(args.application_name)
+        try:
+            file_path = Path(os.environ[file_environ_key])
+        except KeyError:
+            pass
+    try:
+        compile_snapshot(
+            args.application_name, args.application_author, args.output, file_path=file_path
+        )
+    except (OSError, ValueError) as ex:
+        print(f"error: {ex}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,16 @@
 __all__ = ["load_from_argv"]
 
 import sys
+from functools import partial
 from itertools import islice
+from typing import IO
 from typing import Any
 from typing import Callable
 from typing import Iterable
+from typing import Iterator
 
-from ._parse import store_settings
+from ._intern import intern_settings
+from ._parse import store_many_settings
 
 
 def load_from_argv(
@@ -15,27 +19,104 @@ def load_from_argv(
     on_extra: Callable[[str], None] = lambda n: None,
     on_failure: Callable[[str, str | None], None] = lambda n, v: None,
     prefix: str = "--config.",
+    response_files: bool = False,
+    intern: bool = False,
 ) -> dict[str, Any]:
     settings: dict[str, Any] = {}
 
     if argv is None:
         argv = sys.argv[1:]
 
-    argv_i = iter(argv)
-    while True:
-        try:
-            arg = next(argv_i)
-        except StopIteration:
-            break
-        if arg.startswith(prefix):
-            raw_key = arg[len(prefix) :]
+    entries: list[tuple[str, str, Callable[[], None]]] = []
+    missing_value_arg: str | None = None
+    arguments = _Arguments(argv, response_files, on_failure)
+    try:
+        while True:
+            argument = arguments.next(expand=True)
+            if argument is None:
+                break
+            arg, name = argument
+            if arg.startswith(prefix):
+                raw_key = arg[len(prefix) :]
+                value_argument = arguments.next(expand=False)
+                if value_argument is None:
+                    missing_value_arg = name
+                    break
+                raw_value = value_argument[0]
+                entries.append((raw_key, raw_value, partial(on_failure, name, raw_value)))
+            else:
+                on_extra(name)
+    finally:
+        arguments.close()
+
+    store_many_settings(settings, entries)
+    if missing_value_arg is not None:
+        on_failure(missing_value_arg, None)
+
+    if intern:
+        return intern_settings(settings)
+    return settings
+
+
+class _Arguments:
+    # the arguments with the lines of each response file spliced in place of its @path argument,
+    # the files are read a line at a time as the arguments are consumed
+    def __init__(
+        self,
+        argv: Iterable[str],
+        response_files: bool,
+        on_failure: Callable[[str, str | None], None],
+    ) -> None:
+        self._response_files = response_files
+        self._on_failure = on_failure
+        # (lines, path, file, name of the @path argument)
+        self._sources: list[tuple[Iterator[tuple[int, str]], str | None, IO[str] | None, str]] = [
+            (enumerate(argv), None, None, "")
+        ]
+
+    def next(self, *, expand: bool) -> tuple[str, str] | None:
+        # returns the argument and the name to report it by, values are never expanded
+        while self._sources:
+            lines, path, file, file_name = self._sources[-1]
             try:
-                raw_value = next(argv_i)
+                line_number, arg = next(lines)
             except StopIteration:
-                on_failure(arg, None)
+                self._pop()
                 continue
-            store_settings(settings, raw_key, raw_value, lambda: on_failure(arg, raw_value))
-        else:
-            on_extra(arg)
+            except (OSError, UnicodeDecodeError):
+                self._pop()
+                self._on_failure(file_name, None)
+                continue
+            if path is None:
+                name = arg
+            else:
+                arg = arg.rstrip("\r\n")
+                if not arg:
+                    continue
+                name = f"{arg} ({path}:{line_number + 1})"
+            if expand and self._response_files and arg.startswith("@"):
+                self._push(arg[1:], name)
+                continue
+            return arg, name
+        return None
 
-    return settings
+    def close(self) -> None:
+        while self._sources:
+            self._pop()
+
+    def _push(self, path: str, name: str) -> None:
+        # a response file that includes itself would never end
+        if any(source_path == path for _, source_path, _, _ in self._sources):
+            self._on_failure(name, None)
+            return
+        try:
+            file = open(path, encoding="utf8")
+        except OSError:
+            self._on_failure(name, None)
+            return
+        self._sources.append((enumerate(file), path, file, name))
+
+    def _pop(self) -> None:
+        _, _, file, _ = self._sources.pop()
+        if file is not None:
+            file.close()
@@ -0,0 +1,104 @@
+__all__ = ["load_async", "load_from_file_async", "watch_async"]
+
+import asyncio
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Mapping
+
+from ._file import DEFAULT_FILE_CACHE_MAX_SIZE
+from ._file import load_from_file
+from ._load import load
+from ._settings import Settings
+from ._stats import LoadStats
+from ._watch import Watcher
+
+if TYPE_CHECKING:
+    from ._server import ConfigServer
+
+
+async def load_from_file_async(
+    base_path: Path,
+    *,
+    name: Path = Path("config.toml"),
+    on_failure: Callable[[Path], None] = lambda p: None,
+    cache_path: Path | None = None,
+    cache_max_size: int = DEFAULT_FILE_CACHE_MAX_SIZE,
+    intern: bool = False,
+) -> dict[str, Any]:
+    return await asyncio.to_thread(
+        load_from_file,
+        base_path,
+        name=name,
+        on_failure=on_failure,
+        cache_path=cache_path,
+        cache_max_size=cache_max_size,
+        intern=intern,
+    )
+
+
+async def load_async(
+    application_name: str,
+    application_author: str,
+    *,
+    default_settings: Mapping[str, Any] | None = None,
+    materialize: bool = False,
+    cache: bool = False,
+    file_cache: bool = False,
+    lazy: bool = False,
+    stats: Callable[[LoadStats], None] | None = None,
+    frozen: bool = False,
+    envfile: Path | None = None,
+    snapshot: Path | None = None,
+    config_server: "ConfigServer | None" = None,
+    intern: bool = False,
+    response_files: bool = False,
+) -> Mapping[str, Any]:
+    # the whole of load runs in a worker thread rather than a copy of it being kept here, so that
+    # both always load the same layers the same way
+    return await asyncio.to_thread(
+        load,
+        application_name,
+        application_author,
+        default_settings=default_settings,
+        materialize=materialize,
+        cache=cache,
+        file_cache=file_cache,
+        lazy=lazy,
+        stats=stats,
+        frozen=frozen,
+        envfile=envfile,
+        snapshot=snapshot,
+        config_server=config_server,
+        intern=intern,
+        response_files=response_files,
+    )
+
+
+async def watch_async(
+    application_name: str,
+    application_author: str,
+    *,
+    default_settings: Mapping[str, Any] | None = None,
+    interval: float = 1.0,
+    frozen: bool = False,
+    config_server: "ConfigServer | None" = None,
+    response_files: bool = False,
+) -> AsyncIterator[Settings]:
+    watcher = await asyncio.to_thread(
+        Watcher,
+        application_name,
+        application_author,
+        default_settings=default_settings,
+        interval=interval,
+        frozen=frozen,
+        config_server=config_server,
+        response_files=response_files,
+    )
+    yield watcher.settings
+    while True:
+        await asyncio.sleep(interval)
+        if await asyncio.to_thread(watcher.poll):
+            yield watcher.settings
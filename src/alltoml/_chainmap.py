@@ -0,0 +1,62 @@
+__all__ = ["CachedDeepChainMap"]
+
+from typing import Any
+from typing import Final
+from typing import Mapping
+from typing import MutableMapping
+
+from deep_chainmap import DeepChainMap
+
+_MISSING: Final = object()
+
+
+class CachedDeepChainMap(DeepChainMap[str, Any]):
+    # the merged view of each table is built the first time it is looked up and then reused, so
+    # walking into the same tables again doesn't rebuild them, a view is forgotten when its key is
+    # modified through this mapping (the layers themselves must not be modified directly)
+    def __init__(self, *maps: MutableMapping[str, Any]) -> None:
+        super().__init__(*maps)
+        self._children: dict[str, CachedDeepChainMap] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._children[key]
+        except KeyError:
+            pass
+        submaps = [mapping for mapping in self.maps if key in mapping]
+        if not submaps:
+            return self.__missing__(key)
+        value = submaps[0][key]
+        if isinstance(value, Mapping):
+            # unlike DeepChainMap, values below that aren't tables are skipped rather than becoming
+            # layers of the view, the same as merge_layers
+            value = self._children[key] = CachedDeepChainMap(
+                *(submap[key] for submap in submaps if isinstance(submap[key], Mapping))
+            )
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._children.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self._children.pop(key, None)
+        super().__delitem__(key)
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        self._children.pop(key, None)
+        if default is _MISSING:
+            return super().pop(key)
+        return super().pop(key, default)
+
+    def popitem(self) -> tuple[str, Any]:
+        self._children.clear()
+        return super().popitem()
+
+    def clear(self) -> None:
+        self._children.clear()
+        super().clear()
+
+    def __ior__(self, other: Any) -> "CachedDeepChainMap":
+        self._children.clear()
+        return super().__ior__(other)
@@ -0,0 +1,93 @@
+__all__ = ["compile_snapshot", "read_compiled_snapshot"]
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Any
+from typing import Final
+
+from platformdirs import user_data_dir
+
+from ._load import _get_file_paths
+from ._snapshot import _read_snapshot
+from ._snapshot import _write_snapshot
+
+_COMPILED_MAGIC: Final = b"ALLTOMLC"
+
+# the absolute path of a config file, its modification time and size and the sha256 of its content,
+# the last two are None if the file didn't exist
+_Source = tuple[str | None, tuple[int, int] | None, bytes | None]
+
+
+def compile_snapshot(
+    application_name: str, application_author: str, path: Path, *, file_path: Path | None = None
+) -> None:
+    import tomllib
+
+    user_data_path = Path(user_data_dir(application_name, application_author))
+    sources: list[_Source] = []
+    layers: list[dict[str, Any]] = []
+    for source_path in _get_file_paths(file_path, user_data_path):
+        if source_path is None:
+            sources.append((None, None, None))
+            layers.append({})
+            continue
+        absolute_path = os.path.abspath(source_path)
+        try:
+            with open(source_path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                content = file.read()
+        except FileNotFoundError:
+            # only the file that was asked for explicitly has to exist
+            if source_path is file_path:
+                raise
+            sources.append((absolute_path, None, None))
+            layers.append({})
+            continue
+        try:
+            settings = tomllib.loads(content.decode("utf8"))
+        except (UnicodeDecodeError, tomllib.TOMLDecodeError) as ex:
+            raise ValueError(f"{str(source_path)!r} is not a valid config file") from ex
+        sources.append(
+            (absolute_path, (stat.st_mtime_ns, stat.st_size), hashlib.sha256(content).digest())
+        )
+        layers.append(settings)
+    # a compiled snapshot is never republished in place, so its generation doesn't mean anything
+    _write_snapshot(path, _COMPILED_MAGIC, (sources, layers), 1)
+
+
+def read_compiled_snapshot(
+    path: Path, file_paths: tuple[Path | None, Path, Path]
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]] | None:
+    # returns None if any of the config files has changed since the snapshot was compiled
+    _, (sources, layers) = _read_snapshot(path, _COMPILED_MAGIC)
+    if len(sources) != len(file_paths) or len(layers) != len(file_paths):
+        raise ValueError(f"{str(path)!r} is corrupt")
+    if not all(_is_fresh(source, p) for source, p in zip(sources, file_paths)):
+        return None
+    file_settings, cwd_file_settings, user_file_settings = layers
+    return file_settings, cwd_file_settings, user_file_settings
+
+
+def _is_fresh(source: _Source, file_path: Path | None) -> bool:
+    source_path, source_stat, source_digest = source
+    if file_path is None or source_path is None:
+        return file_path is None and source_path is None
+    if os.path.abspath(file_path) != source_path:
+        return False
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return source_stat is None
+    if source_stat is None:
+        return False
+    if (stat.st_mtime_ns, stat.st_size) == source_stat:
+        return True
+    if stat.st_size != source_stat[1]:
+        return False
+    # copying the file into an image may change its modification time without changing its content
+    try:
+        with open(file_path, "rb") as file:
+            return hashlib.file_digest(file, "sha256").digest() == source_digest
+    except OSError:
+        return False
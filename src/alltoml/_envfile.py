@@ -0,0 +1,45 @@
+__all__ = ["load_from_envfile"]
+
+from functools import partial
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+
+from ._intern import intern_settings
+from ._parse import store_many_settings
+
+
+def load_from_envfile(
+    path: Path,
+    *,
+    prefix: str = "CONFIG.",
+    on_failure: Callable[[str, str | None], None] = lambda n, v: None,
+    intern: bool = False,
+) -> dict[str, Any]:
+    settings: dict[str, Any] = {}
+    with open(path, encoding="utf8") as file:
+        # the entries are streamed from the file straight into the settings
+        store_many_settings(settings, _read_entries(file, prefix, on_failure))
+    if intern:
+        return intern_settings(settings)
+    return settings
+
+
+def _read_entries(
+    lines: Iterable[str], prefix: str, on_failure: Callable[[str, str | None], None]
+) -> Iterator[tuple[str, str, Callable[[], None]]]:
+    # follows docker's env-file format: KEY=VALUE on each line with the value taken literally, blank
+    # lines and lines starting with # are ignored
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip()
+        if not line or line.startswith("#"):
+            continue
+        key, separator, raw_value = line.partition("=")
+        if not key.startswith(prefix):
+            continue
+        if not separator:
+            on_failure(key, None)
+            continue
+        yield key[len(prefix) :], raw_value, partial(on_failure, key, raw_value)
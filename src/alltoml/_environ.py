@@ -1,6 +1,7 @@
-__all__ = ["load_from_environ"]
+__all__ = ["load_from_environ", "load_from_environ_prefixes"]
 
 import os
+from functools import partial
 from itertools import islice
 from os import environ
 from re import sub as re_sub
@@ -9,13 +10,15 @@ from types import UnionType
 from typing import Any
 from typing import Callable
 from typing import Final
+from typing import Iterable
 from typing import Mapping
 from typing import Sequence
 from typing import Union
 from typing import get_args as get_typing_args
 from typing import get_origin as get_typing_origin
 
-from ._parse import store_settings
+from ._intern import intern_settings
+from ._parse import store_many_settings
 
 
 def load_from_environ(
@@ -23,15 +26,81 @@ def load_from_environ(
     *,
     prefix: str = "CONFIG.",
     on_failure: Callable[[str, str], None] = lambda n, v: None,
+    intern: bool = False,
 ) -> dict[str, Any]:
     settings: dict[str, Any] = {}
 
     if environ is None:
         environ = os.environ
 
-    for key, raw_value in environ.items():
-        if key.startswith(prefix):
-            raw_key = key[len(prefix) :]
-            store_settings(settings, raw_key, raw_value, lambda: on_failure(key, raw_value))
+    store_many_settings(
+        settings,
+        [
+            (key[len(prefix) :], raw_value, partial(on_failure, key, raw_value))
+            for key, raw_value in environ.items()
+            if key.startswith(prefix)
+        ],
+    )
 
+    if intern:
+        return intern_settings(settings)
     return settings
+
+
+def load_from_environ_prefixes(
+    prefixes: Iterable[str],
+    environ: Mapping[str, str] | None = None,
+    *,
+    on_failure: Callable[[str, str], None] = lambda n, v: None,
+) -> dict[str, dict[str, Any]]:
+    if environ is None:
+        environ = os.environ
+
+    prefix_trie = _PrefixTrie(prefixes)
+    entries: dict[str, list[tuple[str, str, Callable[[], None]]]] = {
+        prefix: [] for prefix in prefix_trie.prefixes
+    }
+    for key, raw_value in environ.items():
+        for prefix in prefix_trie.match(key):
+            entries[prefix].append(
+                (key[len(prefix) :], raw_value, partial(on_failure, key, raw_value))
+            )
+
+    result: dict[str, dict[str, Any]] = {}
+    for prefix, prefix_entries in entries.items():
+        result[prefix] = settings = {}
+        store_many_settings(settings, prefix_entries)
+    return result
+
+
+class _PrefixTrie:
+    __slots__ = ("prefixes", "_root")
+
+    def __init__(self, prefixes: Iterable[str]):
+        self.prefixes: list[str] = []
+        # each node maps a character to the next node, the prefix ending at a node is stored under
+        # the None key
+        self._root: dict[str | None, Any] = {}
+        for prefix in prefixes:
+            node = self._root
+            for character in prefix:
+                node = node.setdefault(character, {})
+            if None not in node:
+                node[None] = prefix
+                self.prefixes.append(prefix)
+
+    def match(self, key: str) -> list[str]:
+        # walks the key only as far as some prefix agrees with it, so keys that don't share a
+        # prefix (the vast majority of a typical environment) are rejected after a character or two
+        node = self._root
+        matches: list[str] = []
+        if None in node:
+            matches.append(node[None])
+        for character in key:
+            try:
+                node = node[character]
+            except KeyError:
+                break
+            if None in node:
+                matches.append(node[None])
+        return matches
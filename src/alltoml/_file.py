@@ -1,9 +1,14 @@
-__all__ = ["load_from_file"]
+__all__ = ["DEFAULT_FILE_CACHE_MAX_SIZE", "load_from_file"]
 
-import tomllib
+import os
 from pathlib import Path
 from typing import Any
 from typing import Callable
+from typing import Final
+
+from ._intern import intern_settings
+
+DEFAULT_FILE_CACHE_MAX_SIZE: Final = 64 * 1024 * 1024
 
 
 def load_from_file(
@@ -11,11 +16,58 @@ def load_from_file(
     *,
     name: Path = Path("config.toml"),
     on_failure: Callable[[Path], None] = lambda p: None,
+    cache_path: Path | None = None,
+    cache_max_size: int = DEFAULT_FILE_CACHE_MAX_SIZE,
+    intern: bool = False,
 ) -> dict[str, Any]:
     file_path = base_path / name
+    if cache_path is not None:
+        settings = _load_from_file_cached(file_path, on_failure, cache_path, cache_max_size)
+    else:
+        settings = _load_from_file_uncached(file_path, on_failure)
+    if intern:
+        return intern_settings(settings)
+    return settings
+
+
+def _load_from_file_uncached(
+    file_path: Path, on_failure: Callable[[Path], None]
+) -> dict[str, Any]:
+    import tomllib
+
     try:
         with open(file_path, "rb") as file:
             return tomllib.load(file)
-    except (OSError, tomllib.TOMLDecodeError):
+    except (OSError, UnicodeDecodeError, tomllib.TOMLDecodeError):
         on_failure(file_path)
     return {}
+
+
+def _load_from_file_cached(
+    file_path: Path, on_failure: Callable[[Path], None], cache_path: Path, cache_max_size: int
+) -> dict[str, Any]:
+    # the cache pulls in pickle, hashlib and tempfile which aren't needed otherwise
+    from ._file_cache import read_file_cache
+    from ._file_cache import write_file_cache
+
+    try:
+        with open(file_path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            content = file.read()
+    except OSError:
+        on_failure(file_path)
+        return {}
+
+    settings = read_file_cache(cache_path, file_path, stat, content)
+    if settings is not None:
+        return settings
+
+    import tomllib
+
+    try:
+        settings = tomllib.loads(content.decode("utf8"))
+    except (UnicodeDecodeError, tomllib.TOMLDecodeError):
+        on_failure(file_path)
+        return {}
+    write_file_cache(cache_path, file_path, stat, content, settings, cache_max_size)
+    return settings
@@ -0,0 +1,113 @@
+__all__ = ["read_file_cache", "write_file_cache"]
+
+import os
+import pickle
+import struct
+from hashlib import blake2b
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any
+from typing import Final
+
+_MAGIC: Final = b"ALLTOMLF"
+_FORMAT_VERSION: Final = 2
+_SUFFIX: Final = ".alltoml-cache"
+# magic, format version, digest of the file's path, size, modification time and content, followed by
+# the pickled settings
+_HEADER: Final = struct.Struct("<8sI32s")
+_STAT: Final = struct.Struct("<Qq")
+
+
+def read_file_cache(
+    cache_path: Path, file_path: Path, stat: os.stat_result, content: bytes
+) -> dict[str, Any] | None:
+    entry_path = _get_entry_path(cache_path, file_path)
+    try:
+        with open(entry_path, "rb") as entry_file:
+            # the settings are only unpickled once the header shows that they were written for
+            # this version of this file
+            if entry_file.read(_HEADER.size) != _get_header(file_path, stat, content):
+                return None
+            settings = pickle.load(entry_file)
+    except Exception:
+        # the cache is only an optimization, anything wrong with it is treated as a miss
+        return None
+    # the modification time of an entry is how recently it was used
+    try:
+        os.utime(entry_path)
+    except OSError:
+        pass
+    return settings
+
+
+def write_file_cache(
+    cache_path: Path,
+    file_path: Path,
+    stat: os.stat_result,
+    content: bytes,
+    settings: dict[str, Any],
+    max_size: int,
+) -> None:
+    try:
+        cache_path.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file and then move it into place so that readers never see a
+        # partially written entry
+        entry_file = NamedTemporaryFile("wb", dir=cache_path, suffix=".tmp", delete=False)
+    except OSError:
+        return
+    replaced = False
+    try:
+        with entry_file:
+            entry_file.write(_get_header(file_path, stat, content))
+            pickle.dump(settings, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(entry_file.name, _get_entry_path(cache_path, file_path))
+        replaced = True
+    except OSError:
+        return
+    finally:
+        if not replaced:
+            try:
+                os.unlink(entry_file.name)
+            except OSError:
+                pass
+    _evict(cache_path, max_size)
+
+
+def _get_entry_path(cache_path: Path, file_path: Path) -> Path:
+    name = sha256(str(file_path.absolute()).encode("utf8")).hexdigest()
+    return cache_path / f"{name}{_SUFFIX}"
+
+
+def _get_header(file_path: Path, stat: os.stat_result, content: bytes) -> bytes:
+    key = blake2b(digest_size=32)
+    # a path can't contain a null, so it can't run into the fixed size stat that follows it
+    key.update(os.fsencode(file_path.absolute()) + b"\0")
+    key.update(_STAT.pack(stat.st_size, stat.st_mtime_ns))
+    key.update(content)
+    return _HEADER.pack(_MAGIC, _FORMAT_VERSION, key.digest())
+
+
+def _evict(cache_path: Path, max_size: int) -> None:
+    # least recently used entries are removed until the cache fits in max_size
+    entries: list[tuple[int, int, Path]] = []
+    total_size = 0
+    try:
+        for entry_path in cache_path.glob(f"*{_SUFFIX}"):
+            try:
+                stat = entry_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry_path))
+            total_size += stat.st_size
+    except OSError:
+        return
+    entries.sort()
+    for _, size, entry_path in entries:
+        if total_size <= max_size:
+            break
+        try:
+            entry_path.unlink()
+        except OSError:
+            continue
+        total_size -= size
@@ -0,0 +1,39 @@
+__all__ = ["intern_settings"]
+
+import sys
+from typing import Any
+from typing import Mapping
+
+
+def intern_settings(
+    settings: Mapping[str, Any], pool: dict[tuple[type, Any], Any] | None = None
+) -> dict[str, Any]:
+    # rebuilds the settings with every key and string interned and every equal int or float
+    # replaced by the same object, the pool can be shared between calls to share the ints and
+    # floats too
+    #
+    # datetimes and times aren't deduplicated since equal ones may be in different timezones
+    if pool is None:
+        pool = {}
+    return _intern_table(settings, pool)
+
+
+def _intern_table(table: Mapping[str, Any], pool: dict[tuple[type, Any], Any]) -> dict[str, Any]:
+    # the keys of an existing dict can't be replaced, so the dict has to be rebuilt
+    return {sys.intern(key): _intern_value(value, pool) for key, value in table.items()}
+
+
+def _intern_value(value: Any, pool: dict[tuple[type, Any], Any]) -> Any:
+    value_type = type(value)
+    if value_type is str:
+        return sys.intern(value)
+    if value_type is int:
+        return pool.setdefault((int, value), value)
+    if value_type is float:
+        # 0.0 and -0.0 are equal but aren't interchangeable
+        return pool.setdefault((float, value.hex()), value)
+    if value_type is dict:
+        return _intern_table(value, pool)
+    if value_type is list:
+        return [_intern_value(item, pool) for item in value]
+    return value
@@ -0,0 +1,101 @@
+__all__ = ["LazyChainMap", "LazyLayer"]
+
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Iterator
+from typing import Mapping
+from typing import MutableMapping
+from typing import Sequence
+
+from ._chainmap import CachedDeepChainMap
+
+
+class LazyLayer:
+    __slots__ = ("_load", "_lock", "_mapping")
+
+    def __init__(self, load: Callable[[], Mapping[str, Any]]) -> None:
+        self._load: Callable[[], Mapping[str, Any]] | None = load
+        self._lock = Lock()
+        self._mapping: Mapping[str, Any] | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._mapping is not None
+
+    def get(self) -> Mapping[str, Any]:
+        if self._mapping is None:
+            with self._lock:
+                if self._mapping is None:
+                    assert self._load is not None
+                    self._mapping = self._load()
+                    self._load = None
+        return self._mapping
+
+
+class LazyChainMap(Mapping[str, Any]):
+    # layers are in order of precedence (the first layer wins) and a layer is only loaded once a
+    # lookup misses every layer above it, the view of each table is built the first time it is
+    # looked up and then reused like CachedDeepChainMap's
+    __slots__ = ("_layers", "_children")
+
+    def __init__(self, layers: Sequence[LazyLayer]) -> None:
+        self._layers = layers
+        self._children: dict[str, CachedDeepChainMap] = {}
+
+    @property
+    def maps(self) -> list[Mapping[str, Any]]:
+        return [layer.get() for layer in self._layers]
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return self._children[key]
+        except KeyError:
+            pass
+        for i, layer in enumerate(self._layers):
+            mapping = layer.get()
+            if key not in mapping:
+                continue
+            value = mapping[key]
+            table = _as_table(value)
+            if table is None:
+                return value
+            # a table may be extended by any of the layers below it
+            submaps = [table]
+            for lower_layer in self._layers[i + 1 :]:
+                lower_mapping = lower_layer.get()
+                try:
+                    lower_table = _as_table(lower_mapping[key])
+                except KeyError:
+                    continue
+                if lower_table is not None:
+                    submaps.append(lower_table)
+            # another thread may have built the view first, both views are equal but only one is
+            # kept so that every lookup gets the same one
+            return self._children.setdefault(key, CachedDeepChainMap(*submaps))
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return any(key in layer.get() for layer in self._layers)
+
+    def __iter__(self) -> Iterator[str]:
+        keys: dict[str, None] = {}
+        for mapping in reversed(self.maps):
+            keys.update(dict.fromkeys(mapping))
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.maps!r})"
+
+
+def _as_table(value: Any) -> MutableMapping[str, Any] | None:
+    if isinstance(value, MutableMapping):
+        return value
+    if isinstance(value, Mapping):
+        # the view only writes to its first table, so a table that can't be written to (such as a
+        # frozen Settings in the default settings) is read from a copy
+        return dict(value)
+    return None
@@ -1,42 +1,278 @@
-__all__ = ["load"]
+__all__ = ["invalidate_load_cache", "load", "load_many"]
 
 import os
 import re
 import sys
 from logging import getLogger
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import Any
+from typing import Callable
+from typing import Hashable
+from typing import Iterable
 from typing import Mapping
+from typing import TypeVar
 
-from deep_chainmap import DeepChainMap
+from platformdirs import user_cache_dir
 from platformdirs import user_data_dir
 
 from ._argv import load_from_argv
+from ._chainmap import CachedDeepChainMap
+from ._envfile import load_from_envfile
 from ._environ import load_from_environ
+from ._environ import load_from_environ_prefixes
 from ._file import load_from_file
+from ._intern import intern_settings
+from ._lazy import LazyChainMap
+from ._lazy import LazyLayer
+from ._settings import freeze
+from ._settings import merge_layers
+from ._stats import LoadStats
+from ._stats import StatsRecorder
+
+if TYPE_CHECKING:
+    from ._server import ConfigServer
 
 _log = getLogger("alltoml")
 
+_T = TypeVar("_T")
+
+# argv, file, cwd file, user file, config server (if there is one), environ and envfile (if there is
+# one)
+_Layers = tuple[dict[str, Any], ...]
+# the config server goes between the user file and environ
+_SERVER_LAYER_INDEX = 4
+# the values interned so far, see intern_settings
+_InternPool = dict[tuple[type, Any], Any]
+
+# (application_name, application_author) -> (fingerprint, layers, intern pool)
+_load_cache: dict[tuple[str, str], tuple[Hashable, _Layers, _InternPool | None]] = {}
+# (application_name, application_author) -> user data directory
+_user_data_paths: dict[tuple[str, str], Path] = {}
+
 
 def load(
     application_name: str,
     application_author: str,
     *,
     default_settings: Mapping[str, Any] | None = None,
+    materialize: bool = False,
+    cache: bool = False,
+    file_cache: bool = False,
+    lazy: bool = False,
+    stats: Callable[[LoadStats], None] | None = None,
+    frozen: bool = False,
+    envfile: Path | None = None,
+    snapshot: Path | None = None,
+    config_server: "ConfigServer | None" = None,
+    intern: bool = False,
+    response_files: bool = False,
 ) -> Mapping[str, Any]:
-    if default_settings is None:
-        default_settings = {}
-    else:
-        default_settings = {**default_settings}
-    assert isinstance(default_settings, dict)
+    if lazy and (materialize or cache or stats is not None or frozen or snapshot is not None):
+        raise ValueError(
+            "lazy cannot be combined with materialize, cache, stats, frozen or snapshot"
+        )
+    recorder = None if stats is None else StatsRecorder()
 
-    if application_name.strip():
-        base_env_prefix = re.sub(r"[\-\s_]+", "_", application_name.strip()).upper()
-        environ_prefix = f"{base_env_prefix}_CONFIG."
-        file_environ_key = f"{base_env_prefix}_CONFIG"
+    default_settings = _copy_default_settings(default_settings)
+    environ_prefix, file_path, argv = _find_sources(application_name)
+
+    file_cache_path = _get_file_cache_path(application_name, application_author, file_cache)
+
+    if lazy:
+        return _load_lazy_layers(
+            application_name,
+            application_author,
+            default_settings,
+            file_path,
+            file_cache_path,
+            environ_prefix,
+            argv,
+            envfile,
+            config_server,
+            intern,
+            response_files,
+        )
+
+    if cache:
+        cache_key = (application_name, application_author)
+        try:
+            user_data_path = _user_data_paths[cache_key]
+        except KeyError:
+            user_data_path = _user_data_paths[cache_key] = Path(
+                user_data_dir(application_name, application_author)
+            )
+        # the fingerprint is taken before anything is loaded so that a file changing while it is
+        # being loaded results in a miss next time rather than stale settings
+        fingerprint = (
+            tuple((k, v) for k, v in os.environ.items() if k.startswith(environ_prefix)),
+            tuple(argv),
+            response_files,
+            # response files given on the command line, the ones they include aren't checked
+            tuple(
+                _stat_file(Path(arg[1:])) for arg in argv if response_files and arg.startswith("@")
+            ),
+            file_path,
+            _stat_file(file_path),
+            _stat_file(Path(".") / "config.toml"),
+            _stat_file(user_data_path / "config.toml"),
+            envfile,
+            _stat_file(envfile),
+            snapshot,
+            _stat_file(snapshot),
+            intern,
+        )
+        cached = _load_cache.get(cache_key)
+        if cached is not None and cached[0] == fingerprint:
+            _, layers, pool = cached
+        else:
+            pool = {} if intern else None
+            layers = _load_layers(
+                file_path,
+                user_data_path,
+                file_cache_path,
+                environ_prefix,
+                argv,
+                recorder,
+                envfile,
+                snapshot,
+                pool,
+                response_files,
+            )
+            _load_cache[cache_key] = (fingerprint, layers, pool)
+        if not frozen:
+            # the cached layers are shared by every call, so each result is given its own copy of
+            # them, otherwise changing one result would change the ones loaded after it
+            layers = tuple(_copy_table(layer) for layer in layers)
     else:
-        environ_prefix = "CONFIG."
-        file_environ_key = "CONFIG"
+        user_data_path = Path(user_data_dir(application_name, application_author))
+        pool = {} if intern else None
+        layers = _load_layers(
+            file_path,
+            user_data_path,
+            file_cache_path,
+            environ_prefix,
+            argv,
+            recorder,
+            envfile,
+            snapshot,
+            pool,
+            response_files,
+        )
+
+    if config_server is not None:
+        # the config server isn't cached, a conditional request finds out cheaply if it changed
+        layers = _insert_server_layer(
+            layers,
+            _load_layer(
+                recorder,
+                "config_server",
+                _server_on_failure,
+                lambda on_failure: config_server.fetch(on_failure=on_failure),
+                entries=1,
+            ),
+            pool,
+        )
+
+    return _finish(_combine_layers(layers, default_settings, materialize, frozen), stats, recorder)
+
+
+def load_many(
+    applications: Iterable[tuple[str, str]],
+    *,
+    default_settings: Mapping[str, Any] | None = None,
+    materialize: bool = False,
+    file_cache: bool = False,
+    frozen: bool = False,
+    response_files: bool = False,
+) -> dict[tuple[str, str], Mapping[str, Any]]:
+    applications = list(dict.fromkeys(applications))
+    if not applications:
+        return {}
+    default_settings = _copy_default_settings(default_settings)
+
+    application_sources = {
+        application_name: _find_sources(application_name)
+        for application_name in dict.fromkeys(name for name, _ in applications)
+    }
+    file_cache_paths = {
+        application: _get_file_cache_path(*application, file_cache) for application in applications
+    }
+    # the sources that don't depend on the application are only loaded once, which one's file
+    # cache is used for them doesn't matter
+    shared_file_cache_path = file_cache_paths[applications[0]]
+    _, _, argv = next(iter(application_sources.values()))
+    argv_settings = load_from_argv(
+        argv, on_extra=_argv_on_extra, on_failure=_argv_on_failure, response_files=response_files
+    )
+    cwd_file_settings = load_from_file(
+        Path("."), on_failure=_file_on_failure, cache_path=shared_file_cache_path
+    )
+    environ_settings = load_from_environ_prefixes(
+        [environ_prefix for environ_prefix, _, _ in application_sources.values()],
+        on_failure=_environ_on_failure,
+    )
+
+    # several applications may be given the same config file
+    file_settings: dict[Path | None, dict[str, Any]] = {}
+    user_file_settings: dict[Path, dict[str, Any]] = {}
+    result: dict[tuple[str, str], Mapping[str, Any]] = {}
+    for application in applications:
+        environ_prefix, file_path, _ = application_sources[application[0]]
+        if file_path not in file_settings:
+            file_settings[file_path] = _load_file_layer(file_path, file_cache_paths[application])
+        user_data_path = Path(user_data_dir(*application))
+        if user_data_path not in user_file_settings:
+            user_file_settings[user_data_path] = load_from_file(
+                user_data_path,
+                on_failure=_file_on_failure,
+                cache_path=file_cache_paths[application],
+            )
+        layers = (
+            argv_settings,
+            file_settings[file_path],
+            cwd_file_settings,
+            user_file_settings[user_data_path],
+            environ_settings[environ_prefix],
+        )
+        application_default_settings = default_settings
+        if not frozen:
+            # the layers are shared by the applications, so each result is given its own copy of
+            # them, otherwise changing the settings of one application would change the others
+            layers = tuple(_copy_table(layer) for layer in layers)
+            application_default_settings = {**default_settings}
+        result[application] = _combine_layers(
+            layers, application_default_settings, materialize, frozen
+        )
+    return result
+
+
+def invalidate_load_cache() -> None:
+    _load_cache.clear()
+    _user_data_paths.clear()
+
+
+def _copy_default_settings(default_settings: Mapping[str, Any] | None) -> dict[str, Any]:
+    if default_settings is None:
+        return {}
+    return {**default_settings}
+
+
+def _copy_table(table: dict[str, Any]) -> dict[str, Any]:
+    return {key: _copy_value(value) for key, value in table.items()}
+
+
+def _copy_value(value: Any) -> Any:
+    # only tables and arrays can be changed in place, every other toml value is immutable
+    if isinstance(value, dict):
+        return _copy_table(value)
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    return value
+
+
+def _find_sources(application_name: str) -> tuple[str, Path | None, list[str]]:
+    environ_prefix, file_environ_key = _get_environ_keys(application_name)
 
     file_path: Path | None = None
     # try to find the file path in the environ
@@ -58,39 +294,319 @@ def load(
                 sys.exit(1)
             argv = [*argv[:i], *argv[i + 2 :]]
             break
-    # try to load file settings from the path specified by either the environ or argv
-    if file_path is None:
-        file_settings = {}
+
+    return environ_prefix, file_path, argv
+
+
+def _get_environ_keys(application_name: str) -> tuple[str, str]:
+    # the prefix of the settings in the environ and the key of the config file path
+    if application_name.strip():
+        base_env_prefix = re.sub(r"[\-\s_]+", "_", application_name.strip()).upper()
+        return f"{base_env_prefix}_CONFIG.", f"{base_env_prefix}_CONFIG"
+    return "CONFIG.", "CONFIG"
+
+
+def _get_file_cache_path(
+    application_name: str, application_author: str, file_cache: bool
+) -> Path | None:
+    if not file_cache:
+        return None
+    return Path(user_cache_dir(application_name, application_author)) / "files"
+
+
+def _load_layers(
+    file_path: Path | None,
+    user_data_path: Path,
+    file_cache_path: Path | None,
+    environ_prefix: str,
+    argv: list[str],
+    recorder: StatsRecorder | None = None,
+    envfile: Path | None = None,
+    snapshot: Path | None = None,
+    pool: _InternPool | None = None,
+    response_files: bool = False,
+) -> _Layers:
+    compiled_layers = None
+    if snapshot is not None:
+        file_paths = _get_file_paths(file_path, user_data_path)
+        compiled_layers = _load_layer(
+            recorder,
+            "snapshot",
+            _snapshot_on_failure,
+            lambda on_failure: _load_snapshot_layers(snapshot, file_paths, on_failure),
+            entries=1,
+            file_path=snapshot,
+        )
+    if compiled_layers is None:
+        file_settings, cwd_file_settings, user_file_settings = _load_file_layers(
+            file_path, user_data_path, file_cache_path, recorder
+        )
     else:
-        file_base_path = file_path.parent
-        file_name = Path(file_path.name)
-        file_settings = load_from_file(file_base_path, name=file_name, on_failure=_file_on_failure)
+        file_settings, cwd_file_settings, user_file_settings = compiled_layers
 
-    user_file_settings = load_from_file(
-        Path(user_data_dir(application_name, application_author)), on_failure=_file_on_failure
+    environ_settings = _load_layer(
+        recorder,
+        "environ",
+        _environ_on_failure,
+        lambda on_failure: load_from_environ(prefix=environ_prefix, on_failure=on_failure),
+    )
+    argv_settings = _load_layer(
+        recorder,
+        "argv",
+        _argv_on_failure,
+        lambda on_failure: load_from_argv(
+            argv, on_extra=_argv_on_extra, on_failure=on_failure, response_files=response_files
+        ),
     )
-    cwd_file_settings = load_from_file(Path("."), on_failure=_file_on_failure)
-    environ_settings = load_from_environ(prefix=environ_prefix, on_failure=_environ_on_failure)
-    argv_settings = load_from_argv(argv, on_extra=_argv_on_extra, on_failure=_argv_on_failure)
 
-    return DeepChainMap(
+    layers = (
         argv_settings,
         file_settings,
         cwd_file_settings,
         user_file_settings,
         environ_settings,
-        default_settings,
     )
+    if envfile is not None:
+        envfile_settings = _load_layer(
+            recorder,
+            "envfile",
+            _envfile_on_failure,
+            lambda on_failure: _load_envfile_layer(envfile, environ_prefix, on_failure),
+            file_path=envfile,
+        )
+        layers = (*layers, envfile_settings)
+    if pool is not None:
+        # the layers share one pool so that equal values are deduplicated between them
+        layers = tuple(intern_settings(layer, pool) for layer in layers)
+    return layers
+
+
+def _load_file_layers(
+    file_path: Path | None,
+    user_data_path: Path,
+    file_cache_path: Path | None,
+    recorder: StatsRecorder | None,
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]]:
+    # try to load file settings from the path specified by either the environ or argv
+    file_settings = _load_layer(
+        recorder,
+        "file",
+        _file_on_failure,
+        lambda on_failure: _load_file_layer(file_path, file_cache_path, on_failure),
+        entries=0 if file_path is None else 1,
+        file_path=file_path,
+    )
+    user_file_settings = _load_layer(
+        recorder,
+        "user_file",
+        _file_on_failure,
+        lambda on_failure: load_from_file(
+            user_data_path, on_failure=on_failure, cache_path=file_cache_path
+        ),
+        entries=1,
+        file_path=user_data_path / "config.toml",
+    )
+    cwd_file_settings = _load_layer(
+        recorder,
+        "cwd_file",
+        _file_on_failure,
+        lambda on_failure: load_from_file(
+            Path("."), on_failure=on_failure, cache_path=file_cache_path
+        ),
+        entries=1,
+        file_path=Path(".") / "config.toml",
+    )
+    return file_settings, cwd_file_settings, user_file_settings
+
+
+def _load_snapshot_layers(
+    snapshot: Path, file_paths: tuple[Path | None, Path, Path], on_failure: Callable[[Path], None]
+) -> tuple[dict[str, Any], dict[str, Any], dict[str, Any]] | None:
+    # the snapshot pulls in hashlib and pickle which aren't needed otherwise
+    from ._compile import read_compiled_snapshot
+
+    try:
+        compiled_layers = read_compiled_snapshot(snapshot, file_paths)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        on_failure(snapshot)
+        return None
+    if compiled_layers is None:
+        _log.warning("ignoring stale snapshot: %r", str(snapshot))
+    return compiled_layers
+
+
+def _load_lazy_layers(
+    application_name: str,
+    application_author: str,
+    default_settings: dict[str, Any],
+    file_path: Path | None,
+    file_cache_path: Path | None,
+    environ_prefix: str,
+    argv: list[str],
+    envfile: Path | None,
+    config_server: "ConfigServer | None",
+    intern: bool,
+    response_files: bool,
+) -> LazyChainMap:
+    # argv is loaded up front, it is the first layer checked anyway and unexpected arguments
+    # should still stop the program as soon as possible
+    argv_settings = load_from_argv(
+        argv, on_extra=_argv_on_extra, on_failure=_argv_on_failure, response_files=response_files
+    )
+    layers = [
+        LazyLayer(lambda: argv_settings),
+        LazyLayer(lambda: _load_file_layer(file_path, file_cache_path)),
+        LazyLayer(
+            lambda: load_from_file(
+                Path("."), on_failure=_file_on_failure, cache_path=file_cache_path
+            )
+        ),
+        LazyLayer(
+            lambda: load_from_file(
+                Path(user_data_dir(application_name, application_author)),
+                on_failure=_file_on_failure,
+                cache_path=file_cache_path,
+            )
+        ),
+        LazyLayer(
+            lambda: load_from_environ(prefix=environ_prefix, on_failure=_environ_on_failure)
+        ),
+    ]
+    if config_server is not None:
+        layers.insert(
+            _SERVER_LAYER_INDEX,
+            LazyLayer(lambda: config_server.fetch(on_failure=_server_on_failure)),
+        )
+    if envfile is not None:
+        layers.append(
+            LazyLayer(lambda: _load_envfile_layer(envfile, environ_prefix, _envfile_on_failure))
+        )
+    if intern:
+        pool: _InternPool = {}
+        layers = [
+            LazyLayer(lambda layer=layer: intern_settings(layer.get(), pool)) for layer in layers
+        ]
+    layers.append(LazyLayer(lambda: default_settings))
+    return LazyChainMap(layers)
+
+
+def _insert_server_layer(
+    layers: _Layers, server_settings: dict[str, Any], pool: _InternPool | None
+) -> _Layers:
+    # the server is interned with the same pool as the layers it is inserted into
+    if pool is not None:
+        server_settings = intern_settings(server_settings, pool)
+    return (*layers[:_SERVER_LAYER_INDEX], server_settings, *layers[_SERVER_LAYER_INDEX:])
+
+
+def _load_layer(
+    recorder: StatsRecorder | None,
+    name: str,
+    on_failure: Callable[..., None],
+    load: Callable[[Callable[..., None]], _T],
+    *,
+    entries: int | None = None,
+    file_path: Path | None = None,
+) -> _T:
+    if recorder is None:
+        return load(on_failure)
+    return recorder.record(name, load, on_failure, entries=entries, file_path=file_path)
+
+
+def _load_file_layer(
+    file_path: Path | None,
+    file_cache_path: Path | None,
+    on_failure: Callable[[Path], None] | None = None,
+) -> dict[str, Any]:
+    if file_path is None:
+        return {}
+    if on_failure is None:
+        on_failure = _file_on_failure
+    return load_from_file(
+        file_path.parent,
+        name=Path(file_path.name),
+        on_failure=on_failure,
+        cache_path=file_cache_path,
+    )
+
+
+def _load_envfile_layer(
+    envfile: Path, environ_prefix: str, on_failure: Callable[[str, str | None], None]
+) -> dict[str, Any]:
+    try:
+        return load_from_envfile(envfile, prefix=environ_prefix, on_failure=on_failure)
+    except (OSError, ValueError):
+        _log.warning("ignoring invalid env file: %r", str(envfile))
+        return {}
+
+
+def _combine_layers(
+    layers: _Layers, default_settings: dict[str, Any], materialize: bool, frozen: bool = False
+) -> Mapping[str, Any]:
+    if frozen:
+        settings = freeze(merge_layers((*layers, default_settings)))
+        if materialize:
+            settings._get_path_index()
+        return settings
+    if materialize:
+        settings = merge_layers((*layers, default_settings))
+        # build the path index up front so that get_path is cheap from the first call
+        settings._get_path_index()
+        return settings
+    return CachedDeepChainMap(*layers, default_settings)
+
+
+def _finish(
+    settings: Mapping[str, Any],
+    stats: Callable[[LoadStats], None] | None,
+    recorder: StatsRecorder | None,
+) -> Mapping[str, Any]:
+    if stats is not None:
+        assert recorder is not None
+        stats(recorder.finish())
+    return settings
+
+
+def _get_file_paths(
+    file_path: Path | None, user_data_path: Path
+) -> tuple[Path | None, Path, Path]:
+    # the explicit file, the file in the current working directory and the one in the user data
+    # directory, in the order they are layered
+    return file_path, Path(".") / "config.toml", user_data_path / "config.toml"
+
+
+def _stat_file(file_path: Path | None) -> tuple[int, int, int] | None:
+    if file_path is None:
+        return None
+    try:
+        stat = file_path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
 
 
 def _environ_on_failure(key: str, value: str) -> None:
     _log.warning("ignoring invalid environment variable: %r", key)
 
 
+def _envfile_on_failure(key: str, value: str | None) -> None:
+    _log.warning("ignoring invalid env file entry: %r", key)
+
+
 def _file_on_failure(file_path: Path) -> None:
     _log.warning("ignoring invalid config file: %r", str(file_path))
 
 
+def _snapshot_on_failure(snapshot: Path) -> None:
+    _log.warning("ignoring invalid snapshot: %r", str(snapshot))
+
+
+def _server_on_failure(url: str) -> None:
+    _log.warning("failed to fetch settings from config server: %r", url)
+
+
 def _argv_on_extra(argument: str) -> None:
     _log.error("argument %r was unexpected", argument)
     sys.exit(1)
@@ -0,0 +1,52 @@
+__all__ = ["memory_report", "MemoryReport", "MemoryUsage"]
+
+import sys
+from typing import Any
+from typing import Iterable
+from typing import Mapping
+from typing import NamedTuple
+
+from ._settings import Settings
+
+
+class MemoryUsage(NamedTuple):
+    objects: int
+    bytes: int
+
+
+class MemoryReport(NamedTuple):
+    total: MemoryUsage
+    layers: tuple[MemoryUsage, ...]
+
+
+def memory_report(settings: Mapping[str, Any]) -> MemoryReport:
+    # the layered results of load are measured layer by layer as well, an object shared by several
+    # layers is counted in each of them but only once in the total
+    maps: list[Mapping[str, Any]] | None = getattr(settings, "maps", None)
+    if maps is None:
+        return MemoryReport(_measure([settings]), ())
+    return MemoryReport(_measure(maps), tuple(_measure([layer]) for layer in maps))
+
+
+def _measure(roots: Iterable[Any]) -> MemoryUsage:
+    # every object stays alive while it is measured, so its id can't be reused by another one
+    seen: set[int] = set()
+    size = 0
+    pending = list(roots)
+    while pending:
+        value = pending.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        size += sys.getsizeof(value)
+        if isinstance(value, Settings):
+            pending.append(value._data)
+            pending.append(value._path_cache)
+            if value._path_index is not None:
+                pending.append(value._path_index)
+        elif isinstance(value, Mapping):
+            pending.extend(value.keys())
+            pending.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            pending.extend(value)
+    return MemoryUsage(len(seen), size)
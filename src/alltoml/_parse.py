@@ -1,55 +1,211 @@
-__all__ = ["store_settings"]
+__all__ = ["store_many_settings", "store_settings"]
 
+import re
+from contextvars import ContextVar
 from itertools import islice
-from tomllib import TOMLDecodeError
-from tomllib import loads as toml_loads
 from typing import Any
 from typing import Callable
+from typing import Final
 from typing import Generator
+from typing import Iterable
+from typing import Sequence
+
+_INVALID: Final = object()
+_NOT_SCALAR: Final = object()
+
+# bare keys, literal strings and basic strings without escapes, anything else (escapes, table
+# headers, comments, etc.) falls back to tomllib
+_KEY_SEGMENT = (
+    r"(?:"
+    r"[A-Za-z0-9_\-]+"
+    r"|'[^'\x00-\x08\x0a-\x1f\x7f]*'"
+    r'|"[^"\\\x00-\x08\x0a-\x1f\x7f]*"'
+    r")"
+)
+_SIMPLE_KEY_PATTERN = re.compile(rf"[ \t]*{_KEY_SEGMENT}(?:[ \t]*\.[ \t]*{_KEY_SEGMENT})*[ \t]*")
+_KEY_SEGMENT_PATTERN = re.compile(_KEY_SEGMENT)
+
+# plain integers, floats, booleans and strings without escapes, anything else (arrays, inline
+# tables, datetimes, escapes, comments, etc.) falls back to tomllib
+_DEC_DIGITS = r"[0-9](?:_?[0-9])*"
+_DEC_INT = r"[+-]?(?:0|[1-9](?:_?[0-9])*)"
+_SCALAR_VALUE_PATTERN = re.compile(
+    r"[ \t]*(?:"
+    rf"(?P<int>{_DEC_INT})"
+    r"|(?P<prefixed_int>0(?:x[0-9A-Fa-f](?:_?[0-9A-Fa-f])*|o[0-7](?:_?[0-7])*|b[01](?:_?[01])*))"
+    rf"|(?P<float>{_DEC_INT}(?:\.{_DEC_DIGITS}(?:[eE][+-]?{_DEC_DIGITS})?|[eE][+-]?{_DEC_DIGITS})"
+    r"|[+-]?(?:inf|nan))"
+    r"|(?P<bool>true|false)"
+    r"|'(?P<literal_string>[^'\x00-\x08\x0a-\x1f\x7f]*)'"
+    r'|"(?P<basic_string>[^"\\\x00-\x08\x0a-\x1f\x7f]*)"'
+    r")[ \t]*"
+)
+
+
+# documents parsed by tomllib are counted in the list set in the current context, load's stats set
+# it while each layer is loaded so that only that load's parses are counted, not other threads'
+toml_parse_counter: ContextVar[list[int] | None] = ContextVar("toml_parse_counter", default=None)
+# entries stored by store_many_settings are counted the same way, so that the entries of a layer are
+# counted as it is loaded rather than by reading its source a second time
+stored_entry_counter: ContextVar[list[int] | None] = ContextVar(
+    "stored_entry_counter", default=None
+)
+
+
+def toml_loads(document: str) -> dict[str, Any]:
+    # tomllib is slow to import and with the fast paths above is rarely needed, so it isn't
+    # imported until it is
+    from tomllib import loads
+
+    counter = toml_parse_counter.get()
+    if counter is not None:
+        counter[0] += 1
+    return loads(document)
 
 
 def store_settings(
     settings: dict[str, Any], raw_key: str, raw_value: str, fail: Callable[[], None]
 ) -> None:
-    try:
-        key = tuple(_convert_key(raw_key))
-        value = _convert_value(raw_value)
-    except ValueError:
-        fail()
-        return
+    store_many_settings(settings, [(raw_key, raw_value, fail)])
+
+
+def store_many_settings(
+    settings: dict[str, Any], entries: Iterable[tuple[str, str, Callable[[], None]]]
+) -> None:
+    keys: list[tuple[str, ...] | None] = []
+    values: list[Any] = []
+    fails: list[Callable[[], None]] = []
+    batch_indexes: list[int] = []
+    batch_raw_values: list[str] = []
+    for raw_key, raw_value, fail in entries:
+        fails.append(fail)
+        try:
+            keys.append(_convert_key(raw_key))
+        except ValueError:
+            keys.append(None)
+            values.append(_INVALID)
+            continue
+        value = _convert_scalar_value(raw_value)
+        if value is _NOT_SCALAR:
+            # values that span lines could bleed into their neighbors in a shared document, so
+            # they are parsed on their own
+            if "\n" in raw_value or "\r" in raw_value:
+                try:
+                    value = _convert_toml_value(raw_value)
+                except ValueError:
+                    value = _INVALID
+            else:
+                batch_indexes.append(len(values))
+                batch_raw_values.append(raw_value)
+                value = _INVALID
+        values.append(value)
+
+    for i, value in zip(batch_indexes, _convert_toml_values(batch_raw_values)):
+        values[i] = value
 
+    stored = 0
+    for key, value, fail in zip(keys, values, fails):
+        if key is None or value is _INVALID:
+            fail()
+        elif _store_setting(settings, key, value, fail):
+            stored += 1
+    counter = stored_entry_counter.get()
+    if counter is not None:
+        counter[0] += stored
+
+
+def _store_setting(
+    settings: dict[str, Any], key: tuple[str, ...], value: Any, fail: Callable[[], None]
+) -> bool:
     target = settings
     for name in islice(key, len(key) - 1):
         try:
             target = target[name]
             if not isinstance(target, dict):
                 fail()
-                return
+                return False
         except KeyError:
             target[name] = target = {}
     if key[-1] in target:
         fail()
-        return
+        return False
     target[key[-1]] = value
+    return True
 
 
 def _convert_value(raw_value: str) -> Any:
+    value = _convert_scalar_value(raw_value)
+    if value is _NOT_SCALAR:
+        return _convert_toml_value(raw_value)
+    return value
+
+
+def _convert_scalar_value(raw_value: str) -> Any:
+    match = _SCALAR_VALUE_PATTERN.fullmatch(raw_value)
+    if match is None:
+        return _NOT_SCALAR
+    kind = match.lastgroup
+    assert kind is not None
+    text = match[kind]
+    if kind == "int":
+        return int(text)
+    if kind == "prefixed_int":
+        return int(text, 0)
+    if kind == "float":
+        return float(text)
+    if kind == "bool":
+        return text == "true"
+    return text
+
+
+def _convert_toml_values(raw_values: Sequence[str]) -> list[Any]:
+    # all the values are parsed as a single document, each on its own line and none of them
+    # containing a line break, so a value can only affect its neighbors by swallowing their key,
+    # which shows up as a missing key, if the document doesn't parse cleanly the values are split
+    # in half until the invalid ones are isolated
+    if not raw_values:
+        return []
+    names = [f"v{i}" for i in range(len(raw_values))]
+    document = "".join(f"{name} = {raw_value}\n" for name, raw_value in zip(names, raw_values))
+    try:
+        result = toml_loads(document)
+    except ValueError:
+        pass
+    else:
+        if result.keys() == set(names):
+            return [result[name] for name in names]
+    if len(raw_values) == 1:
+        return [_INVALID]
+    middle = len(raw_values) // 2
+    return [*_convert_toml_values(raw_values[:middle]), *_convert_toml_values(raw_values[middle:])]
+
+
+def _convert_toml_value(raw_value: str) -> Any:
     try:
         result = toml_loads(f"value = {raw_value}")
-    except TOMLDecodeError:
+    except ValueError:
         raise ValueError(raw_value)
     if set(result.keys()) != {"value"}:
         raise ValueError(raw_value)
     return result["value"]
 
 
-def _convert_key(raw_key: str) -> Generator[str, None, None]:
+def _convert_key(raw_key: str) -> tuple[str, ...]:
+    if _SIMPLE_KEY_PATTERN.fullmatch(raw_key) is None:
+        return tuple(_convert_toml_key(raw_key))
+    return tuple(
+        segment[1:-1] if segment[0] in "'\"" else segment
+        for segment in _KEY_SEGMENT_PATTERN.findall(raw_key)
+    )
+
+
+def _convert_toml_key(raw_key: str) -> Generator[str, None, None]:
     try:
         result = toml_loads(f"{raw_key} = 0")
-    except TOMLDecodeError:
+    except ValueError:
         raise ValueError(raw_key)
     while True:
-        if len(result) > 1:
+        if len(result) != 1:
             raise ValueError(raw_key)
         for key, value in result.items():
             yield key
@@ -0,0 +1,285 @@
+__all__ = ["compile_schema", "SchemaError"]
+
+from collections.abc import Mapping
+from collections.abc import Sequence
+from dataclasses import MISSING
+from dataclasses import fields as get_dataclass_fields
+from dataclasses import is_dataclass
+from datetime import date
+from datetime import datetime
+from datetime import time
+from types import NoneType
+from types import UnionType
+from typing import Any
+from typing import Callable
+from typing import Literal
+from typing import TypeVar
+from typing import Union
+from typing import get_args as get_typing_args
+from typing import get_origin as get_typing_origin
+from typing import get_type_hints
+from typing import is_typeddict
+
+_T = TypeVar("_T")
+
+_Path = tuple[str | int, ...]
+_Converter = Callable[[Any, _Path], Any]
+
+# frozen settings store arrays as tuples
+_ARRAY_TYPES = (list, tuple)
+
+
+class SchemaError(ValueError):
+    def __init__(self, message: str, path: _Path):
+        super().__init__(message, path)
+        self.message = message
+        self.path = path
+
+    def __str__(self) -> str:
+        if not self.path:
+            return self.message
+        return f"{'.'.join(str(p) for p in self.path)}: {self.message}"
+
+
+def compile_schema(schema: type[_T]) -> Callable[[Mapping[str, Any]], _T]:
+    converter = _Compiler().compile(schema)
+
+    def convert(settings: Mapping[str, Any]) -> _T:
+        return converter(settings, ())
+
+    return convert
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        # compiled converters for dataclasses and typeddicts, so that a type that refers to itself
+        # (directly or not) is only compiled once
+        self._converters: dict[type, _Converter] = {}
+
+    def compile(self, schema: Any) -> _Converter:
+        if schema is Any or schema is object:
+            return _convert_any
+        if schema is bool:
+            return _convert_bool
+        if schema is int:
+            return _convert_int
+        if schema is float:
+            return _convert_float
+        if schema in (str, datetime, date, time):
+            return _make_instance_converter(schema)
+        if isinstance(schema, type) and (is_dataclass(schema) or is_typeddict(schema)):
+            return self._compile_table(schema)
+
+        origin = get_typing_origin(schema)
+        args = get_typing_args(schema)
+        if origin is Union or origin is UnionType:
+            return _make_union_converter(
+                [self.compile(arg) for arg in args if arg is not NoneType], _get_name(schema)
+            )
+        if origin is Literal:
+            return _make_literal_converter(args, _get_name(schema))
+        if origin in (list, Sequence):
+            (item_schema,) = args or (Any,)
+            return _make_list_converter(self.compile(item_schema))
+        if origin is tuple:
+            if len(args) == 2 and args[1] is Ellipsis:
+                return _make_tuple_converter(self.compile(args[0]))
+            return _make_fixed_tuple_converter([self.compile(arg) for arg in args])
+        if origin in (dict, Mapping):
+            key_schema, value_schema = args or (str, Any)
+            if key_schema is not str:
+                raise TypeError(f"table keys must be str, not {key_schema!r}")
+            return _make_dict_converter(self.compile(value_schema))
+        if schema is list:
+            return self.compile(list[Any])
+        if schema is tuple:
+            return self.compile(tuple[Any, ...])
+        if schema is dict:
+            return self.compile(dict[str, Any])
+
+        raise TypeError(f"unsupported schema type: {schema!r}")
+
+    def _compile_table(self, schema: type) -> _Converter:
+        try:
+            return self._converters[schema]
+        except KeyError:
+            pass
+        # a trampoline is registered before the fields are compiled so that recursive references
+        # resolve to it, it is swapped for the real converter once that is ready
+        converter: _Converter | None = None
+
+        def convert_recursive(value: Any, path: _Path) -> Any:
+            assert converter is not None
+            return converter(value, path)
+
+        self._converters[schema] = convert_recursive
+        hints = get_type_hints(schema)
+        if is_typeddict(schema):
+            converter = _make_typeddict_converter(
+                [
+                    (name, self.compile(hint), name in schema.__required_keys__)  # type: ignore
+                    for name, hint in hints.items()
+                ]
+            )
+        else:
+            converter = _make_dataclass_converter(
+                schema,
+                [
+                    (
+                        field.name,
+                        self.compile(hints[field.name]),
+                        field.default is MISSING and field.default_factory is MISSING,
+                    )
+                    for field in get_dataclass_fields(schema)
+                    if field.init
+                ],
+            )
+        self._converters[schema] = converter
+        return converter
+
+
+def _get_name(schema: Any) -> str:
+    if isinstance(schema, type):
+        return schema.__name__
+    return repr(schema).removeprefix("typing.")
+
+
+def _fail(expected: str, value: Any, path: _Path) -> SchemaError:
+    return SchemaError(f"expected {expected}, got {type(value).__name__}", path)
+
+
+def _convert_any(value: Any, path: _Path) -> Any:
+    return value
+
+
+def _convert_bool(value: Any, path: _Path) -> bool:
+    if not isinstance(value, bool):
+        raise _fail("bool", value, path)
+    return value
+
+
+def _convert_int(value: Any, path: _Path) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise _fail("int", value, path)
+    return value
+
+
+def _convert_float(value: Any, path: _Path) -> float:
+    # toml has no way to write a float without a fractional part or exponent, so integers are
+    # accepted where a float is expected
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        raise _fail("float", value, path)
+    return float(value)
+
+
+def _make_instance_converter(schema: type) -> _Converter:
+    def convert(value: Any, path: _Path) -> Any:
+        # datetime is a subclass of date, but a toml date is never a datetime
+        if not isinstance(value, schema) or (schema is date and isinstance(value, datetime)):
+            raise _fail(schema.__name__, value, path)
+        return value
+
+    return convert
+
+
+def _make_union_converter(converters: list[_Converter], name: str) -> _Converter:
+    def convert(value: Any, path: _Path) -> Any:
+        for converter in converters:
+            try:
+                return converter(value, path)
+            except SchemaError:
+                pass
+        raise _fail(name, value, path)
+
+    return convert
+
+
+def _make_literal_converter(values: tuple[Any, ...], name: str) -> _Converter:
+    def convert(value: Any, path: _Path) -> Any:
+        # bool compares equal to int, so the types have to match too
+        for literal in values:
+            if value == literal and type(value) is type(literal):
+                return value
+        raise SchemaError(f"expected {name}, got {value!r}", path)
+
+    return convert
+
+
+def _make_list_converter(item_converter: _Converter) -> _Converter:
+    def convert(value: Any, path: _Path) -> list[Any]:
+        if not isinstance(value, _ARRAY_TYPES):
+            raise _fail("array", value, path)
+        return [item_converter(item, (*path, i)) for i, item in enumerate(value)]
+
+    return convert
+
+
+def _make_tuple_converter(item_converter: _Converter) -> _Converter:
+    convert_list = _make_list_converter(item_converter)
+
+    def convert(value: Any, path: _Path) -> tuple[Any, ...]:
+        return tuple(convert_list(value, path))
+
+    return convert
+
+
+def _make_fixed_tuple_converter(item_converters: list[_Converter]) -> _Converter:
+    def convert(value: Any, path: _Path) -> tuple[Any, ...]:
+        if not isinstance(value, _ARRAY_TYPES):
+            raise _fail("array", value, path)
+        if len(value) != len(item_converters):
+            raise SchemaError(f"expected {len(item_converters)} items, got {len(value)}", path)
+        return tuple(
+            item_converter(item, (*path, i))
+            for i, (item_converter, item) in enumerate(zip(item_converters, value))
+        )
+
+    return convert
+
+
+def _make_dict_converter(value_converter: _Converter) -> _Converter:
+    def convert(value: Any, path: _Path) -> dict[str, Any]:
+        if not isinstance(value, Mapping):
+            raise _fail("table", value, path)
+        return {key: value_converter(item, (*path, key)) for key, item in value.items()}
+
+    return convert
+
+
+def _make_dataclass_converter(
+    schema: type, fields: list[tuple[str, _Converter, bool]]
+) -> _Converter:
+    def convert(value: Any, path: _Path) -> Any:
+        if not isinstance(value, Mapping):
+            raise _fail("table", value, path)
+        # fields missing from the settings are left out so the dataclass fills in their defaults
+        kwargs: dict[str, Any] = {}
+        for name, converter, required in fields:
+            try:
+                item = value[name]
+            except KeyError:
+                if required:
+                    raise SchemaError("missing required key", (*path, name)) from None
+                continue
+            kwargs[name] = converter(item, (*path, name))
+        return schema(**kwargs)
+
+    return convert
+
+
+def _make_typeddict_converter(fields: list[tuple[str, _Converter, bool]]) -> _Converter:
+    def convert(value: Any, path: _Path) -> dict[str, Any]:
+        if not isinstance(value, Mapping):
+            raise _fail("table", value, path)
+        result: dict[str, Any] = {}
+        for name, converter, required in fields:
+            try:
+                item = value[name]
+            except KeyError:
+                if required:
+                    raise SchemaError("missing required key", (*path, name)) from None
+                continue
+            result[name] = converter(item, (*path, name))
+        return result
+
+    return convert
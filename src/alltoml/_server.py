@@ -0,0 +1,172 @@
+__all__ = ["ConfigServer", "load_from_server"]
+
+import os
+import socket
+from http.client import HTTPConnection
+from http.client import HTTPException
+from http.client import HTTPSConnection
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Final
+from urllib.parse import unquote
+from urllib.parse import urlsplit
+
+DEFAULT_SERVER_TIMEOUT: Final = 10.0
+
+
+class ConfigServer:
+    def __init__(
+        self,
+        url: str,
+        *,
+        fallback_path: Path | None = None,
+        timeout: float = DEFAULT_SERVER_TIMEOUT,
+    ) -> None:
+        self._url = url
+        self._fallback_path = fallback_path
+        self._connection = _create_connection(url, timeout)
+        parts = urlsplit(url)
+        self._request_path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self._lock = Lock()
+        # the settings from the last successful fetch and the etag they were served with, a fetch
+        # that fails or finds them unchanged returns the same dict
+        self._settings: dict[str, Any] | None = None
+        self._etag: str | None = None
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self._url!r}>"
+
+    def __enter__(self) -> "ConfigServer":
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.close()
+
+    @property
+    def url(self) -> str:
+        return self._url
+
+    def fetch(self, *, on_failure: Callable[[str], None] = lambda u: None) -> dict[str, Any]:
+        with self._lock:
+            try:
+                settings = self._fetch()
+            except (OSError, HTTPException, ValueError):
+                self._connection.close()
+                on_failure(self._url)
+                settings = self._load_fallback()
+            self._settings = settings
+            return settings
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _fetch(self) -> dict[str, Any]:
+        import tomllib
+
+        headers = {"Accept": "application/toml"}
+        if self._etag is not None:
+            headers["If-None-Match"] = self._etag
+        status, etag, body = self._request(headers)
+        if status == 304 and self._settings is not None:
+            return self._settings
+        if status != 200:
+            raise ValueError(f"unexpected status {status}")
+        settings = tomllib.loads(body.decode("utf8"))
+        self._etag = etag
+        if self._fallback_path is not None:
+            try:
+                _write_fallback(self._fallback_path, body)
+            except OSError:
+                # the fallback copy is only needed if the server can't be reached later on
+                pass
+        return settings
+
+    def _request(self, headers: dict[str, str]) -> tuple[int, str | None, bytes]:
+        # the server may have closed the kept alive connection since the last fetch, which is only
+        # noticed once it is used, so a request on a reused connection is retried once on a new one
+        reused = self._connection.sock is not None
+        while True:
+            try:
+                self._connection.request("GET", self._request_path, headers=headers)
+                response = self._connection.getresponse()
+                # the whole body has to be read before the connection can be used again
+                body = response.read()
+            except (OSError, HTTPException):
+                self._connection.close()
+                if not reused:
+                    raise
+                reused = False
+                continue
+            if response.will_close:
+                self._connection.close()
+            return response.status, response.getheader("ETag"), body
+
+    def _load_fallback(self) -> dict[str, Any]:
+        if self._settings is not None:
+            return self._settings
+        if self._fallback_path is None:
+            return {}
+        import tomllib
+
+        try:
+            with open(self._fallback_path, "rb") as file:
+                return tomllib.load(file)
+        except (OSError, tomllib.TOMLDecodeError):
+            return {}
+
+
+def load_from_server(
+    url: str,
+    *,
+    on_failure: Callable[[str], None] = lambda u: None,
+    fallback_path: Path | None = None,
+    timeout: float = DEFAULT_SERVER_TIMEOUT,
+) -> dict[str, Any]:
+    with ConfigServer(url, fallback_path=fallback_path, timeout=timeout) as server:
+        return server.fetch(on_failure=on_failure)
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(self._socket_path)
+        except BaseException:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+def _create_connection(url: str, timeout: float) -> HTTPConnection:
+    parts = urlsplit(url)
+    if parts.scheme == "http":
+        return HTTPConnection(parts.netloc, timeout=timeout)
+    if parts.scheme == "https":
+        return HTTPSConnection(parts.netloc, timeout=timeout)
+    if parts.scheme == "http+unix":
+        # the socket path is percent encoded in place of the host, http+unix://%2Frun%2Fconfig.sock/
+        return _UnixHTTPConnection(unquote(parts.netloc), timeout)
+    raise ValueError(f"unsupported url scheme: {parts.scheme!r}")
+
+
+def _write_fallback(path: Path, content: bytes) -> None:
+    # the fallback copy is replaced in a single step so a process starting while the server is down
+    # never reads half of it
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile("wb", dir=path.parent, suffix=".tmp", delete=False) as fallback_file:
+        try:
+            fallback_file.write(content)
+        except BaseException:
+            fallback_file.close()
+            os.unlink(fallback_file.name)
+            raise
+    os.replace(fallback_file.name, path)
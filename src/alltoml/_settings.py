@@ -0,0 +1,330 @@
+__all__ = [
+    "freeze",
+    "get_changed_paths",
+    "merge_layers",
+    "Settings",
+    "SettingsChange",
+    "SettingsUpdate",
+    "update_settings",
+]
+
+from typing import Any
+from typing import Final
+from typing import Iterator
+from typing import Literal
+from typing import Mapping
+from typing import NamedTuple
+from typing import Sequence
+
+from ._parse import _convert_key
+
+_MISSING: Final = object()
+
+
+class Settings(Mapping[str, Any]):
+    __slots__ = ("_data", "_frozen", "_hash", "_path_index", "_path_cache")
+
+    def __init__(self, data: Mapping[str, Any] | None = None) -> None:
+        self._data: dict[str, Any] = {}
+        # only settings made by freeze (or copied or overridden from them) are known to contain
+        # nothing mutable, so only they can be hashed
+        self._frozen = isinstance(data, Settings) and data._frozen
+        self._hash: int | None = None
+        self._path_index: dict[tuple[str, ...], Any] | None = None
+        self._path_cache: dict[str, Any] = {}
+        if data is not None:
+            for key, value in data.items():
+                if isinstance(value, Mapping) and not isinstance(value, Settings):
+                    value = Settings(value)
+                self._data[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        return self._data[key]
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._data!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if other is self:
+            return True
+        if isinstance(other, Settings):
+            # two different hashes can't be equal, tables that are shared between versions of
+            # settings are caught by the identity check without looking inside them
+            if self._hash is not None and other._hash is not None and self._hash != other._hash:
+                return False
+            return self._data == other._data
+        return super().__eq__(other)
+
+    def __hash__(self) -> int:
+        if not self._frozen:
+            raise TypeError(f"unhashable type: {type(self).__name__!r}")
+        if self._hash is None:
+            self._hash = hash(frozenset(self._data.items()))
+        return self._hash
+
+    def override(self, overrides: Mapping[str, Any]) -> "Settings":
+        # tables in overrides are merged into the tables they replace, everything that isn't
+        # overridden is shared with this settings rather than copied
+        data = dict(self._data)
+        for key, value in overrides.items():
+            current = data.get(key, _MISSING)
+            if isinstance(value, Mapping) and isinstance(current, Settings):
+                data[key] = current.override(value)
+            else:
+                data[key] = _freeze_value(value, current)
+        settings = Settings(data)
+        settings._frozen = self._frozen
+        return settings
+
+    def get_path(self, path: str, default: Any = _MISSING) -> Any:
+        try:
+            return self._path_cache[path]
+        except KeyError:
+            pass
+        # a malformed path raises ValueError even with a default, it is a mistake in the program
+        # rather than a missing value
+        value = self._get_path_index().get(_convert_key(path), _MISSING)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(path)
+            return default
+        # only paths that were found are cached, looking up missing paths (which may come from
+        # anywhere) mustn't grow the cache
+        self._path_cache[path] = value
+        return value
+
+    def _get_path_index(self) -> dict[tuple[str, ...], Any]:
+        if self._path_index is None:
+            path_index: dict[tuple[str, ...], Any] = {}
+            pending: list[tuple[tuple[str, ...], Settings]] = [((), self)]
+            for prefix, settings in pending:
+                for key, value in settings._data.items():
+                    path = (*prefix, key)
+                    path_index[path] = value
+                    if isinstance(value, Settings):
+                        pending.append((path, value))
+            self._path_index = path_index
+        return self._path_index
+
+
+def merge_layers(layers: Sequence[Mapping[str, Any]]) -> Settings:
+    # layers are in order of precedence (the first layer wins), nested mappings are merged
+    # together while any other value from a lower layer is shadowed by the first layer that has
+    # the key
+    if len(layers) == 1 and isinstance(layers[0], Settings):
+        return layers[0]
+    keys: dict[str, None] = {}
+    for layer in reversed(layers):
+        keys.update(dict.fromkeys(layer))
+    data: dict[str, Any] = {}
+    for key in keys:
+        values = [layer[key] for layer in layers if key in layer]
+        value = values[0]
+        if isinstance(value, Mapping):
+            value = merge_layers([v for v in values if isinstance(v, Mapping)])
+        data[key] = value
+    return Settings(data)
+
+
+def freeze(data: Mapping[str, Any], previous: Settings | None = None) -> Settings:
+    # arrays become tuples so that the whole tree is immutable and hashable, any table or array
+    # that is equal to the one at the same place in previous is replaced by it so that versions of
+    # settings share whatever didn't change between them
+    frozen: dict[str, Any] = {}
+    unchanged = previous is not None and len(previous) == len(data)
+    for key, value in data.items():
+        previous_value = _MISSING if previous is None else previous._data.get(key, _MISSING)
+        value = _freeze_value(value, previous_value)
+        if value is not previous_value:
+            unchanged = False
+        frozen[key] = value
+    if unchanged:
+        assert previous is not None
+        return previous
+    settings = Settings(frozen)
+    settings._frozen = True
+    return settings
+
+
+def _freeze_value(value: Any, previous: Any) -> Any:
+    if isinstance(value, Mapping):
+        return freeze(value, previous if isinstance(previous, Settings) else None)
+    if isinstance(value, (list, tuple)):
+        value = tuple(_freeze_value(item, _MISSING) for item in value)
+    if type(value) is type(previous) and value == previous:
+        return previous
+    return value
+
+
+def get_changed_paths(old: Settings, new: Settings) -> frozenset[tuple[str, ...]]:
+    # the paths of every value that was added, removed or changed, tables themselves are only
+    # included when they are added or removed or replace/are replaced by a non-table value
+    old_index = old._get_path_index()
+    new_index = new._get_path_index()
+    changed_paths: set[tuple[str, ...]] = set()
+    for path in old_index.keys() | new_index.keys():
+        old_value = old_index.get(path, _MISSING)
+        new_value = new_index.get(path, _MISSING)
+        if old_value is new_value:
+            continue
+        if isinstance(old_value, Settings) and isinstance(new_value, Settings):
+            continue
+        if type(old_value) is type(new_value) and old_value == new_value:
+            continue
+        changed_paths.add(path)
+    return frozenset(changed_paths)
+
+
+class SettingsChange(NamedTuple):
+    path: tuple[str, ...]
+    kind: Literal["added", "removed", "changed"]
+    # the index of the layer the new value comes from, None when the value was removed
+    layer: int | None
+
+
+class SettingsUpdate(NamedTuple):
+    settings: Settings
+    changes: tuple[SettingsChange, ...]
+
+
+def update_settings(
+    settings: Settings,
+    old_layers: Sequence[Mapping[str, Any]],
+    new_layers: Sequence[Mapping[str, Any]],
+) -> SettingsUpdate:
+    # settings must be the result of merge_layers(old_layers), layers (and the tables within them)
+    # that are the same object in old_layers and new_layers are assumed to be unchanged, so only
+    # the keys of layers that were replaced are revisited and everything else is shared with
+    # settings
+    if len(old_layers) != len(new_layers):
+        raise ValueError("old_layers and new_layers must have the same number of layers")
+    changes: list[SettingsChange] = []
+    # frozen settings stay frozen, so the new values are frozen as they are merged in
+    new_settings = _update_table(
+        settings, list(old_layers), list(new_layers), (), changes, settings._frozen
+    )
+    assert isinstance(new_settings, Settings)
+    return SettingsUpdate(new_settings, tuple(changes))
+
+
+def _update_value(
+    old: Any,
+    old_layers: list[Any],
+    new_layers: list[Any],
+    path: tuple[str, ...],
+    changes: list[SettingsChange],
+    frozen: bool,
+) -> Any:
+    # the layers hold the value at path in each layer, or _MISSING
+    for layer_index, new in enumerate(new_layers):
+        if new is not _MISSING:
+            break
+    else:
+        layer_index = None
+        new = _MISSING
+
+    if isinstance(new, Mapping):
+        if not isinstance(old, Settings):
+            changes.append(
+                SettingsChange(path, "added" if old is _MISSING else "changed", layer_index)
+            )
+        return _update_table(old, old_layers, new_layers, path, changes, frozen)
+
+    if isinstance(old, Settings):
+        # everything in the table is gone, but only its keys are needed to say so
+        for key, value in old._data.items():
+            _update_value(value, [], [], (*path, key), changes, frozen)
+    if new is _MISSING:
+        if old is not _MISSING:
+            changes.append(SettingsChange(path, "removed", None))
+        return _MISSING
+    if frozen:
+        new = _freeze_value(new, _MISSING)
+    if old is _MISSING:
+        changes.append(SettingsChange(path, "added", layer_index))
+    elif type(old) is type(new) and old == new:
+        return old
+    else:
+        changes.append(SettingsChange(path, "changed", layer_index))
+    return new
+
+
+def _update_table(
+    old: Any,
+    old_layers: list[Any],
+    new_layers: list[Any],
+    path: tuple[str, ...],
+    changes: list[SettingsChange],
+    frozen: bool,
+) -> Settings:
+    # like merge_layers, a table is made of every layer's table at the same path, even the ones
+    # below a layer with a non-table value, None stands in for a layer without a table
+    old_tables: list[Mapping[str, Any] | None] = [
+        layer if isinstance(layer, Mapping) else None for layer in old_layers
+    ]
+    new_tables: list[Mapping[str, Any] | None] = [
+        layer if isinstance(layer, Mapping) else None for layer in new_layers
+    ]
+
+    keys: dict[str, None] = {}
+    if isinstance(old, Settings):
+        for old_table, new_table in zip(old_tables, new_tables):
+            if old_table is new_table:
+                continue
+            if old_table is not None:
+                for key, value in old_table.items():
+                    if new_table is None or new_table.get(key, _MISSING) is not value:
+                        keys[key] = None
+            if new_table is not None:
+                for key, value in new_table.items():
+                    if old_table is None or old_table.get(key, _MISSING) is not value:
+                        keys[key] = None
+        data = dict(old._data)
+    else:
+        old = None
+        old_tables = [None] * len(new_tables)
+        for new_table in reversed(new_tables):
+            if new_table is not None:
+                keys.update(dict.fromkeys(new_table))
+        data = {}
+
+    changed = old is None
+    for key in keys:
+        old_value = _MISSING if old is None else old._data.get(key, _MISSING)
+        new_value = _update_value(
+            old_value,
+            [_get(table, key) for table in old_tables],
+            [_get(table, key) for table in new_tables],
+            (*path, key),
+            changes,
+            frozen,
+        )
+        if new_value is old_value:
+            continue
+        changed = True
+        if new_value is _MISSING:
+            del data[key]
+        else:
+            data[key] = new_value
+
+    if not changed:
+        assert old is not None
+        return old
+    settings = Settings(data)
+    settings._frozen = frozen
+    return settings
+
+
+def _get(table: Mapping[str, Any] | None, key: str) -> Any:
+    if table is None:
+        return _MISSING
+    return table.get(key, _MISSING)
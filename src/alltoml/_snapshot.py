@@ -0,0 +1,121 @@
+__all__ = ["attach_snapshot", "publish_snapshot", "Snapshot"]
+
+import os
+import pickle
+import struct
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Any
+from typing import Final
+from typing import Mapping
+from zlib import crc32
+
+from ._settings import Settings
+from ._settings import freeze
+
+_MAGIC: Final = b"ALLTOMLS"
+_FORMAT_VERSION: Final = 1
+# magic, format version, checksum of the payload, generation, payload size
+_HEADER: Final = struct.Struct("<8sIIQQ")
+
+
+class Snapshot:
+    __slots__ = ("_path", "_generation", "_settings")
+
+    def __init__(self, path: Path, generation: int, settings: Settings) -> None:
+        self._path = path
+        self._generation = generation
+        self._settings = settings
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {str(self._path)!r} generation={self._generation}>"
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings
+
+    def is_stale(self) -> bool:
+        return _read_generation(self._path) != self._generation
+
+
+def publish_snapshot(path: Path, settings: Mapping[str, Any]) -> int:
+    generation = _read_generation(path) + 1
+    _write_snapshot(path, _MAGIC, _thaw(settings), generation)
+    return generation
+
+
+def attach_snapshot(path: Path) -> Snapshot:
+    generation, data = _read_snapshot(path, _MAGIC)
+    return Snapshot(path, generation, freeze(data))
+
+
+def _write_snapshot(path: Path, magic: bytes, data: Any, generation: int) -> None:
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    header = _HEADER.pack(magic, _FORMAT_VERSION, crc32(payload), generation, len(payload))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # the new snapshot replaces the old one in a single step, workers that are reading the old one
+    # keep reading it undisturbed and workers that attach afterwards only ever see the new one
+    with NamedTemporaryFile("wb", dir=path.parent, suffix=".tmp", delete=False) as snapshot_file:
+        try:
+            snapshot_file.write(header)
+            snapshot_file.write(payload)
+        except BaseException:
+            snapshot_file.close()
+            os.unlink(snapshot_file.name)
+            raise
+    os.replace(snapshot_file.name, path)
+
+
+def _read_snapshot(path: Path, magic: bytes) -> tuple[int, Any]:
+    # the payload is a pickle, unpickling it can run arbitrary code so the file must come from a
+    # trusted source, and each process that reads it gets its own copy of the settings
+    with open(path, "rb") as snapshot_file:
+        header = snapshot_file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            raise ValueError(f"{str(path)!r} is not a snapshot")
+        checksum, generation, payload_size = _unpack_header(path, header, magic)
+        payload = snapshot_file.read(payload_size)
+    if len(payload) != payload_size or crc32(payload) != checksum:
+        raise ValueError(f"{str(path)!r} is corrupt")
+    return generation, pickle.loads(payload)
+
+
+def _unpack_header(
+    path: Path, buffer: bytes | memoryview, magic: bytes = _MAGIC
+) -> tuple[int, int, int]:
+    header_magic, version, checksum, generation, payload_size = _HEADER.unpack_from(buffer)
+    if header_magic != magic:
+        raise ValueError(f"{str(path)!r} is not a snapshot")
+    if version != _FORMAT_VERSION:
+        raise ValueError(f"{str(path)!r} is an unsupported snapshot version: {version}")
+    return checksum, generation, payload_size
+
+
+def _read_generation(path: Path) -> int:
+    # only the header is read, a missing or invalid snapshot is generation 0
+    try:
+        with open(path, "rb") as snapshot_file:
+            header = snapshot_file.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            return 0
+        return _unpack_header(path, header)[1]
+    except (OSError, ValueError):
+        return 0
+
+
+def _thaw(value: Any) -> Any:
+    # settings are stored as plain dicts and lists, a pickled Settings would carry its cached
+    # hash into processes where str hashes are different
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_thaw(item) for item in value]
+    return value
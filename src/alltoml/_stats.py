@@ -0,0 +1,81 @@
+__all__ = ["LayerStats", "LoadStats", "StatsRecorder"]
+
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+from typing import TypeVar
+
+from . import _parse
+
+_T = TypeVar("_T")
+
+
+class LayerStats(NamedTuple):
+    name: str
+    seconds: float
+    bytes_read: int | None
+    entries_parsed: int
+    entries_failed: int
+
+
+class LoadStats(NamedTuple):
+    seconds: float
+    layers: tuple[LayerStats, ...]
+    toml_parses: int
+
+
+class StatsRecorder:
+    def __init__(self) -> None:
+        self._start = perf_counter()
+        self._toml_parse_counter = [0]
+        self._layers: list[LayerStats] = []
+
+    def record(
+        self,
+        name: str,
+        load: Callable[[Callable[..., None]], _T],
+        on_failure: Callable[..., None],
+        *,
+        entries: int | None = None,
+        file_path: Path | None = None,
+    ) -> _T:
+        # entries is the number of entries in the layer, when it is None the entries stored by the
+        # loader are counted instead
+        failures = 0
+        stored_entry_counter = [0]
+
+        def record_failure(*args: Any) -> None:
+            nonlocal failures
+            failures += 1
+            on_failure(*args)
+
+        toml_parse_token = _parse.toml_parse_counter.set(self._toml_parse_counter)
+        stored_entry_token = _parse.stored_entry_counter.set(stored_entry_counter)
+        try:
+            start = perf_counter()
+            settings = load(record_failure)
+            seconds = perf_counter() - start
+        finally:
+            _parse.stored_entry_counter.reset(stored_entry_token)
+            _parse.toml_parse_counter.reset(toml_parse_token)
+
+        bytes_read: int | None = None
+        if file_path is not None:
+            try:
+                bytes_read = file_path.stat().st_size
+            except OSError:
+                bytes_read = 0
+
+        if entries is None:
+            entries_parsed = stored_entry_counter[0]
+        else:
+            entries_parsed = max(entries - failures, 0)
+        self._layers.append(LayerStats(name, seconds, bytes_read, entries_parsed, failures))
+        return settings
+
+    def finish(self) -> LoadStats:
+        return LoadStats(
+            perf_counter() - self._start, tuple(self._layers), self._toml_parse_counter[0]
+        )
@@ -0,0 +1,203 @@
+__all__ = ["Watcher", "watch"]
+
+from logging import getLogger
+from pathlib import Path
+from threading import Event
+from threading import Lock
+from threading import Thread
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Mapping
+
+from platformdirs import user_data_dir
+
+from ._argv import load_from_argv
+from ._environ import load_from_environ
+from ._load import _SERVER_LAYER_INDEX
+from ._load import _argv_on_extra
+from ._load import _argv_on_failure
+from ._load import _copy_default_settings
+from ._load import _environ_on_failure
+from ._load import _file_on_failure
+from ._load import _find_sources
+from ._load import _get_file_paths
+from ._load import _load_file_layer
+from ._load import _server_on_failure
+from ._load import _stat_file
+from ._settings import Settings
+from ._settings import freeze
+from ._settings import merge_layers
+from ._settings import update_settings
+
+if TYPE_CHECKING:
+    from ._server import ConfigServer
+
+_log = getLogger("alltoml")
+
+Subscriber = Callable[[Settings, frozenset[tuple[str, ...]]], None]
+
+# the file layers follow the argv layer
+_FILE_LAYER_OFFSET = 1
+
+
+class Watcher:
+    def __init__(
+        self,
+        application_name: str,
+        application_author: str,
+        *,
+        default_settings: Mapping[str, Any] | None = None,
+        interval: float = 1.0,
+        frozen: bool = False,
+        config_server: "ConfigServer | None" = None,
+        response_files: bool = False,
+    ) -> None:
+        self._interval = interval
+        self._frozen = frozen
+        self._config_server = config_server
+        self._subscribers: list[Subscriber] = []
+        self._poll_lock = Lock()
+        self._stop_event = Event()
+        self._thread: Thread | None = None
+
+        environ_prefix, file_path, argv = _find_sources(application_name)
+        user_data_path = Path(user_data_dir(application_name, application_author))
+        self._file_paths = _get_file_paths(file_path, user_data_path)
+        # stat the files before loading them so that a change while loading is picked up by the
+        # next poll
+        self._file_stats = [_stat_file(p) for p in self._file_paths]
+        self._layers: list[Mapping[str, Any]] = [
+            load_from_argv(
+                argv,
+                on_extra=_argv_on_extra,
+                on_failure=_argv_on_failure,
+                response_files=response_files,
+            ),
+            *(_load_file_layer(p, None) for p in self._file_paths),
+            load_from_environ(prefix=environ_prefix, on_failure=_environ_on_failure),
+            _copy_default_settings(default_settings),
+        ]
+        if config_server is not None:
+            self._layers.insert(
+                _SERVER_LAYER_INDEX, config_server.fetch(on_failure=_server_on_failure)
+            )
+        # the unfrozen merged settings are kept to update incrementally as the layers change
+        self._merged_settings = merge_layers(self._layers)
+        self._settings = freeze(self._merged_settings) if frozen else self._merged_settings
+
+    def __enter__(self) -> "Watcher":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    @property
+    def settings(self) -> Settings:
+        return self._settings
+
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        self._subscribers.append(subscriber)
+        return lambda: self._subscribers.remove(subscriber)
+
+    def poll(self) -> frozenset[tuple[str, ...]]:
+        with self._poll_lock:
+            layers = list(self._layers)
+            for i, file_path in enumerate(self._file_paths):
+                file_stat = _stat_file(file_path)
+                if file_stat == self._file_stats[i]:
+                    continue
+                file_settings = _reload_file_layer(file_path)
+                if file_settings is None:
+                    if file_stat is not None:
+                        # a file that is half written or has a mistake in it keeps its previous
+                        # settings, its stat isn't stored so that the next poll tries again
+                        continue
+                    # the file was removed
+                    file_settings = {}
+                self._file_stats[i] = file_stat
+                layers[_FILE_LAYER_OFFSET + i] = file_settings
+            if self._config_server is not None:
+                # the server answers with the same settings as before if they haven't changed
+                layers[_SERVER_LAYER_INDEX] = self._config_server.fetch(
+                    on_failure=_server_on_failure
+                )
+            if all(a is b for a, b in zip(layers, self._layers)):
+                return frozenset()
+
+            merged_settings, changes = update_settings(self._merged_settings, self._layers, layers)
+            settings = merged_settings
+            if self._frozen:
+                # whatever didn't change is shared with the previous settings
+                settings = freeze(merged_settings, self._settings)
+            changed_paths = frozenset(change.path for change in changes)
+            self._layers = layers
+            self._merged_settings = merged_settings
+            self._settings = settings
+
+            if changed_paths:
+                for subscriber in list(self._subscribers):
+                    # a failing subscriber mustn't keep the others from hearing about the change
+                    try:
+                        subscriber(settings, changed_paths)
+                    except Exception:
+                        _log.exception("settings subscriber %r failed", subscriber)
+            return changed_paths
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, name="alltoml-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            try:
+                self.poll()
+            except Exception:
+                _log.exception("failed to reload settings")
+
+
+def _reload_file_layer(file_path: Path | None) -> dict[str, Any] | None:
+    # None if the file couldn't be parsed
+    failed = False
+
+    def on_failure(file_path: Path) -> None:
+        nonlocal failed
+        failed = True
+        _file_on_failure(file_path)
+
+    file_settings = _load_file_layer(file_path, None, on_failure)
+    return None if failed else file_settings
+
+
+def watch(
+    application_name: str,
+    application_author: str,
+    *,
+    default_settings: Mapping[str, Any] | None = None,
+    interval: float = 1.0,
+    frozen: bool = False,
+    config_server: "ConfigServer | None" = None,
+    response_files: bool = False,
+) -> Watcher:
+    watcher = Watcher(
+        application_name,
+        application_author,
+        default_settings=default_settings,
+        interval=interval,
+        frozen=frozen,
+        config_server=config_server,
+        response_files=response_files,
+    )
+    watcher.start()
+    return watcher
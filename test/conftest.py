@@ -0,0 +1,38 @@
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from alltoml import invalidate_load_cache
+
+
+@pytest.fixture
+def app_argv():
+    return ["test"]
+
+
+@pytest.fixture
+def app_environ():
+    return {}
+
+
+@pytest.fixture
+def app_environment(tmp_path, monkeypatch, app_argv, app_environ):
+    # an empty current working directory and user data directory, with sys.argv and os.environ
+    # replaced by app_argv and app_environ, which a test module can override to suit its tests
+    cwd_path = tmp_path / "cwd"
+    cwd_path.mkdir()
+    user_data_path = tmp_path / "user"
+    user_data_path.mkdir()
+    monkeypatch.chdir(cwd_path)
+    invalidate_load_cache()
+    with (
+        patch("alltoml._load.user_data_dir", return_value=str(user_data_path)),
+        patch("alltoml._watch.user_data_dir", return_value=str(user_data_path)),
+        patch("alltoml._compile.user_data_dir", return_value=str(user_data_path)),
+        patch.object(sys, "argv", app_argv),
+        patch.object(os, "environ", app_environ),
+    ):
+        yield cwd_path, user_data_path
+    invalidate_load_cache()
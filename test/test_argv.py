@@ -10,32 +10,32 @@ from alltoml import load_from_argv
 
 
 @pytest.fixture
-def store_settings_mock():
-    with patch("alltoml._argv.store_settings") as mock:
+def store_many_settings_mock():
+    with patch("alltoml._argv.store_many_settings") as mock:
         yield mock
 
 
-def test_load_from_argv_default(store_settings_mock):
+def test_load_from_argv_default(store_many_settings_mock):
     with patch.object(sys, "argv", ["a", "--config.x", "1"]):
         settings = load_from_argv()
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
 def test_load_from_argv_empty():
     assert load_from_argv([]) == {}
 
 
-def test_load_from_argv_basic(store_settings_mock):
+def test_load_from_argv_basic(store_many_settings_mock):
     settings = load_from_argv(["--config.x", "1"])
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
-def test_load_from_argv_custom_prefix(store_settings_mock):
+def test_load_from_argv_custom_prefix(store_many_settings_mock):
     settings = load_from_argv(["-my-prefix_x", "1"], prefix="-my-prefix_")
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
 def test_load_from_argv_custom_on_failure_missing():
@@ -54,3 +54,118 @@ def test_load_from_argv_custom_on_extra():
     on_extra = MagicMock()
     assert load_from_argv(["idk"], on_extra=on_extra) == {}
     on_extra.assert_called_once_with("idk")
+
+
+def test_load_from_argv_custom_on_failure_only_invalid():
+    on_failure = MagicMock()
+    assert load_from_argv(
+        ["--config.a", "[1]", "--config.b", "[", "--config.c", "{x = 1}", "--config.d"],
+        on_failure=on_failure,
+    ) == {"a": [1], "c": {"x": 1}}
+    on_failure.assert_has_calls([call("--config.b", "["), call("--config.d", None)])
+    assert on_failure.call_count == 2
+
+
+def test_load_from_argv_response_files_disabled():
+    on_extra = MagicMock()
+    assert load_from_argv(["@args.txt"], on_extra=on_extra) == {}
+    on_extra.assert_called_once_with("@args.txt")
+
+
+def test_load_from_argv_response_file(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("--config.b\n2\r\n\n--config.c\n{ d = 1 }\n")
+    assert load_from_argv(
+        ["--config.a", "1", f"@{path}", "--config.e", "3"], response_files=True
+    ) == {"a": 1, "b": 2, "c": {"d": 1}, "e": 3}
+
+
+def test_load_from_argv_response_file_precedence(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("--config.a\n2\n")
+    on_failure = MagicMock()
+    assert load_from_argv(
+        [f"@{path}", "--config.a", "1"], on_failure=on_failure, response_files=True
+    ) == {"a": 2}
+    on_failure.assert_called_once_with("--config.a", "1")
+
+
+def test_load_from_argv_response_file_nested(tmp_path):
+    inner_path = tmp_path / "inner.txt"
+    inner_path.write_text("--config.b\n2\n")
+    outer_path = tmp_path / "outer.txt"
+    outer_path.write_text(f"--config.a\n1\n@{inner_path}\n--config.c\n3\n")
+    assert load_from_argv([f"@{outer_path}"], response_files=True) == {"a": 1, "b": 2, "c": 3}
+
+
+def test_load_from_argv_response_file_value_not_expanded(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("--config.b\n'@x'\n")
+    assert load_from_argv(["--config.a", f"'@{path}'", f"@{path}"], response_files=True) == {
+        "a": f"@{path}",
+        "b": "@x",
+    }
+
+
+def test_load_from_argv_response_file_spliced(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("--config.a\n")
+    assert load_from_argv([f"@{path}", "1"], response_files=True) == {"a": 1}
+
+
+def test_load_from_argv_response_file_failures(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("--config.a\n[\nidk\n--config.b\n1\n--config.c\n")
+    on_failure = MagicMock()
+    on_extra = MagicMock()
+    assert load_from_argv(
+        [f"@{path}"], on_failure=on_failure, on_extra=on_extra, response_files=True
+    ) == {"b": 1}
+    on_extra.assert_called_once_with(f"idk ({path}:3)")
+    assert on_failure.call_args_list == [
+        call(f"--config.a ({path}:1)", "["),
+        call(f"--config.c ({path}:6)", None),
+    ]
+
+
+def test_load_from_argv_response_file_missing(tmp_path):
+    path = tmp_path / "missing.txt"
+    on_failure = MagicMock()
+    assert load_from_argv(
+        [f"@{path}", "--config.a", "1"], on_failure=on_failure, response_files=True
+    ) == {"a": 1}
+    on_failure.assert_called_once_with(f"@{path}", None)
+
+
+def test_load_from_argv_response_file_invalid_utf8(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_bytes(b"\xff\n--config.b\n2\n")
+    on_failure = MagicMock()
+    assert load_from_argv(
+        [f"@{path}", "--config.c", "3"], on_failure=on_failure, response_files=True
+    ) == {"c": 3}
+    on_failure.assert_called_once_with(f"@{path}", None)
+
+
+def test_load_from_argv_response_file_recursive(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text(f"--config.a\n1\n@{path}\n")
+    on_failure = MagicMock()
+    assert load_from_argv([f"@{path}"], on_failure=on_failure, response_files=True) == {"a": 1}
+    on_failure.assert_called_once_with(f"@{path} ({path}:3)", None)
+
+
+def test_load_from_argv_response_file_closed(tmp_path):
+    path = tmp_path / "args.txt"
+    path.write_text("idk\n--config.a\n1\n")
+    files = []
+
+    def open_file(*args, **kwargs):
+        files.append(open(*args, **kwargs))
+        return files[-1]
+
+    with patch("alltoml._argv.open", side_effect=open_file, create=True):
+        with pytest.raises(SystemExit):
+            load_from_argv([f"@{path}"], on_extra=lambda a: sys.exit(1), response_files=True)
+    assert len(files) == 1
+    assert files[0].closed
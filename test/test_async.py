@@ -0,0 +1,154 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from alltoml import Settings
+from alltoml import load
+from alltoml import load_async
+from alltoml import load_from_file
+from alltoml import load_from_file_async
+from alltoml import watch_async
+
+
+@pytest.fixture
+def app_argv(tmp_path):
+    return ["test", "--config", str(tmp_path / "explicit.toml"), "--config.argv", "1"]
+
+
+@pytest.fixture
+def app_environ():
+    return {"A_CONFIG.environ": "1", "A_CONFIG.table.environ": "1"}
+
+
+@pytest.fixture
+def environment(tmp_path, app_environment):
+    cwd_path, user_data_path = app_environment
+    explicit_path = tmp_path / "explicit.toml"
+    explicit_path.write_text("explicit = 1\nshared = 'explicit'")
+    (cwd_path / "config.toml").write_text("cwd = 1\nshared = 'cwd'\n[table]\ncwd = 1")
+    (user_data_path / "config.toml").write_text("user = 1\n[table]\nuser = 1")
+    return explicit_path
+
+
+@pytest.mark.parametrize("name", [None, Path("config.toml"), Path("other.toml")])
+def test_load_from_file_async(tmp_path, name):
+    (tmp_path / "config.toml").write_text("a = 1")
+    (tmp_path / "other.toml").write_text("b = 1")
+    kwargs = {} if name is None else {"name": name}
+    assert asyncio.run(load_from_file_async(tmp_path, **kwargs)) == load_from_file(
+        tmp_path, **kwargs
+    )
+
+
+def test_load_from_file_async_on_failure(tmp_path):
+    on_failure = MagicMock()
+    assert asyncio.run(load_from_file_async(tmp_path, on_failure=on_failure)) == {}
+    on_failure.assert_called_once_with(tmp_path / "config.toml")
+
+
+def test_load_from_file_async_cache(tmp_path):
+    (tmp_path / "config.toml").write_text("a = 1")
+    cache_path = tmp_path / "cache"
+    assert asyncio.run(load_from_file_async(tmp_path, cache_path=cache_path)) == {"a": 1}
+    assert len(list(cache_path.iterdir())) == 1
+
+
+@pytest.mark.parametrize("default_settings", [None, {"default": 1, "table": {"default": 1}}])
+def test_load_async(environment, default_settings):
+    expected = load("a", "b", default_settings=default_settings)
+    settings = asyncio.run(load_async("a", "b", default_settings=default_settings))
+    assert type(settings) is type(expected)
+    assert settings.maps == expected.maps
+
+
+def test_load_async_materialize(environment):
+    expected = load("a", "b", materialize=True)
+    settings = asyncio.run(load_async("a", "b", materialize=True))
+    assert isinstance(settings, Settings)
+    assert settings == expected
+
+
+def test_load_async_frozen(environment):
+    expected = load("a", "b", frozen=True)
+    settings = asyncio.run(load_async("a", "b", frozen=True))
+    assert isinstance(settings, Settings)
+    assert settings == expected
+    assert hash(settings) == hash(expected)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"cache": True},
+        {"file_cache": True},
+        {"intern": True},
+        {"materialize": True, "intern": True},
+    ],
+)
+def test_load_async_options(environment, kwargs):
+    expected = load("a", "b", **kwargs)
+    settings = asyncio.run(load_async("a", "b", **kwargs))
+    assert dict(settings) == dict(expected)
+
+
+def test_load_async_lazy(environment):
+    settings = asyncio.run(load_async("a", "b", lazy=True))
+    assert dict(settings) == dict(load("a", "b"))
+
+
+def test_load_async_stats(environment):
+    stats = []
+    asyncio.run(load_async("a", "b", stats=stats.append))
+    load("a", "b", stats=stats.append)
+    assert [layer.name for layer in stats[0].layers] == [layer.name for layer in stats[1].layers]
+    assert stats[0].toml_parses == stats[1].toml_parses
+
+
+def test_load_async_envfile(environment, tmp_path):
+    envfile_path = tmp_path / ".env"
+    envfile_path.write_text("A_CONFIG.envfile=1")
+    settings = asyncio.run(load_async("a", "b", envfile=envfile_path))
+    assert settings["envfile"] == 1
+
+
+def test_load_async_off_loop(environment):
+    loop_thread_files = []
+
+    def _load_from_file(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            loop_thread_files.append(args)
+        except RuntimeError:
+            pass
+        return load_from_file(*args, **kwargs)
+
+    with patch("alltoml._load.load_from_file", side_effect=_load_from_file) as load_from_file_mock:
+        asyncio.run(load_async("a", "b"))
+    assert load_from_file_mock.call_count == 3
+    assert loop_thread_files == []
+
+
+def test_watch_async(environment):
+    explicit_path = environment
+
+    async def _():
+        snapshots = []
+        async for settings in watch_async("a", "b", interval=0.01):
+            snapshots.append(settings)
+            if len(snapshots) == 1:
+                explicit_path.write_text("explicit = 2")
+            else:
+                break
+        return snapshots
+
+    expected = load("a", "b", materialize=True)
+    snapshots = asyncio.run(asyncio.wait_for(_(), 5))
+    assert snapshots[0] == expected
+    assert snapshots[0]["explicit"] == 1
+    assert snapshots[1]["explicit"] == 2
+    assert snapshots[1] == load("a", "b", materialize=True)
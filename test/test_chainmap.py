@@ -0,0 +1,118 @@
+import pytest
+from deep_chainmap import DeepChainMap
+
+from alltoml._chainmap import CachedDeepChainMap
+from alltoml._settings import merge_layers
+
+LAYERS = [
+    {"a": {"b": {"c": 1}}, "d": 1},
+    {"a": {"b": {"e": 2}, "f": 2}, "d": {"g": 2}},
+    {"h": {"i": 3}},
+]
+
+
+def _layers():
+    return [
+        {k: (dict(v) if isinstance(v, dict) else v) for k, v in layer.items()} for layer in LAYERS
+    ]
+
+
+@pytest.mark.parametrize(
+    "path", [("a",), ("a", "b"), ("a", "b", "c"), ("a", "b", "e"), ("a", "f"), ("d",), ("h", "i")]
+)
+def test_matches_deep_chainmap(path):
+    expected = DeepChainMap(*_layers())
+    settings = CachedDeepChainMap(*_layers())
+    for key in path:
+        expected = expected[key]
+        settings = settings[key]
+    if isinstance(expected, DeepChainMap):
+        assert isinstance(settings, CachedDeepChainMap)
+        assert settings.maps == expected.maps
+        assert dict(settings) == dict(expected)
+    else:
+        assert settings == expected
+
+
+def test_shadowed_non_table():
+    layers = [{"a": {"b": 1}}, {"a": 2}, {"a": {"c": 3}}]
+    settings = CachedDeepChainMap(*layers)
+    assert dict(settings["a"]) == dict(merge_layers(layers)["a"])
+    assert settings["a"]["c"] == 3
+    with pytest.raises(KeyError):
+        settings["a"]["x"]
+
+
+def test_missing():
+    settings = CachedDeepChainMap(*_layers())
+    with pytest.raises(KeyError):
+        settings["x"]
+    with pytest.raises(KeyError):
+        settings["a"]["x"]
+    assert settings.get("x") is None
+
+
+def test_reuses_views():
+    settings = CachedDeepChainMap(*_layers())
+    assert settings["a"] is settings["a"]
+    assert settings["a"]["b"] is settings["a"]["b"]
+    assert settings["d"] == 1
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda settings: settings.__setitem__("a", {"x": 1}),
+        lambda settings: settings.update({"a": {"x": 1}}),
+        lambda settings: settings.__ior__({"a": {"x": 1}}),
+    ],
+)
+def test_set_invalidates(mutate):
+    settings = CachedDeepChainMap(*_layers())
+    view = settings["a"]
+    mutate(settings)
+    assert settings["a"] is not view
+    assert settings["a"]["x"] == 1
+    assert settings["a"]["f"] == 2
+
+
+@pytest.mark.parametrize(
+    "mutate",
+    [
+        lambda settings: settings.__delitem__("a"),
+        lambda settings: settings.pop("a"),
+        lambda settings: settings.pop("a", None),
+        lambda settings: settings.popitem(),
+        lambda settings: settings.clear(),
+    ],
+)
+def test_remove_invalidates(mutate):
+    layers = _layers()
+    layers[0] = {"a": {"x": 1}}
+    settings = CachedDeepChainMap(*layers)
+    assert settings["a"]["x"] == 1
+    mutate(settings)
+    assert "x" not in settings["a"]
+    assert settings["a"]["f"] == 2
+
+
+def test_pop_default():
+    settings = CachedDeepChainMap({"a": 1}, {})
+    assert settings.pop("b", None) is None
+    assert settings.pop(key="a", default=None) == 1
+    with pytest.raises(KeyError):
+        settings.pop("a")
+
+
+def test_nested_set():
+    settings = CachedDeepChainMap(*_layers())
+    settings["a"]["b"]["c"] = {"x": 1}
+    assert settings["a"]["b"]["c"]["x"] == 1
+    assert DeepChainMap(*settings.maps)["a"]["b"]["c"]["x"] == 1
+
+
+def test_derived():
+    settings = CachedDeepChainMap(*_layers())
+    for derived in [settings.copy(), settings.new_child(), settings.parents]:
+        assert isinstance(derived, CachedDeepChainMap)
+        assert isinstance(derived["h"], CachedDeepChainMap)
@@ -0,0 +1,171 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from alltoml import attach_snapshot
+from alltoml import compile_snapshot
+from alltoml import publish_snapshot
+from alltoml.__main__ import main
+from alltoml._compile import read_compiled_snapshot
+
+
+@pytest.fixture
+def compile_environment(app_environment):
+    cwd_path, user_data_path = app_environment
+    (cwd_path / "config.toml").write_text("cwd = 1")
+    (user_data_path / "config.toml").write_text("user = 1")
+    file_paths = (None, Path(".") / "config.toml", user_data_path / "config.toml")
+    return cwd_path, user_data_path, file_paths
+
+
+def test_compile_snapshot(compile_environment):
+    cwd_path, _, file_paths = compile_environment
+    snapshot_path = cwd_path / "snapshot"
+    assert compile_snapshot("a", "b", snapshot_path) is None
+    assert read_compiled_snapshot(snapshot_path, file_paths) == ({}, {"cwd": 1}, {"user": 1})
+
+
+def test_compile_snapshot_explicit_file(compile_environment):
+    cwd_path, _, (_, *file_paths) = compile_environment
+    (cwd_path / "explicit.toml").write_text("explicit = 1")
+    snapshot_path = cwd_path / "snapshot"
+    compile_snapshot("a", "b", snapshot_path, file_path=Path("explicit.toml"))
+    assert read_compiled_snapshot(snapshot_path, (Path("explicit.toml"), *file_paths)) == (
+        {"explicit": 1},
+        {"cwd": 1},
+        {"user": 1},
+    )
+    # the explicit file is compared by its absolute path
+    assert read_compiled_snapshot(snapshot_path, (cwd_path / "explicit.toml", *file_paths))
+    assert read_compiled_snapshot(snapshot_path, (None, *file_paths)) is None
+    assert read_compiled_snapshot(snapshot_path, (cwd_path / "other.toml", *file_paths)) is None
+
+
+def test_compile_snapshot_missing_sources(compile_environment):
+    cwd_path, user_data_path, file_paths = compile_environment
+    (cwd_path / "config.toml").unlink()
+    (user_data_path / "config.toml").unlink()
+    snapshot_path = cwd_path / "snapshot"
+    compile_snapshot("a", "b", snapshot_path)
+    assert read_compiled_snapshot(snapshot_path, file_paths) == ({}, {}, {})
+    (cwd_path / "config.toml").write_text("cwd = 1")
+    assert read_compiled_snapshot(snapshot_path, file_paths) is None
+
+
+def test_compile_snapshot_missing_explicit_file(compile_environment):
+    cwd_path, _, _ = compile_environment
+    with pytest.raises(FileNotFoundError):
+        compile_snapshot("a", "b", cwd_path / "snapshot", file_path=Path("missing.toml"))
+    assert not (cwd_path / "snapshot").exists()
+
+
+@pytest.mark.parametrize("content", [b"x = [", b"\xff = 1"])
+def test_compile_snapshot_invalid_source(compile_environment, content):
+    cwd_path, _, _ = compile_environment
+    (cwd_path / "config.toml").write_bytes(content)
+    with pytest.raises(ValueError, match="'config.toml' is not a valid config file"):
+        compile_snapshot("a", "b", cwd_path / "snapshot")
+    assert not (cwd_path / "snapshot").exists()
+
+
+def test_compiled_snapshot_stale(compile_environment):
+    cwd_path, _, file_paths = compile_environment
+    snapshot_path = cwd_path / "snapshot"
+    compile_snapshot("a", "b", snapshot_path)
+    source_path = cwd_path / "config.toml"
+    stat = source_path.stat()
+
+    # only the modification time changed
+    os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert read_compiled_snapshot(snapshot_path, file_paths) == ({}, {"cwd": 1}, {"user": 1})
+
+    # the content changed without the size changing
+    source_path.write_text("cwd = 2")
+    assert read_compiled_snapshot(snapshot_path, file_paths) is None
+
+    source_path.write_text("cwd = 22")
+    assert read_compiled_snapshot(snapshot_path, file_paths) is None
+
+
+def test_compiled_snapshot_is_not_published_snapshot(tmp_path, compile_environment):
+    _, _, file_paths = compile_environment
+    compiled_path = tmp_path / "compiled"
+    compile_snapshot("a", "b", compiled_path)
+    with pytest.raises(ValueError, match="is not a snapshot"):
+        attach_snapshot(compiled_path)
+
+    published_path = tmp_path / "published"
+    publish_snapshot(published_path, {"a": 1})
+    with pytest.raises(ValueError, match="is not a snapshot"):
+        read_compiled_snapshot(published_path, file_paths)
+
+
+def test_compiled_snapshot_corrupt(compile_environment):
+    cwd_path, _, file_paths = compile_environment
+    snapshot_path = cwd_path / "snapshot"
+    compile_snapshot("a", "b", snapshot_path)
+    content = bytearray(snapshot_path.read_bytes())
+    content[-1] ^= 0xFF
+    snapshot_path.write_bytes(content)
+    with pytest.raises(ValueError, match="is corrupt"):
+        read_compiled_snapshot(snapshot_path, file_paths)
+
+
+def test_main_compile(compile_environment):
+    cwd_path, _, file_paths = compile_environment
+    assert main(["compile", "a", "b", "snapshot"]) == 0
+    assert read_compiled_snapshot(cwd_path / "snapshot", file_paths) == (
+        {},
+        {"cwd": 1},
+        {"user": 1},
+    )
+
+
+@pytest.mark.parametrize("use_environ", [False, True])
+def test_main_compile_explicit_file(compile_environment, use_environ):
+    cwd_path, _, (_, *file_paths) = compile_environment
+    (cwd_path / "explicit.toml").write_text("explicit = 1")
+    if use_environ:
+        with patch.dict(os.environ, {"MY_APP_CONFIG": "explicit.toml"}):
+            assert main(["compile", "my-app", "b", "snapshot"]) == 0
+    else:
+        assert main(["compile", "my-app", "b", "snapshot", "--config", "explicit.toml"]) == 0
+    assert read_compiled_snapshot(cwd_path / "snapshot", (Path("explicit.toml"), *file_paths)) == (
+        {"explicit": 1},
+        {"cwd": 1},
+        {"user": 1},
+    )
+
+
+def test_main_compile_error(compile_environment, capsys):
+    cwd_path, _, _ = compile_environment
+    (cwd_path / "config.toml").write_text("x = [")
+    assert main(["compile", "a", "b", "snapshot"]) == 1
+    assert capsys.readouterr().err == "error: 'config.toml' is not a valid config file\n"
+
+
+def test_main_no_command(capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main([])
+    assert excinfo.value.code == 2
+
+
+def test_python_m_compile(tmp_path):
+    (tmp_path / "config.toml").write_text("cwd = 1")
+    result = subprocess.run(
+        [sys.executable, "-m", "alltoml", "compile", "a", "b", "snapshot"],
+        cwd=tmp_path,
+        env={
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(sys.path),
+            "XDG_DATA_HOME": str(tmp_path / "data"),
+        },
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert (tmp_path / "snapshot").exists()
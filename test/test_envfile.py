@@ -0,0 +1,93 @@
+import os
+from unittest.mock import ANY
+from unittest.mock import MagicMock
+from unittest.mock import call
+from unittest.mock import patch
+
+import pytest
+
+from alltoml import load_from_envfile
+from alltoml import load_from_environ
+
+
+@pytest.fixture
+def store_many_settings_mock():
+    with patch("alltoml._envfile.store_many_settings") as mock:
+        mock.side_effect = lambda settings, entries: list(entries)
+        yield mock
+
+
+def test_load_from_envfile_empty(tmp_path):
+    path = tmp_path / "env"
+    path.write_text("")
+    assert load_from_envfile(path) == {}
+
+
+def test_load_from_envfile_basic(tmp_path, store_many_settings_mock):
+    path = tmp_path / "env"
+    path.write_text("CONFIG.x=1\n")
+    settings = load_from_envfile(path)
+    assert settings == {}
+    store_many_settings_mock.assert_called_once_with(settings, ANY)
+
+
+def test_load_from_envfile_format(tmp_path):
+    path = tmp_path / "env"
+    path.write_text(
+        "# a comment\n"
+        "\n"
+        "CONFIG.a=1\n"
+        "   CONFIG.b=  'x = y'  \r\n"
+        "  # CONFIG.c=1\n"
+        "OTHER=1\n"
+        "CONFIG.d={ e = [1, 2] }\n"
+        "CONFIG.f='#'"
+    )
+    assert load_from_envfile(path) == {"a": 1, "b": "x = y", "d": {"e": [1, 2]}, "f": "#"}
+
+
+def test_load_from_envfile_custom_prefix(tmp_path):
+    path = tmp_path / "env"
+    path.write_text("CONFIG.a=1\nMY_b=2\n")
+    assert load_from_envfile(path, prefix="MY_") == {"b": 2}
+
+
+def test_load_from_envfile_custom_on_failure(tmp_path):
+    path = tmp_path / "env"
+    path.write_text("CONFIG.a=[1]\nCONFIG.b=[\nCONFIG.c\nOTHER\nCONFIG.d=1\n")
+    on_failure = MagicMock()
+    assert load_from_envfile(path, on_failure=on_failure) == {"a": [1], "d": 1}
+    assert on_failure.call_args_list == [call("CONFIG.c", None), call("CONFIG.b", "[")]
+
+
+def test_load_from_envfile_matches_load_from_environ(tmp_path):
+    environ = {"CONFIG.a": "[1]", "CONFIG.b": "[", "CONFIG.c.d": "'x'", "OTHER": "1"}
+    path = tmp_path / "env"
+    path.write_text("".join(f"{key}={value}\n" for key, value in environ.items()))
+    on_failure = MagicMock()
+    expected_on_failure = MagicMock()
+    assert load_from_envfile(path, on_failure=on_failure) == load_from_environ(
+        environ, on_failure=expected_on_failure
+    )
+    assert on_failure.call_args_list == expected_on_failure.call_args_list
+
+
+def test_load_from_envfile_does_not_touch_environ(tmp_path):
+    path = tmp_path / "env"
+    path.write_text("CONFIG.a=1\n")
+    environ = {}
+    with patch.object(os, "environ", environ):
+        assert load_from_envfile(path) == {"a": 1}
+    assert environ == {}
+
+
+def test_load_from_envfile_missing(tmp_path):
+    with pytest.raises(OSError):
+        load_from_envfile(tmp_path / "env")
+
+
+def test_load_from_envfile_invalid_utf8(tmp_path):
+    path = tmp_path / "env"
+    path.write_bytes(b"CONFIG.a=\xff\n")
+    with pytest.raises(ValueError):
+        load_from_envfile(path)
@@ -1,44 +1,106 @@
 import os
 from unittest.mock import ANY
 from unittest.mock import MagicMock
-from unittest.mock import call
 from unittest.mock import patch
 
 import pytest
 
 from alltoml import load_from_environ
+from alltoml import load_from_environ_prefixes
 
 
 @pytest.fixture
-def store_settings_mock():
-    with patch("alltoml._environ.store_settings") as mock:
+def store_many_settings_mock():
+    with patch("alltoml._environ.store_many_settings") as mock:
         yield mock
 
 
-def test_load_from_environ_default(store_settings_mock):
+def test_load_from_environ_default(store_many_settings_mock):
     with patch.object(os, "environ", {"CONFIG.x": "1"}):
         settings = load_from_environ()
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
 def test_load_from_environ_empty():
     assert load_from_environ({}) == {}
 
 
-def test_load_from_environ_basic(store_settings_mock):
+def test_load_from_environ_basic(store_many_settings_mock):
     settings = load_from_environ({"CONFIG.x": "1"})
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
-def test_load_from_argv_custom_prefix(store_settings_mock):
+def test_load_from_argv_custom_prefix(store_many_settings_mock):
     settings = load_from_environ({"myprefix_x": "1"}, prefix="myprefix_")
     assert settings == {}
-    store_settings_mock.assert_has_calls([call(settings, "x", "1", ANY)])
+    store_many_settings_mock.assert_called_once_with(settings, [("x", "1", ANY)])
 
 
 def test_load_from_environ_custom_on_failure_store_settings():
     on_failure = MagicMock()
     assert load_from_environ({"CONFIG.x": "'"}, on_failure=on_failure) == {}
     on_failure.assert_called_once_with("CONFIG.x", "'")
+
+
+def test_load_from_environ_custom_on_failure_only_invalid():
+    on_failure = MagicMock()
+    assert load_from_environ(
+        {"CONFIG.a": "[1]", "CONFIG.b": "[", "CONFIG.c": "{x = 1}"}, on_failure=on_failure
+    ) == {"a": [1], "c": {"x": 1}}
+    on_failure.assert_called_once_with("CONFIG.b", "[")
+
+
+def test_load_from_environ_prefixes_default():
+    with patch.object(os, "environ", {"A.x": "1", "B.x": "2"}):
+        assert load_from_environ_prefixes(["A."]) == {"A.": {"x": 1}}
+
+
+def test_load_from_environ_prefixes_empty():
+    assert load_from_environ_prefixes([], {"A.x": "1"}) == {}
+    assert load_from_environ_prefixes(["A."], {}) == {"A.": {}}
+
+
+def test_load_from_environ_prefixes_basic():
+    environ = {"A.x": "1", "A.y": "{ z = 'a' }", "AB.x": "2", "B.x": "3", "OTHER": "4", "A": "5"}
+    assert load_from_environ_prefixes(["A.", "AB.", "C."], environ) == {
+        "A.": {"x": 1, "y": {"z": "a"}},
+        "AB.": {"x": 2},
+        "C.": {},
+    }
+
+
+def test_load_from_environ_prefixes_overlapping():
+    on_failure = MagicMock()
+    environ = {"A_B_x": "1", "A_y": "2", "A_B_z": "["}
+    assert load_from_environ_prefixes(["A_B_", "A_", "A_"], environ, on_failure=on_failure) == {
+        "A_B_": {"x": 1},
+        "A_": {"B_x": 1, "y": 2},
+    }
+    assert on_failure.call_count == 2
+    on_failure.assert_called_with("A_B_z", "[")
+
+
+def test_load_from_environ_prefixes_empty_prefix():
+    assert load_from_environ_prefixes(["", "A."], {"A.x": "1", "b": "2"}) == {
+        "": {"A": {"x": 1}, "b": 2},
+        "A.": {"x": 1},
+    }
+
+
+@pytest.mark.parametrize(
+    "environ",
+    [
+        {"CONFIG.a": "[1]", "CONFIG.b": "[", "CONFIG.c": "{x = 1}", "OTHER.d": "1"},
+        {"CONFIG.a.b": "1", "CONFIG.a": "1", "OTHER.a": "'x'", "CONFIG.'": "1"},
+    ],
+)
+def test_load_from_environ_prefixes_matches_load_from_environ(environ):
+    on_failure = MagicMock()
+    expected_on_failure = MagicMock()
+    result = load_from_environ_prefixes(["CONFIG.", "OTHER."], environ, on_failure=on_failure)
+    for prefix in ["CONFIG.", "OTHER."]:
+        expected = load_from_environ(environ, prefix=prefix, on_failure=expected_on_failure)
+        assert result[prefix] == expected
+    assert on_failure.call_args_list == expected_on_failure.call_args_list
@@ -1,4 +1,6 @@
+import os
 import tempfile
+import time
 import tomllib
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -51,3 +53,128 @@ def test_load_from_file_error_custom_on_failure(base_path, ex):
     with patch("alltoml._file.open", side_effect=ex) as open_mock:
         assert load_from_file(base_path, on_failure=on_failure) == {}
     on_failure.assert_called_once_with(base_path / "config.toml")
+
+
+@pytest.mark.parametrize("content", [b"a = ", b"\xff = 1"])
+def test_load_from_file_invalid(base_path, content):
+    (base_path / "config.toml").write_bytes(content)
+    on_failure = MagicMock()
+    assert load_from_file(base_path, on_failure=on_failure) == {}
+    on_failure.assert_called_once_with(base_path / "config.toml")
+
+
+@pytest.fixture
+def cache_path():
+    with tempfile.TemporaryDirectory() as dir:
+        yield Path(dir) / "cache"
+
+
+def test_load_from_file_cache_miss_then_hit(base_path, cache_path):
+    (base_path / "config.toml").write_text("a = 1\n[b]\nc = 1979-05-27")
+    expected = tomllib.loads((base_path / "config.toml").read_text())
+
+    with patch.object(tomllib, "loads", wraps=tomllib.loads) as tomllib_loads_mock:
+        assert load_from_file(base_path, cache_path=cache_path) == expected
+        assert tomllib_loads_mock.call_count == 1
+        assert len(list(cache_path.iterdir())) == 1
+        assert load_from_file(base_path, cache_path=cache_path) == expected
+        assert tomllib_loads_mock.call_count == 1
+
+
+def test_load_from_file_cache_returns_copy(base_path, cache_path):
+    (base_path / "config.toml").write_text("a = {b = 1}")
+    load_from_file(base_path, cache_path=cache_path)["a"]["b"] = 2
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": {"b": 1}}
+    load_from_file(base_path, cache_path=cache_path)["a"]["b"] = 2
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": {"b": 1}}
+
+
+def test_load_from_file_cache_changed(base_path, cache_path):
+    file_path = base_path / "config.toml"
+    file_path.write_text("a = 1")
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": 1}
+    # same size and modification time, different content
+    stat = file_path.stat()
+    file_path.write_text("a = 2")
+    os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": 2}
+    assert len(list(cache_path.iterdir())) == 1
+
+
+def test_load_from_file_cache_separate_files(base_path, cache_path):
+    (base_path / "a.toml").write_text("a = 1")
+    (base_path / "b.toml").write_text("b = 1")
+    assert load_from_file(base_path, name=Path("a.toml"), cache_path=cache_path) == {"a": 1}
+    assert load_from_file(base_path, name=Path("b.toml"), cache_path=cache_path) == {"b": 1}
+    assert load_from_file(base_path, name=Path("a.toml"), cache_path=cache_path) == {"a": 1}
+    assert len(list(cache_path.iterdir())) == 2
+
+
+@pytest.mark.parametrize("content", [b"a = ", b"\xff = 1"])
+def test_load_from_file_cache_invalid(base_path, cache_path, content):
+    (base_path / "config.toml").write_bytes(content)
+    on_failure = MagicMock()
+    assert load_from_file(base_path, cache_path=cache_path, on_failure=on_failure) == {}
+    on_failure.assert_called_once_with(base_path / "config.toml")
+    assert not cache_path.exists()
+
+
+def test_load_from_file_cache_missing(base_path, cache_path):
+    on_failure = MagicMock()
+    assert load_from_file(base_path, cache_path=cache_path, on_failure=on_failure) == {}
+    on_failure.assert_called_once_with(base_path / "config.toml")
+
+
+def test_load_from_file_cache_corrupt(base_path, cache_path):
+    (base_path / "config.toml").write_text("a = 1")
+    load_from_file(base_path, cache_path=cache_path)
+    for entry_path in cache_path.iterdir():
+        entry_path.write_bytes(b"garbage")
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": 1}
+    assert load_from_file(base_path, cache_path=cache_path) == {"a": 1}
+
+
+def test_load_from_file_cache_stale_not_unpickled(base_path, cache_path):
+    (base_path / "config.toml").write_text("a = 1")
+    load_from_file(base_path, cache_path=cache_path)
+    (base_path / "config.toml").write_text("a = 22")
+    with patch("pickle.load") as pickle_load_mock:
+        assert load_from_file(base_path, cache_path=cache_path) == {"a": 22}
+    pickle_load_mock.assert_not_called()
+
+
+def test_load_from_file_cache_replace_failure(base_path, cache_path):
+    (base_path / "config.toml").write_text("a = 1")
+    with patch("os.replace", side_effect=OSError):
+        assert load_from_file(base_path, cache_path=cache_path) == {"a": 1}
+    # the temporary file isn't left behind
+    assert list(cache_path.iterdir()) == []
+
+
+def test_load_from_file_cache_max_size(base_path, cache_path):
+    for i in range(5):
+        (base_path / f"{i}.toml").write_text(f"value = {i}")
+    load_from_file(base_path, name=Path("0.toml"), cache_path=cache_path)
+    entry_size = next(cache_path.iterdir()).stat().st_size
+
+    def _load(i):
+        # make sure each use gets a distinct modification time
+        time.sleep(0.01)
+        with patch.object(tomllib, "loads", wraps=tomllib.loads) as tomllib_loads_mock:
+            load_from_file(
+                base_path,
+                name=Path(f"{i}.toml"),
+                cache_path=cache_path,
+                cache_max_size=entry_size * 3,
+            )
+        return tomllib_loads_mock.call_count == 0
+
+    assert not _load(1)
+    assert not _load(2)
+    assert _load(0)
+    assert not _load(3)
+    assert len(list(cache_path.iterdir())) == 3
+    assert _load(0)
+    assert _load(2)
+    assert _load(3)
+    assert not _load(1)
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import alltoml
+
+# cumulative microseconds a cold "import alltoml" may take, this is far more than it should take to
+# leave plenty of room for slow CI machines, it is meant to catch something heavy being imported
+# eagerly again
+IMPORT_TIME_BUDGET = 100_000
+
+HEAVY_MODULES = [
+    "asyncio",
+    "deep_chainmap",
+    "hashlib",
+    "logging",
+    "pickle",
+    "platformdirs",
+    "tempfile",
+    "tomllib",
+]
+
+
+def _run(code):
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_import_time_budget():
+    result = _run("import alltoml")
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "alltoml":
+            assert int(cumulative) < IMPORT_TIME_BUDGET
+            break
+    else:
+        pytest.fail("alltoml not found in import time output")
+
+
+@pytest.mark.parametrize(
+    "code, expected_heavy_modules",
+    [
+        ("import alltoml", []),
+        ("import alltoml; alltoml.load_from_environ({'CONFIG.a': '1'})", []),
+        ("import alltoml; alltoml.load_from_argv(['--config.a', '1'])", []),
+        ("from alltoml import Settings", []),
+        ("import alltoml; alltoml.load_from_file", []),
+        ("import alltoml; alltoml.load_from_environ({'CONFIG.a': '[1]'})", ["tomllib"]),
+        ("import alltoml; alltoml.load", ["deep_chainmap", "logging", "platformdirs", "tempfile"]),
+    ],
+)
+def test_import_deferred(code, expected_heavy_modules):
+    result = _run(f"{code}; import sys, json; print(json.dumps(sorted(sys.modules)))")
+    modules = set(json.loads(result.stdout))
+    assert [m for m in HEAVY_MODULES if m in modules] == expected_heavy_modules
+
+
+@pytest.mark.parametrize("name", alltoml.__all__)
+def test_attribute(name):
+    assert name in dir(alltoml)
+    assert getattr(alltoml, name).__name__ == name
+
+
+def test_missing_attribute():
+    with pytest.raises(AttributeError):
+        alltoml.missing
@@ -0,0 +1,134 @@
+import asyncio
+import math
+import sys
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from pathlib import Path
+
+import pytest
+
+from alltoml import load_from_argv
+from alltoml import load_from_envfile
+from alltoml import load_from_environ
+from alltoml import load_from_file
+from alltoml import load_from_file_async
+from alltoml._intern import intern_settings
+
+
+def _make_key(name):
+    # a string built at runtime so that it isn't interned already
+    return "".join([name[:1], name[1:]])
+
+
+def test_intern_keys():
+    settings = {_make_key("host"): {_make_key("name"): 1}}
+    other = {_make_key("host"): {_make_key("name"): 2}}
+    assert settings == intern_settings(settings)
+    interned = intern_settings(settings)
+    other_interned = intern_settings(other)
+    ((key, table),) = interned.items()
+    ((other_key, other_table),) = other_interned.items()
+    assert key is other_key
+    assert next(iter(table)) is next(iter(other_table))
+
+
+def test_intern_values():
+    hostname = "host-" + "1" * 3
+    big = 10**20
+    settings = {
+        "a": _make_key(hostname),
+        "b": [_make_key(hostname), {"c": _make_key(hostname)}],
+        "d": big,
+        "e": int(str(big)),
+        "f": 1.5,
+        "g": float("1.5"),
+    }
+    interned = intern_settings(settings)
+    assert interned == settings
+    assert interned["a"] is interned["b"][0] is interned["b"][1]["c"]
+    assert interned["d"] is interned["e"]
+    assert interned["f"] is interned["g"]
+
+
+def test_intern_pool_shared():
+    pool = {}
+    first = intern_settings({"a": 10**20}, pool)
+    second = intern_settings({"a": int(str(10**20))}, pool)
+    assert first["a"] is second["a"]
+    assert intern_settings({"a": int(str(10**20))})["a"] is not first["a"]
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        [0.0, -0.0],
+        [1, True],
+        [0, False],
+        [1, 1.0],
+        [
+            datetime(2000, 1, 1, 12, tzinfo=timezone.utc),
+            datetime(2000, 1, 1, 13, tzinfo=timezone(timedelta(hours=1))),
+        ],
+    ],
+)
+def test_intern_equal_values_kept_distinct(values):
+    # values that are equal but not interchangeable aren't deduplicated
+    interned = intern_settings({str(i): value for i, value in enumerate(values)})
+    for i, value in enumerate(values):
+        assert type(interned[str(i)]) is type(value)
+        assert interned[str(i)] == value
+        assert str(interned[str(i)]) == str(value)
+
+
+def test_intern_nan():
+    interned = intern_settings({"a": float("nan"), "b": float("nan")})
+    assert math.isnan(interned["a"]) and math.isnan(interned["b"])
+
+
+def test_intern_copies():
+    settings = {"a": {"b": [1]}}
+    interned = intern_settings(settings)
+    assert interned["a"] is not settings["a"]
+    assert interned["a"]["b"] is not settings["a"]["b"]
+
+
+def _assert_interned(settings):
+    (key,) = settings
+    assert key is sys.intern(_make_key("hostname"))
+    assert settings[key][0] is settings[key][1]
+
+
+def test_load_from_environ_intern():
+    environ = {"CONFIG.hostname": '["a.example", "a.example"]'}
+    _assert_interned(load_from_environ(environ, intern=True))
+
+
+def test_load_from_argv_intern():
+    _assert_interned(
+        load_from_argv(["--config.hostname", '["a.example", "a.example"]'], intern=True)
+    )
+
+
+def test_load_from_envfile_intern(tmp_path):
+    (tmp_path / "env").write_text('CONFIG.hostname=["a.example", "a.example"]\n')
+    _assert_interned(load_from_envfile(tmp_path / "env", intern=True))
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_load_from_file_intern(tmp_path, cache):
+    (tmp_path / "config.toml").write_text('hostname = ["a.example", "a.example"]')
+    cache_path = tmp_path / "cache" if cache else None
+    for _ in range(2):
+        _assert_interned(load_from_file(tmp_path, cache_path=cache_path, intern=True))
+
+
+def test_load_from_file_intern_failure(tmp_path):
+    failures = []
+    assert load_from_file(tmp_path, on_failure=failures.append, intern=True) == {}
+    assert failures == [tmp_path / "config.toml"]
+
+
+def test_load_from_file_async_intern(tmp_path):
+    (tmp_path / "config.toml").write_text('hostname = ["a.example", "a.example"]')
+    _assert_interned(asyncio.run(load_from_file_async(Path(tmp_path), intern=True)))
@@ -0,0 +1,105 @@
+from threading import Barrier
+from threading import Thread
+from unittest.mock import MagicMock
+
+import pytest
+from deep_chainmap import DeepChainMap
+
+from alltoml import Settings
+from alltoml._lazy import LazyChainMap
+from alltoml._lazy import LazyLayer
+
+
+def test_lazy_layer():
+    load = MagicMock(return_value={"a": 1})
+    layer = LazyLayer(load)
+    assert not layer.is_loaded
+    load.assert_not_called()
+    assert layer.get() == {"a": 1}
+    assert layer.is_loaded
+    assert layer.get() is load.return_value
+    load.assert_called_once_with()
+
+
+def test_lazy_layer_threads():
+    barrier = Barrier(8)
+    load = MagicMock(return_value={})
+    layer = LazyLayer(load)
+
+    def get():
+        barrier.wait()
+        layer.get()
+
+    threads = [Thread(target=get) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    load.assert_called_once_with()
+
+
+def _make_lazy_chain_map(*mappings):
+    loads = [MagicMock(return_value=mapping) for mapping in mappings]
+    return LazyChainMap([LazyLayer(load) for load in loads]), loads
+
+
+def test_lazy_chain_map_stops_at_first_layer():
+    settings, loads = _make_lazy_chain_map({"a": 1}, {"a": 2, "b": 2}, {"c": 3})
+    assert settings["a"] == 1
+    assert "a" in settings
+    loads[0].assert_called_once_with()
+    loads[1].assert_not_called()
+    loads[2].assert_not_called()
+
+    assert settings["b"] == 2
+    loads[1].assert_called_once_with()
+    loads[2].assert_not_called()
+
+    assert settings["c"] == 3
+    loads[2].assert_called_once_with()
+
+
+def test_lazy_chain_map_missing():
+    settings, loads = _make_lazy_chain_map({"a": 1}, {"b": 2})
+    with pytest.raises(KeyError):
+        settings["c"]
+    assert "c" not in settings
+    assert settings.get("c") is None
+    for load in loads:
+        load.assert_called_once_with()
+
+
+def test_lazy_chain_map_table():
+    settings, loads = _make_lazy_chain_map({"a": {"b": 1}}, {"a": 1}, {}, {"a": {"b": 2, "c": 2}})
+    table = settings["a"]
+    assert isinstance(table, DeepChainMap)
+    assert dict(table) == {"b": 1, "c": 2}
+    for load in loads:
+        load.assert_called_once_with()
+
+
+def test_lazy_chain_map_table_cached():
+    settings, loads = _make_lazy_chain_map({"a": {"b": {"c": 1}}}, {"a": {"d": 1}}, {"e": 1})
+    table = settings["a"]
+    assert settings["a"] is table
+    assert settings["a"]["b"] is table["b"]
+    assert settings["e"] == 1
+    for load in loads:
+        load.assert_called_once_with()
+
+
+def test_lazy_chain_map_read_only_table():
+    settings, _ = _make_lazy_chain_map({"a": {"b": 1}}, {"a": Settings({"b": 2, "c": 2})})
+    table = settings["a"]
+    assert dict(table) == {"b": 1, "c": 2}
+    table["c"] = 3
+    assert table["c"] == 3
+
+
+def test_lazy_chain_map_iter():
+    layers = [{"a": 1}, {"b": 2, "a": 2}, {"c": {"d": 3}}]
+    settings, loads = _make_lazy_chain_map(*layers)
+    assert list(settings) == list(DeepChainMap(*layers))
+    assert len(settings) == 3
+    assert settings.maps == layers
+    assert dict(settings) == {"a": 1, "b": 2, "c": {"d": 3}}
@@ -2,19 +2,33 @@ import logging
 import os
 import sys
 from pathlib import Path
+from threading import Thread
+from unittest.mock import ANY
 from unittest.mock import MagicMock
 from unittest.mock import call
 from unittest.mock import patch
 
 import pytest
 from deep_chainmap import DeepChainMap
+from platformdirs import user_cache_dir
 from platformdirs import user_data_dir
 
+from alltoml import LayerStats
+from alltoml import LoadStats
+from alltoml import Settings
+from alltoml import compile_snapshot
+from alltoml import invalidate_load_cache
 from alltoml import load
+from alltoml import load_from_envfile
+from alltoml import load_from_environ
+from alltoml import load_from_environ_prefixes
+from alltoml import load_from_file
+from alltoml import load_many
 from alltoml._load import _argv_on_extra
 from alltoml._load import _argv_on_failure
 from alltoml._load import _environ_on_failure
 from alltoml._load import _file_on_failure
+from alltoml._load import _snapshot_on_failure
 
 
 def test_environ_on_failure(caplog):
@@ -25,6 +39,14 @@ def test_environ_on_failure(caplog):
     ]
 
 
+def test_snapshot_on_failure(caplog):
+    caplog.set_level(logging.INFO)
+    _snapshot_on_failure(Path("a/b"))
+    assert caplog.record_tuples == [
+        ("alltoml", logging.WARNING, "ignoring invalid snapshot: %r" % (str(Path("a/b")),))
+    ]
+
+
 def test_file_on_failure(caplog):
     caplog.set_level(logging.INFO)
     _file_on_failure(Path("a/b"))
@@ -133,8 +155,9 @@ def test_load(
             call(
                 Path(user_data_dir(application_name, application_author)),
                 on_failure=_file_on_failure,
+                cache_path=None,
             ),
-            call(Path("."), on_failure=_file_on_failure),
+            call(Path("."), on_failure=_file_on_failure, cache_path=None),
         ]
         + (
             [
@@ -142,6 +165,7 @@ def test_load(
                     Path(argv_config).parent,
                     name=Path(Path(argv_config).name),
                     on_failure=_file_on_failure,
+                    cache_path=None,
                 )
             ]
             if argv_config
@@ -151,7 +175,7 @@ def test_load(
     )
 
     load_from_argv_mock.assert_called_once_with(
-        [], on_extra=_argv_on_extra, on_failure=_argv_on_failure
+        [], on_extra=_argv_on_extra, on_failure=_argv_on_failure, response_files=False
     )
 
     assert isinstance(settings, DeepChainMap)
@@ -175,3 +199,598 @@ def test_load_invalid_config_argv(caplog):
     assert caplog.record_tuples == [
         ("alltoml", logging.ERROR, "argument %r has no value" % ("--config",))
     ]
+
+
+def test_load_materialize():
+    with (
+        patch("alltoml._load.load_from_environ", return_value={"a": {"environ": 1}, "b": 1}),
+        patch("alltoml._load.load_from_file", return_value={}),
+        patch("alltoml._load.load_from_argv", return_value={"a": {"argv": 1}}),
+        patch.object(sys, "argv", ["test"]),
+        patch.object(os, "environ", {}),
+    ):
+        settings = load("", "", default_settings={"b": 0, "c": 0}, materialize=True)
+    assert isinstance(settings, Settings)
+    assert settings == {"a": {"argv": 1, "environ": 1}, "b": 1, "c": 0}
+    assert settings._path_index is not None
+    assert settings.get_path("a.environ") == 1
+
+
+@pytest.mark.parametrize("materialize", [False, True])
+def test_load_frozen(materialize):
+    with (
+        patch("alltoml._load.load_from_environ", return_value={"a": {"environ": [1]}, "b": 1}),
+        patch("alltoml._load.load_from_file", return_value={}),
+        patch("alltoml._load.load_from_argv", return_value={"a": {"argv": 1}}),
+        patch.object(sys, "argv", ["test"]),
+        patch.object(os, "environ", {}),
+    ):
+        settings = load(
+            "", "", default_settings={"c": [{"d": 1}]}, materialize=materialize, frozen=True
+        )
+    assert isinstance(settings, Settings)
+    assert (settings._path_index is not None) is materialize
+    assert settings == {"a": {"argv": 1, "environ": (1,)}, "b": 1, "c": ({"d": 1},)}
+    assert hash(settings) == hash(Settings(settings))
+
+
+@pytest.fixture
+def app_argv():
+    return ["test", "--config.argv", "1"]
+
+
+@pytest.fixture
+def app_environ():
+    return {"A_CONFIG.environ": "1", "OTHER": "1"}
+
+
+@pytest.fixture
+def cache_environment(app_environment):
+    cwd_path, user_data_path = app_environment
+    with patch("alltoml._load.load_from_file", wraps=load_from_file) as load_from_file_mock:
+        yield cwd_path, user_data_path, load_from_file_mock
+
+
+def test_load_cache_hit(cache_environment):
+    cwd_path, user_data_path, load_from_file_mock = cache_environment
+    (cwd_path / "config.toml").write_text("cwd = 1")
+    (user_data_path / "config.toml").write_text("user = 1")
+
+    settings = load("a", "b", cache=True)
+    assert load_from_file_mock.call_count == 2
+    assert dict(settings) == {"argv": 1, "cwd": 1, "user": 1, "environ": 1}
+
+    with (
+        patch("alltoml._load.user_data_dir") as user_data_dir_mock,
+        patch("alltoml._load.load_from_environ") as load_from_environ_mock,
+        patch("alltoml._load.load_from_argv") as load_from_argv_mock,
+    ):
+        settings = load("a", "b", cache=True, default_settings={"default": 1})
+    assert load_from_file_mock.call_count == 2
+    user_data_dir_mock.assert_not_called()
+    load_from_environ_mock.assert_not_called()
+    load_from_argv_mock.assert_not_called()
+    assert dict(settings) == {"argv": 1, "cwd": 1, "user": 1, "environ": 1, "default": 1}
+
+    settings = load("a", "b", cache=True, materialize=True)
+    assert load_from_file_mock.call_count == 2
+    assert isinstance(settings, Settings)
+    assert settings == {"argv": 1, "cwd": 1, "user": 1, "environ": 1}
+
+
+def test_load_cache_results_not_shared(cache_environment):
+    cwd_path, _, _ = cache_environment
+    (cwd_path / "config.toml").write_text("l = [1, 2]\n[db]\nhost = 'a'")
+
+    settings = load("a", "b", cache=True)
+    settings["db"]["host"] = "mutated"
+    settings["db"]["new"] = 1
+    settings["l"].append(3)
+
+    settings = load("a", "b", cache=True)
+    assert settings["db"] == {"host": "a"}
+    assert settings["l"] == [1, 2]
+
+    settings = load("a", "b", cache=True, materialize=True)
+    settings["l"].append(3)
+    assert load("a", "b", cache=True, materialize=True)["l"] == [1, 2]
+
+
+def test_load_cache_disabled(cache_environment):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    load("a", "b")
+    assert load_from_file_mock.call_count == 4
+
+
+@pytest.mark.parametrize("application", [("b", "b"), ("a", "a")])
+def test_load_cache_miss_application(cache_environment, application):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    load(*application, cache=True)
+    assert load_from_file_mock.call_count == 4
+
+
+def test_load_cache_miss_environ(cache_environment):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    os.environ["OTHER"] = "2"
+    load("a", "b", cache=True)
+    assert load_from_file_mock.call_count == 2
+    os.environ["A_CONFIG.environ"] = "2"
+    assert load("a", "b", cache=True)["environ"] == 2
+    assert load_from_file_mock.call_count == 4
+
+
+def test_load_cache_miss_argv(cache_environment):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    sys.argv.append("--config.other")
+    sys.argv.append("2")
+    assert load("a", "b", cache=True)["other"] == 2
+    assert load_from_file_mock.call_count == 4
+
+
+@pytest.mark.parametrize("file", ["cwd", "user"])
+def test_load_cache_miss_file(cache_environment, file):
+    cwd_path, user_data_path, load_from_file_mock = cache_environment
+    file_path = (cwd_path if file == "cwd" else user_data_path) / "config.toml"
+    load("a", "b", cache=True)
+    file_path.write_text("x = 1")
+    assert load("a", "b", cache=True)["x"] == 1
+    assert load_from_file_mock.call_count == 4
+    file_path.write_text("x = 22")
+    assert load("a", "b", cache=True)["x"] == 22
+    assert load_from_file_mock.call_count == 6
+
+
+def test_load_cache_miss_explicit_file(cache_environment):
+    cwd_path, _, load_from_file_mock = cache_environment
+    file_path = cwd_path / "explicit.toml"
+    os.environ["A_CONFIG"] = str(file_path)
+    load("a", "b", cache=True)
+    assert load_from_file_mock.call_count == 3
+    file_path.write_text("x = 1")
+    assert load("a", "b", cache=True)["x"] == 1
+    assert load_from_file_mock.call_count == 6
+    load("a", "b", cache=True)
+    assert load_from_file_mock.call_count == 6
+
+
+def test_load_cache_miss_response_file(cache_environment):
+    cwd_path, _, load_from_file_mock = cache_environment
+    response_file_path = cwd_path / "args.txt"
+    response_file_path.write_text("--config.response\n1\n")
+    sys.argv.append("@args.txt")
+    assert load("a", "b", cache=True, response_files=True)["response"] == 1
+    response_file_path.write_text("--config.response\n22\n")
+    assert load("a", "b", cache=True, response_files=True)["response"] == 22
+    assert load_from_file_mock.call_count == 4
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"cache": True}, {"lazy": True}, {"materialize": True}, {"stats": MagicMock()}]
+)
+def test_load_response_files_disabled(cache_environment, kwargs):
+    cwd_path, _, _ = cache_environment
+    (cwd_path / "args.txt").write_text("--config.response\n1\n")
+    sys.argv.append("@args.txt")
+    with patch("alltoml._load._argv_on_extra") as on_extra_mock:
+        settings = load("a", "b", **kwargs)
+    # the @path argument is an unexpected argument, the file isn't read
+    on_extra_mock.assert_called_once_with("@args.txt")
+    assert "response" not in settings
+
+
+def test_load_many_response_files(cache_environment):
+    cwd_path, _, _ = cache_environment
+    (cwd_path / "args.txt").write_text("--config.response\n1\n")
+    sys.argv.append("@args.txt")
+    result = load_many([("a", "b")], response_files=True)
+    assert result[("a", "b")]["response"] == 1
+
+
+def test_invalidate_load_cache(cache_environment):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    invalidate_load_cache()
+    load("a", "b", cache=True)
+    assert load_from_file_mock.call_count == 4
+
+
+def test_load_file_cache():
+    with (
+        patch("alltoml._load.load_from_environ", return_value={}),
+        patch("alltoml._load.load_from_file", return_value={}) as load_from_file_mock,
+        patch("alltoml._load.load_from_argv", return_value={}),
+        patch.object(sys, "argv", ["test", "--config", "a/b.toml"]),
+        patch.object(os, "environ", {}),
+    ):
+        load("a", "b", file_cache=True)
+    cache_path = Path(user_cache_dir("a", "b")) / "files"
+    load_from_file_mock.assert_has_calls(
+        [
+            call(
+                Path("a"), name=Path("b.toml"), on_failure=_file_on_failure, cache_path=cache_path
+            ),
+            call(
+                Path(user_data_dir("a", "b")), on_failure=_file_on_failure, cache_path=cache_path
+            ),
+            call(Path("."), on_failure=_file_on_failure, cache_path=cache_path),
+        ],
+        any_order=True,
+    )
+
+
+def test_load_lazy():
+    with (
+        patch("alltoml._load.load_from_environ", return_value={"b": 1}) as load_from_environ_mock,
+        patch("alltoml._load.load_from_file", return_value={}) as load_from_file_mock,
+        patch("alltoml._load.load_from_argv", return_value={"a": 1}) as load_from_argv_mock,
+        patch("alltoml._load.user_data_dir", return_value="user") as user_data_dir_mock,
+        patch.object(sys, "argv", ["test"]),
+        patch.object(os, "environ", {}),
+    ):
+        settings = load("", "", lazy=True, default_settings={"c": 1})
+        load_from_argv_mock.assert_called_once_with(
+            [], on_extra=_argv_on_extra, on_failure=_argv_on_failure, response_files=False
+        )
+
+        assert settings["a"] == 1
+        load_from_file_mock.assert_not_called()
+        user_data_dir_mock.assert_not_called()
+        load_from_environ_mock.assert_not_called()
+
+        assert settings["b"] == 1
+        assert load_from_file_mock.call_count == 2
+        user_data_dir_mock.assert_called_once_with("", "")
+        load_from_environ_mock.assert_called_once_with(prefix="CONFIG.", on_failure=ANY)
+
+        assert settings["c"] == 1
+        assert dict(settings) == {"a": 1, "b": 1, "c": 1}
+        assert load_from_file_mock.call_count == 2
+        load_from_argv_mock.assert_called_once()
+        load_from_environ_mock.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"materialize": True},
+        {"cache": True},
+        {"stats": lambda stats: None},
+        {"frozen": True},
+        {"snapshot": Path("snapshot")},
+    ],
+)
+def test_load_lazy_invalid(kwargs):
+    with pytest.raises(ValueError):
+        load("", "", lazy=True, **kwargs)
+
+
+def test_load_stats(cache_environment):
+    cwd_path, user_data_path, _ = cache_environment
+    (cwd_path / "config.toml").write_text("cwd = 1")
+    (user_data_path / "config.toml").write_text("user = [")
+    os.environ["A_CONFIG.invalid"] = "{"
+    os.environ["A_CONFIG.array"] = "[1, 2]"
+    sys.argv.append("--config.missing")
+
+    stats = []
+    settings = load("a", "b", stats=stats.append)
+    assert dict(settings) == {"argv": 1, "cwd": 1, "environ": 1, "array": [1, 2]}
+
+    (load_stats,) = stats
+    assert isinstance(load_stats, LoadStats)
+    assert load_stats.seconds >= sum(layer.seconds for layer in load_stats.layers)
+    # the two environ values are parsed together, then separately to find the invalid one
+    assert load_stats.toml_parses == 3
+    assert [
+        (layer.name, layer.bytes_read, layer.entries_parsed, layer.entries_failed)
+        for layer in load_stats.layers
+    ] == [
+        ("file", None, 0, 0),
+        ("user_file", 8, 0, 1),
+        ("cwd_file", 7, 1, 0),
+        ("environ", None, 2, 1),
+        ("argv", None, 1, 1),
+    ]
+    assert all(isinstance(layer, LayerStats) for layer in load_stats.layers)
+
+
+def test_load_stats_response_file(cache_environment, tmp_path):
+    response_file_path = tmp_path / "args.txt"
+    response_file_path.write_text("--config.a\n1\n--config.b\n{\n")
+    sys.argv.extend([f"@{response_file_path}", f"@{tmp_path / 'missing.txt'}"])
+    stats = []
+    with patch("alltoml._argv.open", create=True, wraps=open) as open_mock:
+        load("a", "b", stats=stats.append, response_files=True)
+    (layer,) = (layer for layer in stats[0].layers if layer.name == "argv")
+    # --config.argv, --config.a and --config.b, and the missing response file
+    assert (layer.entries_parsed, layer.entries_failed) == (2, 2)
+    # the entries are counted as they are loaded, the response files aren't read again
+    assert open_mock.call_count == 2
+
+
+def test_load_stats_toml_parses_other_thread(cache_environment):
+    os.environ["A_CONFIG.array"] = "[1, 2]"
+
+    def _load_from_environ(*args, **kwargs):
+        # another thread parses while the environ is being loaded
+        thread = Thread(target=load_from_environ, args=({"CONFIG.a": "[1]"},))
+        thread.start()
+        thread.join()
+        return load_from_environ(*args, **kwargs)
+
+    stats = []
+    with patch("alltoml._load.load_from_environ", side_effect=_load_from_environ):
+        load("a", "b", stats=stats.append)
+    assert stats[0].toml_parses == 1
+
+
+def test_load_stats_cache_hit(cache_environment):
+    stats = []
+    load("a", "b", cache=True, stats=stats.append)
+    load("a", "b", cache=True, stats=stats.append)
+    assert len(stats[0].layers) == 5
+    assert stats[1].layers == ()
+    assert stats[1].toml_parses == 0
+
+
+@pytest.mark.parametrize("materialize", [False, True])
+@pytest.mark.parametrize("frozen", [False, True])
+def test_load_many(cache_environment, materialize, frozen):
+    cwd_path, user_data_path, load_from_file_mock = cache_environment
+    (cwd_path / "config.toml").write_text("cwd = 1\nx = 1")
+    (user_data_path / "config.toml").write_text("user = 1\nx = 2")
+    (cwd_path / "shared.toml").write_text("shared = 1")
+    os.environ.update(
+        {"A_CONFIG": "shared.toml", "B_CONFIG": "shared.toml", "B_CONFIG.environ": "2"}
+    )
+    applications = [("a", "x"), ("b", "x"), ("c", "y"), ("a", "x")]
+    kwargs = {"default_settings": {"default": 1}, "materialize": materialize, "frozen": frozen}
+
+    with patch(
+        "alltoml._load.load_from_environ_prefixes", wraps=load_from_environ_prefixes
+    ) as load_from_environ_prefixes_mock:
+        result = load_many(applications, **kwargs)
+    load_from_environ_prefixes_mock.assert_called_once()
+    # cwd, user and shared.toml, each once
+    assert load_from_file_mock.call_count == 3
+    assert list(result) == [("a", "x"), ("b", "x"), ("c", "y")]
+
+    for application, settings in result.items():
+        expected = load(*application, **kwargs)
+        assert type(settings) is type(expected)
+        assert dict(settings) == dict(expected)
+    assert dict(result[("b", "x")]) == {
+        "argv": 1,
+        "shared": 1,
+        "cwd": 1,
+        "x": 1,
+        "user": 1,
+        "environ": 2,
+        "default": 1,
+    }
+
+
+@pytest.mark.parametrize("materialize", [False, True])
+def test_load_many_isolated(cache_environment, materialize):
+    cwd_path, _, _ = cache_environment
+    (cwd_path / "config.toml").write_text("a = [1]\n[table]\nb = 1")
+    result = load_many([("a", "x"), ("b", "x")], materialize=materialize)
+    settings = result[("a", "x")]
+    other_settings = result[("b", "x")]
+    settings["a"].append(2)
+    if not materialize:
+        settings["argv"] = 2
+        settings["table"]["b"] = 2
+        settings["new"] = 1
+    assert other_settings["a"] == [1]
+    assert other_settings["argv"] == 1
+    assert other_settings["table"]["b"] == 1
+    assert "new" not in other_settings
+
+
+def test_load_many_empty():
+    with patch("alltoml._load.load_from_file") as load_from_file_mock:
+        assert load_many([]) == {}
+    load_from_file_mock.assert_not_called()
+
+
+def test_load_envfile(cache_environment, caplog):
+    cwd_path, _, _ = cache_environment
+    envfile_path = cwd_path / "env"
+    envfile_path.write_text(
+        "A_CONFIG.environ=2\nA_CONFIG.envfile=1\nA_CONFIG.x=1\nA_CONFIG.bad=[\n"
+    )
+    settings = load("a", "b", envfile=envfile_path, default_settings={"x": 2, "default": 1})
+    assert dict(settings) == {"argv": 1, "environ": 1, "envfile": 1, "x": 1, "default": 1}
+    assert "ignoring invalid env file entry: 'A_CONFIG.bad'" in caplog.messages
+    assert "A_CONFIG.envfile" not in os.environ
+
+
+def test_load_envfile_missing(cache_environment, caplog):
+    cwd_path, _, _ = cache_environment
+    settings = load("a", "b", envfile=cwd_path / "env")
+    assert dict(settings) == {"argv": 1, "environ": 1}
+    assert f"ignoring invalid env file: {str(cwd_path / 'env')!r}" in caplog.messages
+
+
+def test_load_envfile_lazy(cache_environment):
+    cwd_path, _, _ = cache_environment
+    envfile_path = cwd_path / "env"
+    envfile_path.write_text("A_CONFIG.envfile=1\n")
+    with patch("alltoml._load.load_from_envfile", wraps=load_from_envfile) as envfile_mock:
+        settings = load("a", "b", envfile=envfile_path, lazy=True)
+        assert settings["argv"] == 1
+        envfile_mock.assert_not_called()
+        assert settings["envfile"] == 1
+        envfile_mock.assert_called_once()
+
+
+def test_load_envfile_cache_miss(cache_environment):
+    cwd_path, _, load_from_file_mock = cache_environment
+    envfile_path = cwd_path / "env"
+    envfile_path.write_text("A_CONFIG.envfile=1\n")
+    assert load("a", "b", cache=True, envfile=envfile_path)["envfile"] == 1
+    assert load("a", "b", cache=True, envfile=envfile_path)["envfile"] == 1
+    assert load_from_file_mock.call_count == 2
+    envfile_path.write_text("A_CONFIG.envfile=22\n")
+    assert load("a", "b", cache=True, envfile=envfile_path)["envfile"] == 22
+    assert "envfile" not in load("a", "b", cache=True)
+
+
+def test_load_envfile_stats(cache_environment):
+    cwd_path, _, _ = cache_environment
+    envfile_path = cwd_path / "env"
+    envfile_path.write_text("A_CONFIG.a=1\nA_CONFIG.b=[\nA_CONFIG.c\nOTHER=1\n")
+    stats = []
+    with patch("alltoml._envfile.open", create=True, wraps=open) as open_mock:
+        load("a", "b", envfile=envfile_path, stats=stats.append)
+    open_mock.assert_called_once()
+    layer = stats[0].layers[-1]
+    assert (layer.name, layer.bytes_read, layer.entries_parsed, layer.entries_failed) == (
+        "envfile",
+        envfile_path.stat().st_size,
+        1,
+        2,
+    )
+
+
+@pytest.fixture
+def snapshot_environment(cache_environment):
+    cwd_path, user_data_path, load_from_file_mock = cache_environment
+    (cwd_path / "config.toml").write_text("cwd = 1\nx = 1")
+    (user_data_path / "config.toml").write_text("user = 1\nx = 2")
+    snapshot_path = cwd_path / "snapshot"
+    with patch("alltoml._compile.user_data_dir", return_value=str(user_data_path)):
+        compile_snapshot("a", "b", snapshot_path)
+    yield cwd_path, user_data_path, load_from_file_mock, snapshot_path
+
+
+@pytest.mark.parametrize("materialize", [False, True])
+def test_load_snapshot(snapshot_environment, materialize):
+    _, _, load_from_file_mock, snapshot_path = snapshot_environment
+    settings = load("a", "b", snapshot=snapshot_path, materialize=materialize)
+    load_from_file_mock.assert_not_called()
+    assert dict(settings) == {"argv": 1, "environ": 1, "cwd": 1, "user": 1, "x": 1}
+
+
+def test_load_snapshot_explicit_file(snapshot_environment):
+    cwd_path, user_data_path, load_from_file_mock, snapshot_path = snapshot_environment
+    (cwd_path / "explicit.toml").write_text("explicit = 1\nx = 0")
+    with patch("alltoml._compile.user_data_dir", return_value=str(user_data_path)):
+        compile_snapshot("a", "b", snapshot_path, file_path=Path("explicit.toml"))
+    os.environ["A_CONFIG"] = "explicit.toml"
+    settings = load("a", "b", snapshot=snapshot_path)
+    load_from_file_mock.assert_not_called()
+    assert dict(settings) == {"argv": 1, "environ": 1, "cwd": 1, "user": 1, "x": 0, "explicit": 1}
+
+    # a snapshot compiled with a different explicit file is stale
+    del os.environ["A_CONFIG"]
+    settings = load("a", "b", snapshot=snapshot_path)
+    assert load_from_file_mock.call_count == 2
+    assert "explicit" not in settings
+
+
+@pytest.mark.parametrize("source", ["cwd", "user"])
+def test_load_snapshot_stale(snapshot_environment, caplog, source):
+    cwd_path, user_data_path, load_from_file_mock, snapshot_path = snapshot_environment
+    source_path = {"cwd": cwd_path, "user": user_data_path}[source] / "config.toml"
+    source_path.write_text(f"{source} = 22")
+    settings = load("a", "b", snapshot=snapshot_path)
+    assert load_from_file_mock.call_count == 2
+    assert settings[source] == 22
+    assert f"ignoring stale snapshot: {str(snapshot_path)!r}" in caplog.messages
+
+
+def test_load_snapshot_stale_missing(snapshot_environment, caplog):
+    cwd_path, _, load_from_file_mock, snapshot_path = snapshot_environment
+    (cwd_path / "config.toml").unlink()
+    settings = load("a", "b", snapshot=snapshot_path)
+    assert load_from_file_mock.call_count == 2
+    assert "cwd" not in settings
+    assert f"ignoring stale snapshot: {str(snapshot_path)!r}" in caplog.messages
+
+
+def test_load_snapshot_touched(snapshot_environment, caplog):
+    # a source whose modification time changed but whose content didn't is still fresh
+    cwd_path, _, load_from_file_mock, snapshot_path = snapshot_environment
+    source_path = cwd_path / "config.toml"
+    stat = source_path.stat()
+    os.utime(source_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    settings = load("a", "b", snapshot=snapshot_path)
+    load_from_file_mock.assert_not_called()
+    assert settings["cwd"] == 1
+    assert not caplog.messages
+
+
+def test_load_snapshot_missing(cache_environment, caplog):
+    cwd_path, _, load_from_file_mock = cache_environment
+    settings = load("a", "b", snapshot=cwd_path / "snapshot")
+    assert load_from_file_mock.call_count == 2
+    assert dict(settings) == {"argv": 1, "environ": 1}
+    assert not any(" snapshot: " in message for message in caplog.messages)
+
+
+@pytest.mark.parametrize("content", [b"", b"not a snapshot" * 10])
+def test_load_snapshot_invalid(cache_environment, caplog, content):
+    cwd_path, _, load_from_file_mock = cache_environment
+    snapshot_path = cwd_path / "snapshot"
+    snapshot_path.write_bytes(content)
+    settings = load("a", "b", snapshot=snapshot_path)
+    assert load_from_file_mock.call_count == 2
+    assert dict(settings) == {"argv": 1, "environ": 1}
+    assert f"ignoring invalid snapshot: {str(snapshot_path)!r}" in caplog.messages
+
+
+def test_load_snapshot_cache(snapshot_environment):
+    cwd_path, user_data_path, load_from_file_mock, snapshot_path = snapshot_environment
+    with patch("alltoml._compile.read_compiled_snapshot") as read_mock:
+        read_mock.return_value = ({}, {"cwd": 2}, {})
+        assert load("a", "b", snapshot=snapshot_path, cache=True)["cwd"] == 2
+        assert load("a", "b", snapshot=snapshot_path, cache=True)["cwd"] == 2
+        read_mock.assert_called_once()
+        # the snapshot is part of the fingerprint
+        assert load("a", "b", cache=True)["cwd"] == 1
+    load_from_file_mock.assert_called()
+
+
+def test_load_snapshot_stats(snapshot_environment):
+    _, _, _, snapshot_path = snapshot_environment
+    stats = []
+    load("a", "b", snapshot=snapshot_path, stats=stats.append)
+    assert [
+        (layer.name, layer.bytes_read, layer.entries_parsed, layer.entries_failed)
+        for layer in stats[0].layers
+    ] == [
+        ("snapshot", snapshot_path.stat().st_size, 1, 0),
+        ("environ", None, 1, 0),
+        ("argv", None, 1, 0),
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"materialize": True}, {"frozen": True}, {"lazy": True}, {"cache": True}]
+)
+def test_load_intern(cache_environment, kwargs):
+    cwd_path, user_data_path, _ = cache_environment
+    (cwd_path / "config.toml").write_text('[cwd]\nhost = "a.example"')
+    (user_data_path / "config.toml").write_text('[user]\nhost = "a.example"\nport = 12345678')
+    os.environ["A_CONFIG.environ"] = '{ host = "a.example", port = 12345678 }'
+    settings = load("a", "b", intern=True, **kwargs)
+    # equal values are shared between the layers
+    assert settings["cwd"]["host"] is settings["user"]["host"] is settings["environ"]["host"]
+    assert settings["user"]["port"] is settings["environ"]["port"]
+    (cwd_key,) = settings["cwd"]
+    assert cwd_key is sys.intern("".join(["h", "ost"]))
+
+
+def test_load_intern_cache_miss(cache_environment):
+    _, _, load_from_file_mock = cache_environment
+    load("a", "b", cache=True)
+    load("a", "b", cache=True, intern=True)
+    assert load_from_file_mock.call_count == 4
+    load("a", "b", cache=True, intern=True)
+    assert load_from_file_mock.call_count == 4
@@ -0,0 +1,77 @@
+import sys
+
+from deep_chainmap import DeepChainMap
+
+from alltoml import MemoryReport
+from alltoml import MemoryUsage
+from alltoml import Settings
+from alltoml import freeze
+from alltoml import memory_report
+from alltoml._chainmap import CachedDeepChainMap
+from alltoml._intern import intern_settings
+from alltoml._lazy import LazyChainMap
+from alltoml._lazy import LazyLayer
+
+
+def _make_value(value):
+    # a string built at runtime so that it isn't shared already
+    return "".join([value[:1], value[1:]])
+
+
+def test_memory_report_dict():
+    value = _make_value("host-1")
+    settings = {"a": value, "b": [value, 1]}
+    report = memory_report(settings)
+    assert isinstance(report, MemoryReport)
+    assert isinstance(report.total, MemoryUsage)
+    # the dict, its 2 keys, the list, the shared string and 1
+    assert report.total.objects == 6
+    assert report.total.bytes == sum(
+        sys.getsizeof(o) for o in (settings, "a", "b", settings["b"], value, 1)
+    )
+    assert report.layers == ()
+
+
+def test_memory_report_empty():
+    assert memory_report({}) == MemoryReport(MemoryUsage(1, sys.getsizeof({})), ())
+
+
+def test_memory_report_deduplicated():
+    layer = {f"key{i}": _make_value("host-1") for i in range(100)}
+    report = memory_report(layer)
+    interned_report = memory_report(intern_settings(layer))
+    assert interned_report.total.objects == report.total.objects - 99
+    assert interned_report.total.bytes < report.total.bytes
+
+
+def test_memory_report_settings():
+    settings = Settings({"a": {"b": 1}})
+    report = memory_report(settings)
+    # the Settings, its data, its path cache, the key, the nested Settings and its data, path cache,
+    # key and value
+    assert report.total.objects == 9
+    settings._get_path_index()
+    indexed_report = memory_report(settings)
+    assert indexed_report.total.objects > report.total.objects
+    assert indexed_report.total.bytes > report.total.bytes
+
+
+def test_memory_report_layers():
+    shared = {"c": _make_value("host-1")}
+    first = {"a": 1, "shared": shared}
+    second = {"b": 2, "shared": shared}
+    for settings in (
+        DeepChainMap(first, second),
+        CachedDeepChainMap(first, second),
+        LazyChainMap([LazyLayer(lambda: first), LazyLayer(lambda: second)]),
+    ):
+        report = memory_report(settings)
+        assert report.layers == (memory_report(first).total, memory_report(second).total)
+        # the shared table, its key and value and the "shared" key are only counted once in the
+        # total
+        assert report.total.objects == sum(layer.objects for layer in report.layers) - 4
+
+
+def test_memory_report_frozen():
+    layer = {"a": [1, {"b": "c"}]}
+    assert memory_report(freeze(layer)).total.objects > memory_report(layer).total.objects
@@ -1,3 +1,4 @@
+import tomllib
 from datetime import date
 from datetime import datetime
 from datetime import time
@@ -8,9 +9,16 @@ from math import isnan
 from math import nan
 from unittest.mock import ANY
 from unittest.mock import MagicMock
+from unittest.mock import call
+from unittest.mock import patch
 
 import pytest
 
+from alltoml._parse import _convert_key
+from alltoml._parse import _convert_toml_key
+from alltoml._parse import _convert_toml_value
+from alltoml._parse import _convert_value
+from alltoml._parse import store_many_settings
 from alltoml._parse import store_settings
 
 
@@ -191,3 +199,267 @@ def test_store_settings_not_dict_overwrite():
     store_settings(settings, "a.b", "2", fail_mock)
     assert settings == {"a": 1}
     fail_mock.assert_called_once()
+
+
+KEY_CORPUS = [
+    "",
+    " ",
+    ".",
+    "a",
+    "A",
+    "0",
+    "1.5",
+    "-",
+    "_",
+    "a-b_c",
+    "true",
+    "inf",
+    "a.b",
+    "a.b.c",
+    "a..b",
+    ".a",
+    "a.",
+    "a b",
+    "a\tb",
+    "\ta\t",
+    "   a    .    b   ",
+    "a\t.\tb",
+    "a\n",
+    "\na",
+    "a # comment",
+    "#",
+    "# comment",
+    "a=",
+    "a = 0",
+    "''",
+    '""',
+    "'a'",
+    '"a"',
+    "'a'.'b'",
+    '"a"."b"',
+    "'a'.b.\"c\"",
+    "'a.b'",
+    '"a.b"',
+    "'a\"b'",
+    '"a\'b"',
+    "'a b'",
+    '"a b"',
+    "'a\tb'",
+    '"a\tb"',
+    "'a\x00b'",
+    '"a\x7fb"',
+    "'a\nb'",
+    "'\\'",
+    '"\\""',
+    '"a\\""."b"',
+    '"\\u00e9"',
+    "'é'",
+    '"é"',
+    "é",
+    "'''a'''",
+    '"""a"""',
+    "'a''",
+    "'a",
+    '"a',
+    "[a]\nb",
+    "[a.b]\nc",
+    "[hello]",
+    "[[hello]]\nx",
+    "{\n}",
+]
+
+
+@pytest.mark.parametrize("raw_key", KEY_CORPUS)
+def test_convert_key_matches_toml(raw_key):
+    try:
+        expected = tuple(_convert_toml_key(raw_key))
+    except ValueError:
+        with pytest.raises(ValueError):
+            _convert_key(raw_key)
+    else:
+        assert _convert_key(raw_key) == expected
+
+
+@pytest.mark.parametrize(
+    "raw_key", ["a", "a.b.c", "   a    .    b   ", "'a'.'b'", '"a"."b"', "'a.b'", "''", "0"]
+)
+def test_convert_key_simple_skips_toml(raw_key):
+    with patch("alltoml._parse.toml_loads") as toml_loads_mock:
+        _convert_key(raw_key)
+    toml_loads_mock.assert_not_called()
+
+
+VALUE_CORPUS = [
+    "",
+    " ",
+    "0",
+    " 0 ",
+    "\t0\t",
+    "00",
+    "01",
+    "+0",
+    "-0",
+    "+99",
+    "-17",
+    "1_000",
+    "1__000",
+    "_1",
+    "1_",
+    "0xDEADBEEF",
+    "0xdead_beef",
+    "0x",
+    "+0x1",
+    "0o01234567",
+    "0o8",
+    "0b11010110",
+    "0b2",
+    "0X1",
+    "1.0",
+    "+1.0",
+    "-0.01",
+    "0.0",
+    "00.1",
+    "1.",
+    ".1",
+    "1.e1",
+    "5e+22",
+    "1e06",
+    "-2E-2",
+    "6.626e-34",
+    "224_617.445_991_228",
+    "1e",
+    "1e_1",
+    "inf",
+    "+inf",
+    "-inf",
+    "Inf",
+    "infinity",
+    "true",
+    "false",
+    "True",
+    "tru",
+    "''",
+    '""',
+    "'a'",
+    '"a"',
+    "'a b'",
+    '"a b"',
+    "'a\tb'",
+    '"a\tb"',
+    "'\\t'",
+    '"\\t"',
+    '"\\u00e9"',
+    "'é'",
+    '"é"',
+    "'a\x00'",
+    "'a\nb'",
+    "'a'b'",
+    "'a",
+    '"a',
+    "''''''",
+    '""""""',
+    "'''a\nb'''",
+    "0 # comment",
+    "'a' # comment",
+    "0\n",
+    "\n0",
+    "0\nx = 1",
+    "1979-05-27",
+    "1979-05-27T07:32:00Z",
+    "07:32:01",
+    "[]",
+    "[1, 2]",
+    "{}",
+    "{ x = 1 }",
+]
+
+
+@pytest.mark.parametrize("raw_value", VALUE_CORPUS)
+def test_convert_value_matches_toml(raw_value):
+    try:
+        expected = _convert_toml_value(raw_value)
+    except ValueError:
+        with pytest.raises(ValueError):
+            _convert_value(raw_value)
+    else:
+        value = _convert_value(raw_value)
+        assert type(value) is type(expected)
+        assert value == expected
+
+
+@pytest.mark.parametrize(
+    "raw_value", ["0", "-17", "1_000", "0xDEADBEEF", "3.1415", "-inf", "true", "''", '"a"']
+)
+def test_convert_value_simple_skips_toml(raw_value):
+    with patch("alltoml._parse.toml_loads") as toml_loads_mock:
+        _convert_value(raw_value)
+    toml_loads_mock.assert_not_called()
+
+
+MANY_ENTRIES = [
+    ("a", "[1, 2]"),
+    ("b", "1"),
+    ("c.d", "{ x = 1 }"),
+    ("c.e", "1979-05-27"),
+    ("bad-value", "["),
+    ("a", "'duplicate'"),
+    ("c.d.y", "2"),
+    ("b.x", "'not a table'"),
+    ("'''", "0"),
+    ("f", "'''"),
+    ("g", "'''\nmulti\nline'''"),
+    ("h", "'''"),
+    ("i", "x'''"),
+    ("j", '"\\u00e9"'),
+    ("k", "[\n1,\n2\n]"),
+    ("l", "1\nm = 2"),
+    ("n", "inf # comment"),
+]
+
+
+@pytest.mark.parametrize("count", range(len(MANY_ENTRIES) + 1))
+def test_store_many_settings_matches_store_settings(count):
+    entries = MANY_ENTRIES[:count]
+
+    expected_fail = MagicMock()
+    expected_settings = {}
+    for raw_key, raw_value in entries:
+        store_settings(expected_settings, raw_key, raw_value, lambda k=raw_key: expected_fail(k))
+
+    fail = MagicMock()
+    settings = {}
+    store_many_settings(settings, [(k, v, lambda k=k: fail(k)) for k, v in entries])
+
+    assert settings == expected_settings
+    assert fail.call_args_list == expected_fail.call_args_list
+
+
+def test_store_many_settings_single_toml_parse():
+    settings = {}
+    with patch("alltoml._parse.toml_loads", wraps=tomllib.loads) as toml_loads_mock:
+        store_many_settings(
+            settings, [(f"k{i}", f"[{i}, '\\t']", lambda: pytest.fail()) for i in range(100)]
+        )
+    assert toml_loads_mock.call_count == 1
+    assert settings == {f"k{i}": [i, "\\t"] for i in range(100)}
+
+
+def test_store_many_settings_no_toml_parse_for_scalars():
+    settings = {}
+    with patch("alltoml._parse.toml_loads") as toml_loads_mock:
+        store_many_settings(
+            settings, [(f"k.'{i}'", str(i), lambda: pytest.fail()) for i in range(100)]
+        )
+    toml_loads_mock.assert_not_called()
+    assert settings == {"k": {str(i): i for i in range(100)}}
+
+
+def test_store_many_settings_bisect_failures():
+    fail = MagicMock()
+    settings = {}
+    store_many_settings(
+        settings,
+        [(f"k{i}", "[" if i in (3, 40) else f"[{i}]", lambda i=i: fail(i)) for i in range(64)],
+    )
+    assert fail.call_args_list == [call(3), call(40)]
+    assert settings == {f"k{i}": [i] for i in range(64) if i not in (3, 40)}
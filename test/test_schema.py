@@ -0,0 +1,180 @@
+import typing
+from collections.abc import Mapping
+from collections.abc import Sequence
+from dataclasses import dataclass
+from dataclasses import field
+from datetime import date
+from datetime import datetime
+from datetime import time
+from typing import Any
+from typing import Literal
+from typing import NotRequired
+from typing import Optional
+from typing import TypedDict
+
+import pytest
+from deep_chainmap import DeepChainMap
+
+from alltoml import SchemaError
+from alltoml import Settings
+from alltoml import compile_schema
+from alltoml import freeze
+
+
+@dataclass(slots=True, frozen=True)
+class Database:
+    host: str
+    port: int = 5432
+
+
+@dataclass(slots=True)
+class Config:
+    database: Database
+    debug: bool = False
+    tags: list[str] = field(default_factory=list)
+
+
+class Server(TypedDict):
+    name: str
+    weight: NotRequired[float]
+
+
+@dataclass
+class Node:
+    value: int
+    children: "list[Node]" = field(default_factory=list)
+
+
+def test_compile_schema_dataclass():
+    convert = compile_schema(Config)
+    config = convert({"database": {"host": "db"}, "other": 1})
+    assert config == Config(Database("db"))
+    assert not hasattr(config, "__dict__")
+
+    config = convert({"database": {"host": "db", "port": 1}, "debug": True, "tags": ["a"]})
+    assert config == Config(Database("db", 1), True, ["a"])
+
+
+def test_compile_schema_typeddict():
+    convert = compile_schema(Server)
+    assert convert({"name": "a"}) == {"name": "a"}
+    assert convert({"name": "a", "weight": 1, "other": 1}) == {"name": "a", "weight": 1.0}
+
+
+def test_compile_schema_recursive():
+    convert = compile_schema(Node)
+    assert convert({"value": 1, "children": [{"value": 2, "children": [{"value": 3}]}]}) == Node(
+        1, [Node(2, [Node(3)])]
+    )
+    with pytest.raises(SchemaError) as excinfo:
+        convert({"value": 1, "children": [{"value": 2, "children": [{"value": "3"}]}]})
+    assert excinfo.value.path == ("children", 0, "children", 0, "value")
+
+
+@pytest.mark.parametrize(
+    "mapping",
+    [
+        DeepChainMap({"database": {"host": "db"}}, {"database": {"port": 1}, "debug": True}),
+        Settings({"database": {"host": "db", "port": 1}, "debug": True}),
+    ],
+)
+def test_compile_schema_mapping(mapping):
+    assert compile_schema(Config)(mapping) == Config(Database("db", 1), True)
+
+
+def test_compile_schema_frozen():
+    @dataclass
+    class Hosts:
+        hosts: list[str]
+        pair: tuple[int, str]
+        ports: tuple[int, ...]
+
+    settings = freeze(Settings({"hosts": ["a", "b"], "pair": [1, "a"], "ports": [1, 2]}))
+    assert settings["hosts"] == ("a", "b")
+    assert compile_schema(Hosts)(settings) == Hosts(["a", "b"], (1, "a"), (1, 2))
+
+
+@pytest.mark.parametrize(
+    "schema, value, expected",
+    [
+        (bool, True, True),
+        (int, 1, 1),
+        (float, 1, 1.0),
+        (float, 1.5, 1.5),
+        (str, "a", "a"),
+        (datetime, datetime(2000, 1, 1), datetime(2000, 1, 1)),
+        (date, date(2000, 1, 1), date(2000, 1, 1)),
+        (time, time(1), time(1)),
+        (Any, [1, "a"], [1, "a"]),
+        (object, 1, 1),
+        (int | str, "a", "a"),
+        (Optional[int], 1, 1),
+        (Literal["a", "b"], "b", "b"),
+        (list[int], [1, 2], [1, 2]),
+        (list[int], (1, 2), [1, 2]),
+        (Sequence[int], [1, 2], [1, 2]),
+        (typing.Sequence[int], [1, 2], [1, 2]),
+        (list, [1, "a"], [1, "a"]),
+        (tuple[int, ...], [1, 2], (1, 2)),
+        (tuple[int, str], [1, "a"], (1, "a")),
+        (tuple[int, str], (1, "a"), (1, "a")),
+        (tuple, [1], (1,)),
+        (dict[str, int], {"a": 1}, {"a": 1}),
+        (Mapping[str, int], {"a": 1}, {"a": 1}),
+        (typing.Mapping[str, int], {"a": 1}, {"a": 1}),
+        (dict, {"a": "b"}, {"a": "b"}),
+    ],
+)
+def test_compile_schema_types(schema, value, expected):
+    result = compile_schema(schema)(value)
+    assert result == expected
+    assert type(result) is type(expected)
+
+
+@pytest.mark.parametrize(
+    "schema, value, path, message",
+    [
+        (bool, 1, (), "expected bool, got int"),
+        (int, True, (), "expected int, got bool"),
+        (int, 1.0, (), "expected int, got float"),
+        (float, False, (), "expected float, got bool"),
+        (str, 1, (), "expected str, got int"),
+        (date, datetime(2000, 1, 1), (), "expected date, got datetime"),
+        (int | str, 1.0, (), "expected int | str, got float"),
+        (Literal[1], True, (), "expected Literal[1], got True"),
+        (list[int], {}, (), "expected array, got dict"),
+        (list[int], [1, "a"], (1,), "expected int, got str"),
+        (tuple[int, int], [1], (), "expected 2 items, got 1"),
+        (dict[str, int], {"a": "b"}, ("a",), "expected int, got str"),
+        (Sequence[int], [1, "a"], (1,), "expected int, got str"),
+        (Mapping[str, int], {"a": "b"}, ("a",), "expected int, got str"),
+        (Config, [], (), "expected table, got list"),
+        (Config, {}, ("database",), "missing required key"),
+        (Config, {"database": {}}, ("database", "host"), "missing required key"),
+        (
+            Config,
+            {"database": {"host": "a", "port": "1"}},
+            ("database", "port"),
+            "expected int, got str",
+        ),
+        (Server, {}, ("name",), "missing required key"),
+        (Server, {"name": "a", "weight": "1"}, ("weight",), "expected float, got str"),
+    ],
+)
+def test_compile_schema_error(schema, value, path, message):
+    with pytest.raises(SchemaError) as excinfo:
+        compile_schema(schema)(value)
+    assert isinstance(excinfo.value, ValueError)
+    assert excinfo.value.path == path
+    assert excinfo.value.message == message
+
+
+def test_schema_error_str():
+    assert str(SchemaError("bad", ())) == "bad"
+    assert str(SchemaError("bad", ("a", 0, "b"))) == "a.0.b: bad"
+
+
+@pytest.mark.parametrize("schema", [set[int], dict[int, int], bytes])
+def test_compile_schema_unsupported(schema):
+    with pytest.raises(TypeError):
+        compile_schema(schema)
@@ -0,0 +1,306 @@
+import os
+import sys
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from socketserver import ThreadingMixIn
+from socketserver import UnixStreamServer
+from threading import Thread
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from urllib.parse import quote
+
+import pytest
+
+from alltoml import ConfigServer
+from alltoml import Watcher
+from alltoml import load
+from alltoml import load_from_server
+
+
+class _ServerState:
+    def __init__(self):
+        self.body = b"a = 1"
+        self.etag = '"1"'
+        self.status = 200
+        # close the connection after each response without telling the client
+        self.drop_connections = False
+        self.connections = 0
+        self.requests = []
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.state.connections += 1
+
+    def do_GET(self):
+        state = self.server.state
+        state.requests.append((self.path, self.headers.get("If-None-Match")))
+        if state.status != 200:
+            self.send_response(state.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        elif self.headers.get("If-None-Match") == state.etag:
+            self.send_response(304)
+            self.send_header("ETag", state.etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header("ETag", state.etag)
+            self.send_header("Content-Type", "application/toml")
+            self.send_header("Content-Length", str(len(state.body)))
+            self.end_headers()
+            self.wfile.write(state.body)
+        if state.drop_connections:
+            self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class _ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+
+def _serve(server):
+    server.state = _ServerState()
+    thread = Thread(target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True)
+    thread.start()
+    return server, thread
+
+
+@pytest.fixture
+def http_server():
+    server, thread = _serve(ThreadingHTTPServer(("127.0.0.1", 0), _Handler))
+    host, port = server.server_address
+    yield f"http://{host}:{port}/config.toml", server.state
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def unix_server(tmp_path):
+    socket_path = tmp_path / "config.sock"
+    server, thread = _serve(_ThreadingUnixHTTPServer(str(socket_path), _Handler))
+    yield f"http+unix://{quote(str(socket_path), safe='')}/config.toml?env=prod", server.state
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture(params=["http", "unix"])
+def config_server(request):
+    url, state = request.getfixturevalue(f"{request.param}_server")
+    with ConfigServer(url, timeout=5) as server:
+        yield server, state
+
+
+def test_fetch(config_server):
+    server, state = config_server
+    on_failure = MagicMock()
+    settings = server.fetch(on_failure=on_failure)
+    assert settings == {"a": 1}
+    assert server.fetch(on_failure=on_failure) is settings
+    on_failure.assert_not_called()
+    # the second fetch is conditional and uses the same connection
+    assert [if_none_match for _, if_none_match in state.requests] == [None, '"1"']
+    assert state.connections == 1
+
+
+def test_fetch_request_path(unix_server):
+    url, state = unix_server
+    with ConfigServer(url) as server:
+        server.fetch()
+    assert state.requests == [("/config.toml?env=prod", None)]
+
+
+def test_fetch_changed(config_server):
+    server, state = config_server
+    settings = server.fetch()
+    state.body = b"a = 2"
+    state.etag = '"2"'
+    changed_settings = server.fetch()
+    assert changed_settings == {"a": 2}
+    assert changed_settings is not settings
+    assert server.fetch() is changed_settings
+    assert state.connections == 1
+
+
+def test_fetch_dropped_connection(config_server):
+    server, state = config_server
+    state.drop_connections = True
+    on_failure = MagicMock()
+    settings = server.fetch(on_failure=on_failure)
+    # the connection the server dropped is replaced without it being a failure
+    assert server.fetch(on_failure=on_failure) is settings
+    on_failure.assert_not_called()
+    assert state.connections == 2
+
+
+@pytest.mark.parametrize(
+    "change", [{"status": 500}, {"status": 404}, {"body": b"a = ["}, {"body": b"\xff = 1"}]
+)
+def test_fetch_failure_keeps_settings(config_server, change):
+    server, state = config_server
+    settings = server.fetch()
+    for name, value in change.items():
+        setattr(state, name, value)
+    state.etag = '"2"'
+    on_failure = MagicMock()
+    assert server.fetch(on_failure=on_failure) is settings
+    on_failure.assert_called_once_with(server.url)
+
+
+def test_fetch_unavailable(tmp_path):
+    on_failure = MagicMock()
+    url = f"http+unix://{quote(str(tmp_path / 'missing.sock'), safe='')}/"
+    with ConfigServer(url) as server:
+        assert server.fetch(on_failure=on_failure) == {}
+    on_failure.assert_called_once_with(url)
+
+
+def test_fetch_fallback(http_server, tmp_path):
+    url, state = http_server
+    fallback_path = tmp_path / "fallback" / "config.toml"
+    with ConfigServer(url, fallback_path=fallback_path) as server:
+        assert server.fetch() == {"a": 1}
+    assert fallback_path.read_bytes() == b"a = 1"
+
+    # a fresh process can't reach the server and uses the copy on disk
+    state.status = 503
+    on_failure = MagicMock()
+    with ConfigServer(url, fallback_path=fallback_path) as server:
+        settings = server.fetch(on_failure=on_failure)
+        assert settings == {"a": 1}
+        assert server.fetch(on_failure=on_failure) is settings
+    assert on_failure.call_count == 2
+
+    state.status = 200
+    state.body = b"a = 2"
+    with ConfigServer(url, fallback_path=fallback_path) as server:
+        assert server.fetch() == {"a": 2}
+    assert fallback_path.read_bytes() == b"a = 2"
+
+
+def test_fetch_fallback_missing(http_server, tmp_path):
+    url, state = http_server
+    state.status = 500
+    with ConfigServer(url, fallback_path=tmp_path / "missing.toml") as server:
+        assert server.fetch() == {}
+
+
+def test_fetch_fallback_not_written(http_server, tmp_path):
+    url, _ = http_server
+    (tmp_path / "file").touch()
+    on_failure = MagicMock()
+    with ConfigServer(url, fallback_path=tmp_path / "file" / "config.toml") as server:
+        assert server.fetch(on_failure=on_failure) == {"a": 1}
+    on_failure.assert_not_called()
+
+
+def test_unsupported_scheme():
+    with pytest.raises(ValueError, match="unsupported url scheme: 'ftp'"):
+        ConfigServer("ftp://localhost/config.toml")
+
+
+def test_repr():
+    assert repr(ConfigServer("http://localhost/")) == "<ConfigServer 'http://localhost/'>"
+
+
+def test_load_from_server(http_server):
+    url, state = http_server
+    assert load_from_server(url) == {"a": 1}
+    on_failure = MagicMock()
+    state.status = 500
+    assert load_from_server(url, on_failure=on_failure) == {}
+    on_failure.assert_called_once_with(url)
+
+
+@pytest.fixture
+def app_environ():
+    return {"A_CONFIG.y": "'environ'", "A_CONFIG.z": "'environ'"}
+
+
+@pytest.fixture
+def environment(app_environment):
+    _, user_data_path = app_environment
+    (user_data_path / "config.toml").write_text("user = 1\nx = 'user'")
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"materialize": True}, {"lazy": True}, {"cache": True}, {"frozen": True}]
+)
+def test_load_config_server(environment, http_server, kwargs):
+    url, state = http_server
+    state.body = b"server = 1\nx = 'server'\ny = 'server'"
+    with ConfigServer(url) as server:
+        settings = load("a", "b", config_server=server, **kwargs)
+        # the config files take precedence over the server and the server over the environ
+        assert dict(settings) == {
+            "user": 1,
+            "server": 1,
+            "x": "user",
+            "y": "server",
+            "z": "environ",
+        }
+        # the server is fetched again even when the rest comes from the cache
+        state.body = b"y = 'changed'"
+        state.etag = '"2"'
+        settings = load("a", "b", config_server=server, **kwargs)
+        assert dict(settings) == {"user": 1, "x": "user", "y": "changed", "z": "environ"}
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"lazy": True}, {"cache": True}])
+def test_load_config_server_intern(environment, http_server, kwargs):
+    url, state = http_server
+    state.body = b"[server]\nport = 12345678"
+    os.environ["A_CONFIG.environ"] = "{ port = 12345678 }"
+    with ConfigServer(url) as server:
+        for _ in range(2):
+            settings = load("a", "b", config_server=server, intern=True, **kwargs)
+            # the server shares the pool of the other layers
+            assert settings["server"]["port"] is settings["environ"]["port"]
+
+
+def test_load_config_server_failure(environment, http_server, caplog):
+    url, state = http_server
+    state.status = 500
+    with ConfigServer(url) as server:
+        settings = load("a", "b", config_server=server)
+    assert dict(settings) == {"user": 1, "x": "user", "y": "environ", "z": "environ"}
+    assert f"failed to fetch settings from config server: {url!r}" in caplog.messages
+
+
+def test_load_config_server_stats(environment, http_server):
+    url, _ = http_server
+    stats = []
+    with ConfigServer(url) as server:
+        load("a", "b", config_server=server, stats=stats.append)
+    layer = stats[0].layers[-1]
+    assert (layer.name, layer.bytes_read, layer.entries_parsed, layer.entries_failed) == (
+        "config_server",
+        None,
+        1,
+        0,
+    )
+
+
+def test_watcher_config_server(environment, http_server):
+    url, state = http_server
+    with ConfigServer(url) as server:
+        watcher = Watcher("a", "b", config_server=server)
+        assert watcher.settings == {"user": 1, "a": 1, "x": "user", "y": "environ", "z": "environ"}
+        settings = watcher.settings
+
+        assert watcher.poll() == frozenset()
+        assert watcher.settings is settings
+
+        state.body = b"y = 'server'"
+        state.etag = '"2"'
+        assert watcher.poll() == frozenset({("a",), ("y",)})
+        assert watcher.settings == {"user": 1, "x": "user", "y": "server", "z": "environ"}
+    assert [if_none_match for _, if_none_match in state.requests] == [None, '"1"', '"1"']
+    assert state.connections == 1
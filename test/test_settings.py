@@ -0,0 +1,395 @@
+import random
+from collections.abc import Mapping
+from unittest.mock import patch
+
+import pytest
+from deep_chainmap import DeepChainMap
+
+from alltoml import Settings
+from alltoml import SettingsChange
+from alltoml import freeze
+from alltoml import update_settings
+from alltoml._settings import get_changed_paths
+from alltoml._settings import merge_layers
+
+
+def test_settings_empty():
+    settings = Settings()
+    assert len(settings) == 0
+    assert list(settings) == []
+    assert settings == {}
+
+
+def test_settings_basic():
+    settings = Settings({"a": 1, "b": {"c": [1, 2]}})
+    assert isinstance(settings, Mapping)
+    assert settings["a"] == 1
+    assert isinstance(settings["b"], Settings)
+    assert settings["b"]["c"] == [1, 2]
+    assert "a" in settings
+    assert "c" not in settings
+    assert len(settings) == 2
+    assert list(settings) == ["a", "b"]
+    assert settings == {"a": 1, "b": {"c": [1, 2]}}
+    assert repr(settings) == "Settings({'a': 1, 'b': Settings({'c': [1, 2]})})"
+
+
+def test_settings_copies_data():
+    data = {"a": {"b": 1}}
+    settings = Settings(data)
+    data["a"]["b"] = 2
+    data["c"] = 3
+    assert settings == {"a": {"b": 1}}
+
+
+def test_settings_read_only():
+    settings = Settings({"a": 1})
+    with pytest.raises(TypeError):
+        settings["a"] = 2  # type: ignore
+    with pytest.raises(TypeError):
+        del settings["a"]  # type: ignore
+    with pytest.raises(AttributeError):
+        settings.x = 1  # type: ignore
+
+
+def test_settings_missing_key():
+    with pytest.raises(KeyError):
+        Settings()["a"]
+
+
+@pytest.mark.parametrize(
+    "layers",
+    [
+        [],
+        [{}],
+        [{"a": 1}],
+        [{"a": 1}, {"a": 2}],
+        [{"a": 1}, {"b": 2}],
+        [{"a": {"b": 1}}, {"a": {"c": 2}}],
+        [{"a": {"b": 1}}, {"a": {"b": 2, "c": 2}}, {"a": {"d": 3}}],
+        [{"a": {"b": {"c": 1}}}, {}, {"a": {"b": {"d": 2}}}, {"a": {"e": 3}}],
+        [{"a": 1}, {"a": {"b": 1}}],
+        [{}, {}, {}, {}, {}, {"a": "default", "b": {"c": "default"}}],
+    ],
+)
+def test_merge_layers_matches_deep_chainmap(layers):
+    merged = merge_layers(layers)
+    assert isinstance(merged, Settings)
+    assert merged == DeepChainMap(*layers).to_dict()
+    assert set(merged) == set(DeepChainMap(*layers))
+
+
+def test_merge_layers_shadows_lower_non_mapping():
+    assert merge_layers([{"a": {"b": 1}}, {"a": 1}]) == {"a": {"b": 1}}
+
+
+@pytest.mark.parametrize(
+    "path, expected",
+    [
+        ("a", 1),
+        ("b", {"c": {"d": 2, "e.f": 3}}),
+        ("b.c", {"d": 2, "e.f": 3}),
+        ("b.c.d", 2),
+        ("  b . c . d  ", 2),
+        ("'b'.\"c\".d", 2),
+        ("b.c.'e.f'", 3),
+        ('b.c."e.f"', 3),
+    ],
+)
+def test_settings_get_path(path, expected):
+    settings = Settings({"a": 1, "b": {"c": {"d": 2, "e.f": 3}}})
+    assert settings.get_path(path) == expected
+    assert settings.get_path(path, default=None) == expected
+    # cached
+    assert settings.get_path(path) == expected
+
+
+@pytest.mark.parametrize("path", ["x", "a.b", "b.x", "b.c.d.e", "b.c.e.f"])
+def test_settings_get_path_missing(path):
+    settings = Settings({"a": 1, "b": {"c": {"d": 2, "e.f": 3}}})
+    with pytest.raises(KeyError):
+        settings.get_path(path)
+    sentinel = object()
+    assert settings.get_path(path, default=sentinel) is sentinel
+    # misses aren't cached
+    assert settings._path_cache == {}
+
+
+@pytest.mark.parametrize("path", ["", "a..b", "[a]"])
+def test_settings_get_path_invalid(path):
+    with pytest.raises(ValueError):
+        Settings({"a": {"b": 1}}).get_path(path)
+    # a malformed path is a mistake in the program rather than a missing value
+    with pytest.raises(ValueError):
+        Settings({"a": {"b": 1}}).get_path(path, default=None)
+
+
+def test_settings_get_path_nested():
+    settings = Settings({"a": {"b": {"c": 1}}})
+    assert settings["a"].get_path("b.c") == 1
+
+
+def test_settings_get_path_cache_single_probe():
+    settings = Settings({"a": {"b": 1}})
+    assert settings.get_path("a.b") == 1
+    with patch("alltoml._settings._convert_key") as convert_key_mock:
+        assert settings.get_path("a.b") == 1
+    convert_key_mock.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "old, new, expected",
+    [
+        ({}, {}, set()),
+        ({"a": 1}, {"a": 1}, set()),
+        ({"a": 1}, {"a": 2}, {("a",)}),
+        ({"a": 1}, {"a": 1.0}, {("a",)}),
+        ({"a": 1}, {"a": True}, {("a",)}),
+        ({"a": 1}, {}, {("a",)}),
+        ({}, {"a": 1}, {("a",)}),
+        ({"a": [1]}, {"a": [1]}, set()),
+        ({"a": [1]}, {"a": [2]}, {("a",)}),
+        ({"a": {"b": 1}}, {"a": {"b": 1}}, set()),
+        ({"a": {"b": 1}}, {"a": {"b": 2}}, {("a", "b")}),
+        ({"a": {"b": 1}}, {"a": {"c": 1}}, {("a", "b"), ("a", "c")}),
+        ({"a": {"b": 1}}, {"a": 1}, {("a",), ("a", "b")}),
+        ({"a": {"b": {"c": 1}}}, {}, {("a",), ("a", "b"), ("a", "b", "c")}),
+    ],
+)
+def test_get_changed_paths(old, new, expected):
+    assert get_changed_paths(Settings(old), Settings(new)) == expected
+
+
+def test_settings_hash():
+    settings = freeze({"a": 1, "b": {"c": [1, 2]}})
+    assert hash(settings) == hash(freeze({"b": {"c": (1, 2)}, "a": 1}))
+    assert settings._hash is not None
+    assert {settings: 1}[freeze({"a": 1, "b": {"c": (1, 2)}})] == 1
+    assert hash(Settings(settings)) == hash(settings)
+
+
+@pytest.mark.parametrize("data", [{"a": [1]}, {"a": 1}])
+def test_settings_hash_not_frozen(data):
+    settings = Settings(data)
+    with pytest.raises(TypeError, match="unhashable type: 'Settings'"):
+        hash(settings)
+    with pytest.raises(TypeError, match="unhashable type: 'Settings'"):
+        assert settings in set()
+
+
+def test_settings_eq():
+    settings = Settings({"a": 1, "b": {"c": 1}})
+    assert settings == settings
+    assert settings == Settings({"a": 1, "b": {"c": 1}})
+    assert settings == {"a": 1, "b": {"c": 1}}
+    assert settings != Settings({"a": 1, "b": {"c": 2}})
+    assert settings != {"a": 1}
+    assert settings != 1
+    settings = freeze(settings)
+    other = freeze({"a": 2, "b": {"c": 1}})
+    hash(settings)
+    hash(other)
+    with patch.object(Settings, "__iter__", side_effect=AssertionError):
+        assert settings != other
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        ({}, {}),
+        ({"a": 1, "b": "x"}, {"a": 1, "b": "x"}),
+        ({"a": [1, [2, {"b": [3]}]]}, {"a": (1, (2, {"b": (3,)}))}),
+        ({"a": {"b": {"c": [1]}}}, {"a": {"b": {"c": (1,)}}}),
+        (Settings({"a": {"b": [1]}}), {"a": {"b": (1,)}}),
+    ],
+)
+def test_freeze(data, expected):
+    settings = freeze(data)
+    assert isinstance(settings, Settings)
+    assert settings == expected
+    hash(settings)
+
+
+def test_freeze_nested_array_tables():
+    settings = freeze({"a": [{"b": 1}]})
+    assert isinstance(settings["a"][0], Settings)
+
+
+def test_freeze_previous():
+    previous = freeze({"a": {"b": 1}, "c": {"d": [1]}, "e": [{"f": 1}], "g": 1})
+    settings = freeze({"a": {"b": 2}, "c": {"d": [1]}, "e": [{"f": 1}], "g": 1}, previous)
+    assert settings == {"a": {"b": 2}, "c": {"d": (1,)}, "e": ({"f": 1},), "g": 1}
+    assert settings is not previous
+    assert settings["a"] is not previous["a"]
+    assert settings["c"] is previous["c"]
+    assert settings["e"] is previous["e"]
+
+
+def test_freeze_previous_unchanged():
+    previous = freeze({"a": {"b": [1]}, "c": 1})
+    assert freeze({"a": {"b": [1]}, "c": 1}, previous) is previous
+    assert freeze({"a": {"b": [1]}, "c": 1.0}, previous) is not previous
+    assert freeze({"a": {"b": [1]}}, previous) == {"a": {"b": (1,)}}
+    assert freeze({"a": {"b": [1]}, "c": 1, "d": 1}, previous)["a"] is previous["a"]
+
+
+def test_settings_override():
+    settings = freeze({"a": {"b": 1, "c": 1}, "d": {"e": 1}, "f": 1})
+    overridden = settings.override({"a": {"b": 2, "x": [1]}, "f": {"g": 1}, "h": [{"i": 1}]})
+    assert overridden == {
+        "a": {"b": 2, "c": 1, "x": (1,)},
+        "d": {"e": 1},
+        "f": {"g": 1},
+        "h": ({"i": 1},),
+    }
+    assert isinstance(overridden["f"], Settings)
+    assert overridden["d"] is settings["d"]
+    assert settings == {"a": {"b": 1, "c": 1}, "d": {"e": 1}, "f": 1}
+    hash(overridden)
+    with pytest.raises(TypeError):
+        hash(Settings({"a": [1]}).override({"b": 1}))
+
+
+def test_update_settings_unchanged():
+    layers = [{"a": 1}, {"b": {"c": 1}}]
+    settings = merge_layers(layers)
+    update = update_settings(settings, layers, list(layers))
+    assert update.settings is settings
+    assert update.changes == ()
+
+
+def test_update_settings_equal_layer():
+    layers = [{"a": 1}, {"b": {"c": [1]}}]
+    settings = merge_layers(layers)
+    update = update_settings(settings, layers, [layers[0], {"b": {"c": [1]}}])
+    assert update.settings is settings
+    assert update.changes == ()
+
+
+def test_update_settings_layer_count():
+    with pytest.raises(ValueError):
+        update_settings(Settings(), [{}], [{}, {}])
+
+
+def test_update_settings():
+    old_layers = [{"a": 1, "b": {"x": 1}}, {"b": {"y": 1}, "c": {"d": 1}, "e": {"f": 1}}, {"g": 1}]
+    new_layers = [
+        {"a": 2, "b": {"x": 1}},
+        {"b": {"y": 1, "z": 1}, "c": 1, "h": {"i": 1}},
+        old_layers[2],
+    ]
+    settings = merge_layers(old_layers)
+    update = update_settings(settings, old_layers, new_layers)
+    assert update.settings == merge_layers(new_layers)
+    assert sorted(update.changes) == [
+        SettingsChange(("a",), "changed", 0),
+        SettingsChange(("b", "z"), "added", 1),
+        SettingsChange(("c",), "changed", 1),
+        SettingsChange(("c", "d"), "removed", None),
+        SettingsChange(("e",), "removed", None),
+        SettingsChange(("e", "f"), "removed", None),
+        SettingsChange(("h",), "added", 1),
+        SettingsChange(("h", "i"), "added", 1),
+    ]
+    # the unchanged layer's value is shared
+    assert update.settings["g"] is settings["g"]
+
+
+def test_update_settings_frozen():
+    old_layers = [{"a": [1], "b": {"c": [1]}, "d": {"e": 1}}]
+    new_layers = [{"a": [1], "b": {"c": [2]}, "d": {"e": 1}, "f": {"g": [1]}}]
+    settings = freeze(merge_layers(old_layers))
+    update = update_settings(settings, old_layers, new_layers)
+    assert update.settings == {"a": (1,), "b": {"c": (2,)}, "d": {"e": 1}, "f": {"g": (1,)}}
+    assert update.settings == freeze(merge_layers(new_layers))
+    hash(update.settings)
+    hash(update.settings["b"])
+    hash(update.settings["f"])
+    assert update.settings["a"] is settings["a"]
+    assert update.settings["d"] is settings["d"]
+    assert sorted(update.changes) == [
+        SettingsChange(("b", "c"), "changed", 0),
+        SettingsChange(("f",), "added", 0),
+        SettingsChange(("f", "g"), "added", 0),
+    ]
+
+
+def test_update_settings_shares_unchanged_tables():
+    table = {"b": {"c": 1}}
+    old_layers = [{"a": table, "d": 1}, {}]
+    new_layers = [{"a": table, "d": 2}, {}]
+    settings = merge_layers(old_layers)
+    update = update_settings(settings, old_layers, new_layers)
+    assert update.settings["a"] is settings["a"]
+    assert update.changes == (SettingsChange(("d",), "changed", 0),)
+
+
+def test_update_settings_winning_layer():
+    old_layers = [{"a": {"b": 1}}, {"a": 1}, {"a": {"c": 1}}]
+    settings = merge_layers(old_layers)
+    assert settings == {"a": {"b": 1, "c": 1}}
+    new_layers = [{}, old_layers[1], {"a": {"c": 2}}]
+    update = update_settings(settings, old_layers, new_layers)
+    assert update.settings == {"a": 1}
+    assert sorted(update.changes) == [
+        SettingsChange(("a",), "changed", 1),
+        SettingsChange(("a", "b"), "removed", None),
+        SettingsChange(("a", "c"), "removed", None),
+    ]
+
+
+def _random_layer(rng, depth=0):
+    layer = {}
+    for _ in range(rng.randint(0, 4)):
+        key = rng.choice("abcd")
+        if depth < 3 and rng.random() < 0.4:
+            layer[key] = _random_layer(rng, depth + 1)
+        else:
+            layer[key] = rng.choice([1, 2, 1.0, "1", [1]])
+    return layer
+
+
+def _mutate_layer(rng, layer):
+    # replaces some of the tables along the way with new but mostly equal ones
+    if rng.random() < 0.3:
+        return layer
+    result = {}
+    for key, value in layer.items():
+        if rng.random() < 0.2:
+            continue
+        if isinstance(value, dict):
+            value = _mutate_layer(rng, value)
+        elif rng.random() < 0.2:
+            value = rng.choice([1, 2, 1.0, "1", [1], _random_layer(rng, 2)])
+        result[key] = value
+    if rng.random() < 0.3:
+        result.update(_random_layer(rng, 1))
+    return result
+
+
+def test_update_settings_matches_merge_layers():
+    rng = random.Random(0)
+    for _ in range(5000):
+        old_layers = [_random_layer(rng) for _ in range(rng.randint(1, 4))]
+        new_layers = [_mutate_layer(rng, layer) for layer in old_layers]
+        old_settings = merge_layers(old_layers)
+        expected = merge_layers(new_layers)
+        update = update_settings(old_settings, old_layers, new_layers)
+        assert update.settings == expected
+        paths = [change.path for change in update.changes]
+        assert len(paths) == len(set(paths))
+        assert set(paths) == get_changed_paths(old_settings, expected)
+        new_index = expected._get_path_index()
+        for change in update.changes:
+            if change.kind == "removed":
+                assert change.path not in new_index
+                assert change.layer is None
+                continue
+            layer = new_layers[change.layer]
+            for key in change.path:
+                layer = layer[key]
+            if isinstance(new_index[change.path], Settings):
+                # tables are merged from every layer, the winning layer is the first to have it
+                assert isinstance(layer, Mapping)
+            else:
+                assert layer == new_index[change.path]
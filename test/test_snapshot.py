@@ -0,0 +1,115 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import alltoml
+from alltoml import Settings
+from alltoml import Snapshot
+from alltoml import attach_snapshot
+from alltoml import freeze
+from alltoml import publish_snapshot
+from alltoml._snapshot import _HEADER
+
+SETTINGS = {"a": 1, "b": {"c": [1, {"d": "x"}], "e": 1.5}, "f": []}
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        SETTINGS,
+        Settings(SETTINGS),
+        freeze(SETTINGS),
+        alltoml.load_from_file(Path("."), name=Path("missing.toml")),
+    ],
+)
+def test_publish_attach(tmp_path, settings):
+    path = tmp_path / "snapshot"
+    assert publish_snapshot(path, settings) == 1
+    snapshot = attach_snapshot(path)
+    assert isinstance(snapshot, Snapshot)
+    assert snapshot.path == path
+    assert snapshot.generation == 1
+    assert isinstance(snapshot.settings, Settings)
+    assert snapshot.settings == freeze(settings)
+    assert not snapshot.is_stale()
+    assert repr(snapshot) == f"<Snapshot {str(path)!r} generation=1>"
+
+
+def test_publish_creates_directory(tmp_path):
+    path = tmp_path / "a" / "b" / "snapshot"
+    publish_snapshot(path, {})
+    assert attach_snapshot(path).settings == {}
+    assert [p.name for p in path.parent.iterdir()] == ["snapshot"]
+
+
+def test_generation(tmp_path):
+    path = tmp_path / "snapshot"
+    assert publish_snapshot(path, {"a": 1}) == 1
+    first = attach_snapshot(path)
+    assert publish_snapshot(path, {"a": 2}) == 2
+    assert first.is_stale()
+    assert first.settings == {"a": 1}
+    second = attach_snapshot(path)
+    assert second.generation == 2
+    assert second.settings == {"a": 2}
+    assert not second.is_stale()
+
+    path.unlink()
+    assert second.is_stale()
+    assert publish_snapshot(path, {"a": 3}) == 1
+
+
+@pytest.mark.parametrize(
+    "content", [b"", b"x" * _HEADER.size, _HEADER.pack(b"ALLTOMLS", 999, 0, 1, 0)]
+)
+def test_attach_invalid(tmp_path, content):
+    path = tmp_path / "snapshot"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        attach_snapshot(path)
+    assert publish_snapshot(path, {}) == 1
+
+
+@pytest.mark.parametrize("truncate", [False, True])
+def test_attach_corrupt(tmp_path, truncate):
+    path = tmp_path / "snapshot"
+    publish_snapshot(path, SETTINGS)
+    content = bytearray(path.read_bytes())
+    if truncate:
+        del content[-1]
+    else:
+        content[-2] ^= 0xFF
+    path.write_bytes(content)
+    with pytest.raises(ValueError, match="corrupt"):
+        attach_snapshot(path)
+
+
+def test_attach_missing(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        attach_snapshot(tmp_path / "snapshot")
+
+
+def test_attach_other_process(tmp_path):
+    path = tmp_path / "snapshot"
+    publish_snapshot(path, SETTINGS)
+    # a fresh interpreter, as a spawned worker would be, with different str hashes
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from pathlib import Path\n"
+            "import alltoml\n"
+            "snapshot = alltoml.attach_snapshot(Path(sys.argv[1]))\n"
+            "print(snapshot.generation, snapshot.settings['b']['c'][1]['d'], "
+            "hash(snapshot.settings) == hash(alltoml.freeze(dict(snapshot.settings))))\n",
+            str(path),
+        ],
+        env={"PYTHONPATH": str(Path(alltoml.__file__).parent.parent), "PYTHONHASHSEED": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == ["1", "x", "True"]
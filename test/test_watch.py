@@ -0,0 +1,204 @@
+import os
+import sys
+from threading import Event
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+
+from alltoml import Settings
+from alltoml import Watcher
+from alltoml import load_from_argv
+from alltoml import load_from_environ
+from alltoml import load_from_file
+from alltoml import watch
+
+
+@pytest.fixture
+def app_argv(tmp_path):
+    return ["test", "--config", str(tmp_path / "explicit.toml"), "--config.argv", "1"]
+
+
+@pytest.fixture
+def app_environ():
+    return {"A_CONFIG.environ": "1"}
+
+
+@pytest.fixture
+def environment(tmp_path, app_environment):
+    cwd_path, user_data_path = app_environment
+    with (
+        patch("alltoml._load.load_from_file", wraps=load_from_file) as load_from_file_mock,
+        patch("alltoml._watch.load_from_argv", wraps=load_from_argv) as load_from_argv_mock,
+        patch(
+            "alltoml._watch.load_from_environ", wraps=load_from_environ
+        ) as load_from_environ_mock,
+    ):
+        yield (
+            tmp_path / "explicit.toml",
+            cwd_path / "config.toml",
+            user_data_path / "config.toml",
+            load_from_file_mock,
+            load_from_argv_mock,
+            load_from_environ_mock,
+        )
+
+
+@pytest.mark.parametrize("response_files", [False, True])
+def test_watcher_response_files(environment, response_files):
+    *_, load_from_argv_mock, _ = environment
+    Watcher("a", "b", response_files=response_files)
+    assert load_from_argv_mock.call_args.kwargs["response_files"] is response_files
+
+
+def test_watcher_initial(environment):
+    explicit_path, cwd_path, user_path, *_ = environment
+    explicit_path.write_text("explicit = 1")
+    cwd_path.write_text("cwd = 1")
+    user_path.write_text("user = 1")
+    watcher = Watcher("a", "b", default_settings={"default": 1})
+    assert isinstance(watcher.settings, Settings)
+    assert watcher.settings == {
+        "argv": 1,
+        "explicit": 1,
+        "cwd": 1,
+        "user": 1,
+        "environ": 1,
+        "default": 1,
+    }
+
+
+def test_watcher_poll_unchanged(environment):
+    *_, load_from_file_mock, load_from_argv_mock, load_from_environ_mock = environment
+    watcher = Watcher("a", "b")
+    settings = watcher.settings
+    subscriber = MagicMock()
+    watcher.subscribe(subscriber)
+    assert load_from_file_mock.call_count == 3
+
+    assert watcher.poll() == frozenset()
+    assert watcher.settings is settings
+    subscriber.assert_not_called()
+    assert load_from_file_mock.call_count == 3
+    load_from_argv_mock.assert_called_once()
+    load_from_environ_mock.assert_called_once()
+
+
+@pytest.mark.parametrize("file", [0, 1, 2])
+def test_watcher_poll_changed(environment, file):
+    *file_paths, load_from_file_mock, load_from_argv_mock, load_from_environ_mock = environment
+    file_path = file_paths[file]
+    file_path.write_text("a = 1\nb = 1\nc = {d = 1}\nargv = 2")
+    watcher = Watcher("a", "b")
+    assert watcher.settings == {"a": 1, "b": 1, "c": {"d": 1}, "argv": 1, "environ": 1}
+    subscriber = MagicMock()
+    watcher.subscribe(subscriber)
+
+    file_path.write_text("a = 1\nb = 2\nc = {e = 1}\nf = {g = 1}\nargv = 3")
+    changed_paths = watcher.poll()
+    assert changed_paths == {("b",), ("c", "d"), ("c", "e"), ("f",), ("f", "g")}
+    assert watcher.settings == {
+        "a": 1,
+        "b": 2,
+        "c": {"e": 1},
+        "f": {"g": 1},
+        "argv": 1,
+        "environ": 1,
+    }
+    subscriber.assert_called_once_with(watcher.settings, changed_paths)
+    # only the changed file is reloaded
+    assert load_from_file_mock.call_count == 4
+    load_from_argv_mock.assert_called_once()
+    load_from_environ_mock.assert_called_once()
+
+    file_path.unlink()
+    assert watcher.poll() == {("a",), ("b",), ("c",), ("c", "e"), ("f",), ("f", "g")}
+    assert watcher.settings == {"argv": 1, "environ": 1}
+
+
+def test_watcher_frozen(environment):
+    _, cwd_path, user_path, *_ = environment
+    cwd_path.write_text("a = [1]\nb = {c = 1}")
+    user_path.write_text("d = {e = [1]}")
+    watcher = Watcher("a", "b", frozen=True)
+    settings = watcher.settings
+    assert settings == {"a": (1,), "b": {"c": 1}, "d": {"e": (1,)}, "argv": 1, "environ": 1}
+    hash(settings)
+
+    cwd_path.write_text("a = [2]\nb = {c = 1}")
+    assert watcher.poll() == {("a",)}
+    assert watcher.settings["a"] == (2,)
+    assert watcher.settings["b"] is settings["b"]
+    assert watcher.settings["d"] is settings["d"]
+
+
+def test_watcher_poll_shadowed_change(environment):
+    explicit_path, cwd_path, *_ = environment
+    explicit_path.write_text("a = 1")
+    cwd_path.write_text("a = 2")
+    watcher = Watcher("a", "b")
+    subscriber = MagicMock()
+    watcher.subscribe(subscriber)
+    cwd_path.write_text("a = 3")
+    assert watcher.poll() == frozenset()
+    assert watcher.settings["a"] == 1
+    subscriber.assert_not_called()
+
+
+def test_watcher_poll_invalid_file(environment, caplog):
+    _, cwd_path, _, load_from_file_mock, *_ = environment
+    cwd_path.write_text("[db]\nhost = 'a'\nport = 1")
+    watcher = Watcher("a", "b")
+    settings = watcher.settings
+    subscriber = MagicMock()
+    watcher.subscribe(subscriber)
+
+    cwd_path.write_text("[db]\nhost = 'a'\nport =")
+    assert watcher.poll() == frozenset()
+    assert watcher.settings is settings
+    assert watcher.settings["db"] == {"host": "a", "port": 1}
+    subscriber.assert_not_called()
+    assert "ignoring invalid config file: 'config.toml'" in caplog.messages
+    # the file is tried again until it can be parsed
+    assert watcher.poll() == frozenset()
+    assert load_from_file_mock.call_count == 5
+
+    cwd_path.write_text("[db]\nhost = 'a'\nport = 2")
+    assert watcher.poll() == {("db", "port")}
+    assert watcher.settings["db"] == {"host": "a", "port": 2}
+
+
+def test_watcher_subscriber_failure(environment, caplog):
+    explicit_path, *_ = environment
+    watcher = Watcher("a", "b")
+    failing_subscriber = MagicMock(side_effect=ValueError)
+    subscriber = MagicMock()
+    watcher.subscribe(failing_subscriber)
+    watcher.subscribe(subscriber)
+    explicit_path.write_text("explicit = 1")
+    changed_paths = watcher.poll()
+    failing_subscriber.assert_called_once_with(watcher.settings, changed_paths)
+    subscriber.assert_called_once_with(watcher.settings, changed_paths)
+    assert f"settings subscriber {failing_subscriber!r} failed" in caplog.messages
+
+
+def test_watcher_unsubscribe(environment):
+    explicit_path, *_ = environment
+    watcher = Watcher("a", "b")
+    subscriber = MagicMock()
+    unsubscribe = watcher.subscribe(subscriber)
+    unsubscribe()
+    explicit_path.write_text("a = 1")
+    assert watcher.poll() == {("a",)}
+    subscriber.assert_not_called()
+
+
+def test_watch_thread(environment):
+    explicit_path, *_ = environment
+    changed = Event()
+    with watch("a", "b", interval=0.01) as watcher:
+        watcher.subscribe(lambda settings, paths: changed.set())
+        explicit_path.write_text("a = 1")
+        assert changed.wait(5)
+    assert watcher.settings == {"a": 1, "argv": 1, "environ": 1}
+    assert watcher._thread is None